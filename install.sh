@@ -92,7 +92,7 @@ cat > "$BIN_DIR/spineguard" << 'EOF'
 # SpineGuard Launcher
 INSTALL_DIR="$HOME/.local/share/spineguard"
 cd "$INSTALL_DIR"
-exec python3 -m spineguard.app "$@"
+exec python3 -m spineguard.cli "$@"
 EOF
 chmod +x "$BIN_DIR/spineguard"
 
@@ -2,6 +2,7 @@
 """Main SpineGuard application."""
 
 import sys
+import time
 from pathlib import Path
 from typing import Optional
 
@@ -12,18 +13,32 @@ gi.require_version("Gdk", "4.0")
 
 from gi.repository import Gdk, Gio, GLib, Gtk
 
+from .breaks import BreakCoordinator
 from .config import Config
 from .idle import IdleDetector
+from .io_worker import default_worker
 from .notifications import NotificationManager
 from .overlay import BlockingOverlay, BreakOverlay
 from .screen_lock import ScreenLockDetector
 from .settings import SettingsDialog
 from .sounds import SoundPlayer
-from .stats import StatsManager, StatsWindow
-from .timers import BreakType, TimerManager
+from .stats import StatsManager
+from .stats_window import StatsWindow
+from .timers import (
+    EVENT_BREAK, EVENT_PHYSIO, EVENT_POSITION_SWITCH, EVENT_SUPPLEMENT, EVENT_WATER, TimerManager,
+)
+from .trace import TraceRecorder
 from .tray import TrayIcon
 from .micro_overlay import MicroBreakOverlay
 from .routines import RoutineProgress
+from .state import StateStore
+
+# Longest quit waits for queued file writes (e.g. a stalled NFS home)
+IO_FLUSH_TIMEOUT_SECONDS = 5
+
+# What the tray's "Coming up" menu lists (eye rest and warnings would crowd it)
+TRAY_UPCOMING_COUNT = 5
+TRAY_UPCOMING_KINDS = (EVENT_BREAK, EVENT_PHYSIO, EVENT_POSITION_SWITCH, EVENT_SUPPLEMENT, EVENT_WATER)
 
 
 class SpineGuardApp(Gtk.Application):
@@ -43,14 +58,14 @@ class SpineGuardApp(Gtk.Application):
         self._stats_manager: Optional[StatsManager] = None
         self._screen_lock_detector: Optional[ScreenLockDetector] = None
         self._idle_detector: Optional[IdleDetector] = None
+        self._timezone_monitor: Optional[Gio.FileMonitor] = None
+        self._breaks: Optional[BreakCoordinator] = None
+        self._state: Optional[StateStore] = None
+        self._io_worker = default_worker()
+        self._trace: Optional[TraceRecorder] = None
 
         self._current_overlay: Optional[BreakOverlay] = None
         self._blocking_overlays: list[BlockingOverlay] = []
-        self._current_break_type: Optional[str] = None
-
-        # Independent auto-pause flags
-        self._lock_auto_paused: bool = False
-        self._idle_auto_paused: bool = False
 
         # Singleton windows
         self._settings_window: Optional[SettingsDialog] = None
@@ -65,21 +80,30 @@ class SpineGuardApp(Gtk.Application):
 
         # Initialize components
         self._config = Config()
-        self._timer_manager = TimerManager(self._config)
+        self._config.watch()
+        self._state = StateStore()
+        self._timer_manager = TimerManager(self._config, state=self._state)
+        self._timer_manager.watch_calendars()
         self._notification_manager = NotificationManager(self)
         self._sound_player = SoundPlayer(config=self._config)
-        self._stats_manager = StatsManager()
-        self._routine_progress = RoutineProgress()
-
-        # Set up timer callbacks
-        self._timer_manager.set_pomodoro_callback(self._on_pomodoro_complete)
-        self._timer_manager.set_water_callback(self._on_water_reminder)
-        self._timer_manager.set_supplement_callback(self._on_supplement_reminder)
-        self._timer_manager.set_position_callback(self._on_position_switch)
-        self._timer_manager.set_physio_callback(self._on_physio_reminder)
-        self._timer_manager.set_pre_break_warning_callback(self._on_pre_break_warning)
-        self._timer_manager.set_breathing_callback(self._on_breathing_break)
-        self._timer_manager.set_eye_rest_callback(self._on_eye_rest)
+        self._stats_manager = StatsManager(
+            backend=self._config.snapshot.stats_backend,
+            retention_months=self._config.snapshot.stats_retention_months,
+            fsync=self._config.snapshot.stats_fsync,
+        )
+        self._routine_progress = RoutineProgress(self._state)
+        self._trace = TraceRecorder(self._config)
+        self._trace.start()
+
+        # Break state machine; this application presents its breaks
+        self._breaks = BreakCoordinator(
+            self._config,
+            self._timer_manager,
+            presenter=self,
+            stats_manager=self._stats_manager,
+            routine_progress=self._routine_progress,
+        )
+        self._timer_manager.set_pause_callback(self._on_pause_changed)
 
         # Register Gio actions for notification snooze buttons
         self._register_actions()
@@ -98,14 +122,19 @@ class SpineGuardApp(Gtk.Application):
             get_current_position=self._timer_manager.get_current_position,
             on_show_settings=self._on_show_settings,
             on_show_stats=self._on_show_stats,
+            on_command_received=lambda cmd: self._trace.record("tray", cmd),
+            get_upcoming=lambda: self._timer_manager.get_upcoming(TRAY_UPCOMING_COUNT, TRAY_UPCOMING_KINDS),
         )
 
         # Set up screen lock detection
         self._screen_lock_detector = ScreenLockDetector(
             on_lock=self._on_screen_lock,
             on_unlock=self._on_screen_unlock,
+            on_resume=self._on_clock_changed,
+            on_signal=lambda name, active: self._trace.record("signal", name, active),
         )
         self._screen_lock_detector.start()
+        self._watch_timezone()
 
         # Set up idle detection
         self._idle_detector = IdleDetector(
@@ -144,44 +173,32 @@ class SpineGuardApp(Gtk.Application):
     def _register_actions(self):
         """Register Gio actions for notification button callbacks."""
         snooze_water = Gio.SimpleAction.new("snooze-water", None)
-        snooze_water.connect("activate", lambda *_: self._timer_manager.snooze_water())
+        snooze_water.connect("activate", lambda *_: self._on_snooze("water"))
         self.add_action(snooze_water)
 
         snooze_supp_morning = Gio.SimpleAction.new("snooze-supplement-morning", None)
-        snooze_supp_morning.connect("activate", lambda *_: self._timer_manager.snooze_supplement(True))
+        snooze_supp_morning.connect("activate", lambda *_: self._on_snooze("supplement_morning"))
         self.add_action(snooze_supp_morning)
 
         snooze_supp_evening = Gio.SimpleAction.new("snooze-supplement-evening", None)
-        snooze_supp_evening.connect("activate", lambda *_: self._timer_manager.snooze_supplement(False))
+        snooze_supp_evening.connect("activate", lambda *_: self._on_snooze("supplement_evening"))
         self.add_action(snooze_supp_evening)
 
-    # --- Break overlay helpers ---
+    def _on_snooze(self, kind: str):
+        """Handle a snooze button on a reminder notification."""
+        self._trace.record("snooze", kind)
+        if kind == "water":
+            self._timer_manager.snooze_water()
+        else:
+            self._timer_manager.snooze_supplement(kind == "supplement_morning")
+
+    # --- Break presenter (called by BreakCoordinator) ---
 
-    def _show_break_overlay(self, break_type, duration, on_complete, on_skip, on_done_early=None, context=None):
+    def show_break(self, break_type, duration, on_complete, on_skip, on_done_early, context):
         """Create and show break overlay on all monitors."""
-        self._current_break_type = break_type
-        context = context or {}
-
-        # Compute track info for walk/lie-down breaks
-        track_info = None
-        if break_type in (BreakType.WALK, BreakType.LIE_DOWN) and self._routine_progress:
-            tracks, track_id = self._get_track_info(break_type)
-            routine = self._routine_progress.get_routine(tracks, track_id)
-            if routine:
-                context["routine"] = routine
-                context["track_id"] = track_id
-                track_data = tracks[track_id]
-                track_info = {
-                    "track_name": track_data["name"],
-                    "level": self._routine_progress.get_level(track_id),
-                    "completions": self._routine_progress.get_completions(track_id),
-                    "max_level": self._routine_progress.get_max_level(tracks, track_id),
-                }
-
-        streak = self._routine_progress.get_streak() if self._routine_progress else 0
-
-        # Extract breathing exercise from context
-        breathing_exercise = context.pop("breathing_exercise", None) if context else None
+        track_info = context.pop("track_info", None)
+        streak = context.pop("streak", 0)
+        breathing_exercise = context.pop("breathing_exercise", None)
 
         display = Gdk.Display.get_default()
         monitors = display.get_monitors()
@@ -191,18 +208,25 @@ class SpineGuardApp(Gtk.Application):
         if n_monitors > 0:
             primary_monitor = monitors.get_item(0)
 
+        def traced(outcome, callback):
+            def _run():
+                self._trace.record("overlay", outcome, break_type)
+                callback()
+            return _run
+
         self._current_overlay = BreakOverlay(
             break_type=break_type,
             duration_minutes=duration,
-            on_complete=on_complete,
-            on_skip=on_skip,
+            on_complete=traced("completed", on_complete),
+            on_skip=traced("skipped", on_skip),
             sound_player=self._sound_player,
             context=context,
-            on_done_early=on_done_early,
+            on_done_early=traced("done_early", on_done_early) if on_done_early else None,
             monitor=primary_monitor if n_monitors > 1 else None,
             track_info=track_info,
             streak=streak,
             breathing_exercise=breathing_exercise,
+            count_suspend=self._config.snapshot.suspend_counts_toward_break,
         )
         self._current_overlay.present()
 
@@ -217,38 +241,49 @@ class SpineGuardApp(Gtk.Application):
         if n_monitors > 0:
             monitors.connect("items-changed", self._on_monitors_changed)
 
+    def close_break(self):
+        """Forget the break overlay (it closes itself) and close the blockers."""
+        self._close_blocking_overlays()
+        self._current_overlay = None
+
+    def show_micro_break(self, message, duration_seconds, on_complete):
+        """Show the small eye rest popup."""
+        def _on_done():
+            self._current_micro_overlay = None
+            on_complete()
+
+        self._current_micro_overlay = MicroBreakOverlay(
+            message=message,
+            duration_seconds=duration_seconds,
+            on_complete=_on_done,
+        )
+        self._current_micro_overlay.present()
+
+    def play_break_start(self):
+        self._sound_player.play_break_start()
+
+    def notify_water(self):
+        """Called for water reminders."""
+        self._sound_player.play_water_reminder()
+        self._notification_manager.show_water_reminder()
+
+    def notify_supplement(self, morning: bool):
+        """Called for supplement reminders."""
+        self._sound_player.play_supplement_reminder()
+        self._notification_manager.show_supplement_reminder(morning)
+
+    def notify_pre_break_warning(self, break_type: str, seconds: int):
+        """Called when a pre-break warning should be shown."""
+        self._notification_manager.show_pre_break_warning(break_type, seconds)
+
+    # --- Break overlay helpers ---
+
     def _close_blocking_overlays(self):
         """Close all secondary monitor blocking overlays."""
         for blocker in self._blocking_overlays:
             blocker.close()
         self._blocking_overlays.clear()
 
-    def _end_break(self, outcome=None):
-        """Close break overlay and log stats. Returns the break type that ended."""
-        bt = self._current_break_type
-        self._close_blocking_overlays()
-        self._current_overlay = None
-        self._current_break_type = None
-        if bt and outcome:
-            getattr(self._stats_manager, f"log_break_{outcome}")(bt)
-        return bt
-
-    def _get_track_info(self, break_type):
-        """Get (tracks_dict, track_id) for walk/lie-down breaks."""
-        from . import tips
-        tracks = tips.WALK_TRACKS if break_type == BreakType.WALK else tips.LIE_DOWN_TRACKS
-        pinned_key = "pinned_walk_track" if break_type == BreakType.WALK else "pinned_lie_down_track"
-        pinned = self._config.get(pinned_key) if self._config.get("routine_mode") == "manual" else None
-        return tracks, self._routine_progress.get_today_track_id(tracks, pinned)
-
-    def _record_routine(self, bt):
-        """Record routine completion and day streak for walk/lie-down breaks."""
-        if bt in (BreakType.WALK, BreakType.LIE_DOWN) and self._routine_progress:
-            tracks, track_id = self._get_track_info(bt)
-            self._routine_progress.record_completion(track_id, tracks)
-        if self._routine_progress:
-            self._routine_progress.record_day_completion()
-
     def _show_singleton(self, attr, cls, *args, **kwargs):
         """Show a singleton window, creating it if needed."""
         existing = getattr(self, attr)
@@ -275,188 +310,72 @@ class SpineGuardApp(Gtk.Application):
             blocker.present()
             self._blocking_overlays.append(blocker)
 
-    # --- Pomodoro break callbacks ---
-
-    def _on_pomodoro_complete(self, break_type: str):
-        """Called when pomodoro timer completes - show break overlay."""
-        if self._current_overlay:
-            return
-        self._sound_player.play_break_start()
-        duration = self._timer_manager.get_break_duration(break_type)
-        self._show_break_overlay(
-            break_type=break_type,
-            duration=duration,
-            on_complete=self._on_break_complete,
-            on_skip=self._on_break_skipped,
-            on_done_early=self._on_break_done_early,
-        )
-
-    def _on_break_complete(self):
-        """Called when break timer runs to zero."""
-        bt = self._end_break("completed")
-        self._record_routine(bt)
-        self._timer_manager.break_completed()
-
-    def _on_break_done_early(self):
-        """Called when user clicks Done Early."""
-        bt = self._end_break("done_early")
-        self._record_routine(bt)
-        self._timer_manager.break_completed()
-
-    def _on_break_skipped(self):
-        """Called when break is skipped (emergency)."""
-        self._end_break("skipped")
-        if self._routine_progress:
-            self._routine_progress.record_skip()
-        self._timer_manager.skip_break()
-
-    # --- Position switch callbacks ---
-
-    def _on_position_switch(self, break_type: str):
-        """Called when position switch timer fires."""
-        if self._current_overlay:
-            self._timer_manager.position_switch_completed()
-            return
-        self._sound_player.play_break_start()
-        current = self._timer_manager.get_current_position()
-        next_position = "standing" if current == "sitting" else "sitting"
-        duration = self._timer_manager.get_break_duration(break_type)
-        self._show_break_overlay(
-            break_type=break_type,
-            duration=duration,
-            on_complete=self._on_position_switch_complete,
-            on_skip=self._on_position_switch_complete,
-            context={"next_position": next_position},
-        )
-
-    def _on_position_switch_complete(self):
-        """Called when position switch break completes or is skipped."""
-        self._end_break()
-        self._timer_manager.position_switch_completed()
-
-    # --- Physio / Breathing break callbacks (shared) ---
-
-    def _on_physio_reminder(self):
-        """Called when physio workout time arrives."""
-        if self._current_overlay:
-            return
-        self._sound_player.play_break_start()
-        self._show_break_overlay(
-            break_type=BreakType.PHYSIO,
-            duration=None,
-            on_complete=self._on_simple_break_complete,
-            on_skip=self._on_simple_break_skipped,
-        )
-
-    def _on_breathing_break(self):
-        """Called when a breathing break should trigger."""
-        if self._current_overlay:
-            return
-        from . import tips
-        exercise = tips.get_breathing_exercise()
-        self._sound_player.play_break_start()
-        self._show_break_overlay(
-            break_type=BreakType.BREATHING,
-            duration=2,
-            on_complete=self._on_simple_break_complete,
-            on_skip=self._on_simple_break_skipped,
-            on_done_early=self._on_simple_break_done_early,
-            context={"breathing_exercise": exercise},
-        )
-
-    def _on_simple_break_complete(self):
-        """Called when physio/breathing break completes."""
-        self._end_break("completed")
-
-    def _on_simple_break_done_early(self):
-        """Called when physio/breathing break is done early."""
-        self._end_break("done_early")
-
-    def _on_simple_break_skipped(self):
-        """Called when physio/breathing break is skipped."""
-        self._end_break("skipped")
-
-    # --- Eye rest callbacks ---
-
-    def _on_eye_rest(self):
-        """Called when eye rest micro-break triggers."""
-        if self._current_overlay or self._current_micro_overlay:
-            return
-
-        self._current_micro_overlay = MicroBreakOverlay(
-            message="Look at something 20 feet away",
-            duration_seconds=20,
-            on_complete=self._on_eye_rest_complete,
-        )
-        self._current_micro_overlay.present()
-
-    def _on_eye_rest_complete(self):
-        """Called when eye rest micro-break auto-completes."""
-        self._current_micro_overlay = None
-        self._stats_manager.log_break_completed(BreakType.EYE_REST)
-
-    # --- Notification callbacks ---
-
-    def _on_water_reminder(self):
-        """Called for water reminders."""
-        self._sound_player.play_water_reminder()
-        self._notification_manager.show_water_reminder()
-
-    def _on_supplement_reminder(self, morning: bool):
-        """Called for supplement reminders."""
-        self._sound_player.play_supplement_reminder()
-        self._notification_manager.show_supplement_reminder(morning)
-
-    def _on_pre_break_warning(self, break_type: str, seconds: int):
-        """Called when a pre-break warning should be shown."""
-        self._notification_manager.show_pre_break_warning(break_type, seconds)
-
     # --- Screen lock / idle auto-pause ---
 
     def _on_screen_lock(self):
-        """Called when screen is locked or system suspends."""
-        if not self._timer_manager.is_paused():
-            self._timer_manager.pause()
-            self._lock_auto_paused = True
+        """Called when screen is locked or system suspends.
+
+        Besides pausing, every periodic source is quiesced so a locked
+        session costs no wakeups: reminders are held and idle polling stops.
+        """
+        self._breaks.on_screen_lock()
+        self._idle_detector.suspend()
 
     def _on_screen_unlock(self):
         """Called when screen is unlocked or system resumes."""
-        if self._lock_auto_paused:
-            self._lock_auto_paused = False
-            if not self._idle_auto_paused:
-                self._timer_manager.resume()
+        self._breaks.on_screen_unlock()
+        self._idle_detector.resume()
 
     def _on_idle(self):
         """Called when user becomes idle."""
-        if not self._timer_manager.is_paused():
-            self._timer_manager.pause()
-            self._idle_auto_paused = True
+        self._trace.record("idle")
+        self._breaks.on_idle()
 
     def _on_active(self):
         """Called when user becomes active after being idle."""
-        if self._idle_auto_paused:
-            self._idle_auto_paused = False
-            if not self._lock_auto_paused:
-                self._timer_manager.resume()
+        self._trace.record("active")
+        self._breaks.on_active()
+
+    # --- Wall-clock changes ---
+
+    def _watch_timezone(self):
+        """Monitor /etc/localtime so daily reminders follow timezone changes."""
+        try:
+            localtime = Gio.File.new_for_path("/etc/localtime")
+            self._timezone_monitor = localtime.monitor_file(Gio.FileMonitorFlags.WATCH_MOVES, None)
+            self._timezone_monitor.connect("changed", self._on_timezone_changed)
+        except GLib.Error as e:
+            print(f"Timezone monitor unavailable: {e}")
+
+    def _on_timezone_changed(self, monitor, file, other_file, event_type):
+        """Reload the local timezone and re-arm wall-clock reminders."""
+        if event_type in (Gio.FileMonitorEvent.CHANGES_DONE_HINT, Gio.FileMonitorEvent.CREATED,
+                          Gio.FileMonitorEvent.RENAMED, Gio.FileMonitorEvent.MOVED_IN):
+            time.tzset()
+            self._on_clock_changed()
+
+    def _on_clock_changed(self):
+        """Called after resume or a timezone change."""
+        self._timer_manager.resync_clock()
+
+    def _on_pause_changed(self, paused: bool):
+        """Keep the tray display in step with pause/resume."""
+        if self._tray_icon:
+            self._tray_icon.refresh()
 
     # --- Tray menu actions ---
 
     def _on_pause_toggle(self):
         """Toggle pause state."""
-        if self._timer_manager.is_paused():
-            self._lock_auto_paused = False
-            self._idle_auto_paused = False
-            self._timer_manager.resume()
-        else:
-            self._timer_manager.pause()
+        self._breaks.toggle_pause()
 
     def _on_skip(self):
         """Skip the next break."""
-        self._timer_manager.skip_break()
+        self._breaks.skip()
 
     def _on_take_break(self):
         """Take a break immediately."""
-        self._timer_manager.take_break_now()
+        self._breaks.take_break_now()
 
     def _on_show_settings(self):
         """Show the settings dialog."""
@@ -475,10 +394,23 @@ class SpineGuardApp(Gtk.Application):
             self._screen_lock_detector.stop()
         if self._idle_detector:
             self._idle_detector.stop()
+        if self._timezone_monitor:
+            self._timezone_monitor.cancel()
         if self._timer_manager:
             self._timer_manager.stop()
+        if self._state:
+            self._state.flush()
+        if self._config:
+            self._config.flush()
+        if self._stats_manager:
+            self._stats_manager.flush()
         if self._tray_icon:
             self._tray_icon.cleanup()
+        if self._trace:
+            self._trace.stop()
+        # Barrier: every queued config, state, stats and trace write lands before exit
+        if not self._io_worker.stop(timeout=IO_FLUSH_TIMEOUT_SECONDS):
+            print("Timed out waiting for pending writes")
         self.quit()
 
 
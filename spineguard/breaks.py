@@ -0,0 +1,332 @@
+"""Break state machine for SpineGuard.
+
+BreakCoordinator decides what happens when a timer fires, a break ends
+or the session locks, and leaves all drawing, sound and notifications to
+a presenter. The GTK application is one presenter; the simulation
+harness is another, which lets the same logic run headless.
+"""
+
+from typing import Callable, Optional, Protocol
+
+from . import tips
+from .config import Config
+from .timers import BreakType, TimerManager
+
+
+class BreakPresenter(Protocol):
+    """What BreakCoordinator needs from a front end."""
+
+    def show_break(
+        self,
+        break_type: str,
+        duration: Optional[int],
+        on_complete: Callable[[], None],
+        on_skip: Callable[[], None],
+        on_done_early: Optional[Callable[[], None]],
+        context: dict,
+    ): ...
+
+    def close_break(self): ...
+
+    def show_micro_break(self, message: str, duration_seconds: int, on_complete: Callable[[], None]): ...
+
+    def play_break_start(self): ...
+
+    def notify_water(self): ...
+
+    def notify_supplement(self, morning: bool): ...
+
+    def notify_pre_break_warning(self, break_type: str, seconds: int): ...
+
+
+class BreakCoordinator:
+    """Connects TimerManager events to breaks, statistics and routine progress."""
+
+    def __init__(
+        self,
+        config: Config,
+        timer_manager: TimerManager,
+        presenter: BreakPresenter,
+        stats_manager=None,
+        routine_progress=None,
+    ):
+        self._config = config
+        self._timers = timer_manager
+        self._presenter = presenter
+        self._stats = stats_manager
+        self._routine_progress = routine_progress
+
+        self._current_break_type: Optional[str] = None
+        self._micro_break_active = False
+        # Set when the pomodoro expired or the physio workout fell due
+        # while another break was on screen
+        self._pomodoro_deferred = False
+        self._physio_deferred = False
+
+        # Independent auto-pause flags
+        self._lock_auto_paused: bool = False
+        self._idle_auto_paused: bool = False
+
+        timer_manager.set_pomodoro_callback(self.on_pomodoro_complete)
+        timer_manager.set_water_callback(presenter.notify_water)
+        timer_manager.set_supplement_callback(presenter.notify_supplement)
+        timer_manager.set_position_callback(self.on_position_switch)
+        timer_manager.set_physio_callback(self.on_physio_reminder)
+        timer_manager.set_pre_break_warning_callback(presenter.notify_pre_break_warning)
+        timer_manager.set_breathing_callback(self.on_breathing_break)
+        timer_manager.set_eye_rest_callback(self.on_eye_rest)
+
+    @property
+    def current_break_type(self) -> Optional[str]:
+        """Break type currently on screen, or None."""
+        return self._current_break_type
+
+    # --- Break lifecycle helpers ---
+
+    def _start_break(self, break_type, duration, on_complete, on_skip, on_done_early=None, context=None):
+        """Build the break context and hand the break to the presenter."""
+        self._current_break_type = break_type
+        context = context or {}
+
+        # Compute track info for walk/lie-down breaks
+        if break_type in (BreakType.WALK, BreakType.LIE_DOWN) and self._routine_progress:
+            tracks, track_id = self.get_track_info(break_type)
+            routine = self._routine_progress.get_routine(tracks, track_id)
+            if routine:
+                context["routine"] = routine
+                context["track_id"] = track_id
+                context["track_info"] = {
+                    "track_name": tracks[track_id]["name"],
+                    "level": self._routine_progress.get_level(track_id),
+                    "completions": self._routine_progress.get_completions(track_id),
+                    "max_level": self._routine_progress.get_max_level(tracks, track_id),
+                }
+
+        context["streak"] = self._routine_progress.get_streak() if self._routine_progress else 0
+
+        self._presenter.show_break(break_type, duration, on_complete, on_skip, on_done_early, context)
+
+    def _end_break(self, outcome=None):
+        """Close the break and log stats. Returns the break type that ended."""
+        bt = self._current_break_type
+        self._presenter.close_break()
+        self._current_break_type = None
+        if bt and outcome and self._stats:
+            getattr(self._stats, f"log_break_{outcome}")(bt)
+        return bt
+
+    def _start_deferred_break(self):
+        """Start a break that fell due while another break was showing.
+
+        The pomodoro break goes first; a deferred physio workout follows
+        when that break ends.
+        """
+        if self._current_break_type:
+            return
+        if self._pomodoro_deferred:
+            self._pomodoro_deferred = False
+            # The pomodoro may have been reset (e.g. skipped from the tray) meanwhile
+            if self._timers.get_seconds_remaining() == 0:
+                self.on_pomodoro_complete(self._timers.get_next_break_type())
+                return
+        if self._physio_deferred:
+            self._physio_deferred = False
+            self.on_physio_reminder()
+
+    def get_track_info(self, break_type):
+        """Get (tracks_dict, track_id) for walk/lie-down breaks."""
+        tracks = tips.WALK_TRACKS if break_type == BreakType.WALK else tips.LIE_DOWN_TRACKS
+        settings = self._config.snapshot
+        pinned = None
+        if settings.routine_mode == "manual":
+            pinned = settings.pinned_walk_track if break_type == BreakType.WALK else settings.pinned_lie_down_track
+        return tracks, self._routine_progress.get_today_track_id(tracks, pinned)
+
+    def _record_routine(self, bt):
+        """Record routine completion and day streak for walk/lie-down breaks."""
+        if bt in (BreakType.WALK, BreakType.LIE_DOWN) and self._routine_progress:
+            tracks, track_id = self.get_track_info(bt)
+            self._routine_progress.record_completion(track_id, tracks)
+        if self._routine_progress:
+            self._routine_progress.record_day_completion()
+
+    # --- Pomodoro break callbacks ---
+
+    def on_pomodoro_complete(self, break_type: str):
+        """Called when pomodoro timer completes - show break overlay.
+
+        If another break is on screen, the pomodoro break follows it rather
+        than being dropped (which would leave the countdown stuck at zero).
+        """
+        if self._current_break_type:
+            if self._timers.get_seconds_remaining() == 0:
+                self._pomodoro_deferred = True
+            return
+        self._presenter.play_break_start()
+        self._start_break(
+            break_type=break_type,
+            duration=self._timers.get_break_duration(break_type),
+            on_complete=self._on_break_complete,
+            on_skip=self._on_break_skipped,
+            on_done_early=self._on_break_done_early,
+        )
+
+    def _on_break_complete(self):
+        """Called when break timer runs to zero."""
+        bt = self._end_break("completed")
+        self._record_routine(bt)
+        self._timers.break_completed()
+        self._start_deferred_break()
+
+    def _on_break_done_early(self):
+        """Called when user clicks Done Early."""
+        bt = self._end_break("done_early")
+        self._record_routine(bt)
+        self._timers.break_completed()
+        self._start_deferred_break()
+
+    def _on_break_skipped(self):
+        """Called when break is skipped (emergency)."""
+        self._end_break("skipped")
+        if self._routine_progress:
+            self._routine_progress.record_skip()
+        self._timers.skip_break()
+        self._start_deferred_break()
+
+    # --- Position switch callbacks ---
+
+    def on_position_switch(self, break_type: str):
+        """Called when position switch timer fires."""
+        if self._current_break_type:
+            self._timers.position_switch_completed()
+            return
+        self._presenter.play_break_start()
+        current = self._timers.get_current_position()
+        next_position = "standing" if current == "sitting" else "sitting"
+        self._start_break(
+            break_type=break_type,
+            duration=self._timers.get_break_duration(break_type),
+            on_complete=self._on_position_switch_complete,
+            on_skip=self._on_position_switch_complete,
+            context={"next_position": next_position},
+        )
+
+    def _on_position_switch_complete(self):
+        """Called when position switch break completes or is skipped."""
+        self._end_break()
+        self._timers.position_switch_completed()
+        self._start_deferred_break()
+
+    # --- Physio / Breathing break callbacks (shared) ---
+
+    def on_physio_reminder(self):
+        """Called when physio workout time arrives.
+
+        If another break is on screen, the workout follows it rather than
+        being dropped for the day.
+        """
+        if self._current_break_type:
+            self._physio_deferred = True
+            return
+        self._presenter.play_break_start()
+        self._start_break(
+            break_type=BreakType.PHYSIO,
+            duration=None,
+            on_complete=self._on_simple_break_complete,
+            on_skip=self._on_simple_break_skipped,
+        )
+
+    def on_breathing_break(self):
+        """Called when a breathing break should trigger."""
+        if self._current_break_type:
+            return
+        self._presenter.play_break_start()
+        self._start_break(
+            break_type=BreakType.BREATHING,
+            duration=2,
+            on_complete=self._on_simple_break_complete,
+            on_skip=self._on_simple_break_skipped,
+            on_done_early=self._on_simple_break_done_early,
+            context={"breathing_exercise": tips.get_breathing_exercise()},
+        )
+
+    def _on_simple_break_complete(self):
+        """Called when physio/breathing break completes."""
+        self._end_break("completed")
+        self._start_deferred_break()
+
+    def _on_simple_break_done_early(self):
+        """Called when physio/breathing break is done early."""
+        self._end_break("done_early")
+        self._start_deferred_break()
+
+    def _on_simple_break_skipped(self):
+        """Called when physio/breathing break is skipped."""
+        self._end_break("skipped")
+        self._start_deferred_break()
+
+    # --- Eye rest callbacks ---
+
+    def on_eye_rest(self):
+        """Called when eye rest micro-break triggers."""
+        if self._current_break_type or self._micro_break_active:
+            return
+        self._micro_break_active = True
+        self._presenter.show_micro_break(
+            "Look at something 20 feet away", 20, self._on_eye_rest_complete,
+        )
+
+    def _on_eye_rest_complete(self):
+        """Called when eye rest micro-break auto-completes."""
+        self._micro_break_active = False
+        if self._stats:
+            self._stats.log_break_completed(BreakType.EYE_REST)
+
+    # --- Screen lock / idle auto-pause ---
+
+    def on_screen_lock(self):
+        """Called when screen is locked or system suspends."""
+        if not self._timers.is_paused():
+            self._timers.pause()
+            self._lock_auto_paused = True
+        self._timers.hold_reminders()
+
+    def on_screen_unlock(self):
+        """Called when screen is unlocked or system resumes."""
+        if self._lock_auto_paused:
+            self._lock_auto_paused = False
+            if not self._idle_auto_paused:
+                self._timers.resume()
+        self._timers.release_reminders()
+
+    def on_idle(self):
+        """Called when user becomes idle."""
+        if not self._timers.is_paused():
+            self._timers.pause()
+            self._idle_auto_paused = True
+
+    def on_active(self):
+        """Called when user becomes active after being idle."""
+        if self._idle_auto_paused:
+            self._idle_auto_paused = False
+            if not self._lock_auto_paused:
+                self._timers.resume()
+
+    # --- Tray menu actions ---
+
+    def toggle_pause(self):
+        """Toggle pause state."""
+        if self._timers.is_paused():
+            self._lock_auto_paused = False
+            self._idle_auto_paused = False
+            self._timers.resume()
+        else:
+            self._timers.pause()
+
+    def skip(self):
+        """Skip the next break."""
+        self._timers.skip_break()
+
+    def take_break_now(self):
+        """Take a break immediately."""
+        self._timers.take_break_now()
@@ -0,0 +1,508 @@
+"""Calendar busy-time index for SpineGuard.
+
+Reads local .ics files (e.g. a calendar export synced to disk) and keeps
+the busy time they describe as a sorted list of disjoint intervals, so
+"is this instant inside a meeting, and until when?" is one binary search.
+
+Files are read on the I/O worker, only when their mtime or size
+changes, and then only VEVENT blocks whose text is new are parsed;
+unchanged events come from a cache keyed by a hash of the block.
+Recurring events are expanded over a sliding window around now, which
+moves forward as time passes.
+"""
+
+import bisect
+import calendar
+import hashlib
+import os
+import re
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from .eventloop import EventLoop, default_loop
+from .io_worker import IOWorker, default_worker
+
+# How far recurrences are expanded around now
+WINDOW_BEFORE = timedelta(days=1)
+WINDOW_AFTER = timedelta(days=8)
+
+# Upper bound on occurrences generated per recurring event and window
+_MAX_OCCURRENCES = 1000
+
+_WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+_DURATION_RE = re.compile(r"([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+_BYDAY_RE = re.compile(r"([+-]?\d+)?(MO|TU|WE|TH|FR|SA|SU)$")
+
+
+class _Event:
+    """One parsed VEVENT: a single meeting, a recurring series or an override."""
+
+    __slots__ = ("uid", "start", "duration", "rrule", "exdates", "recurrence_id", "busy")
+
+    def __init__(self):
+        self.uid = ""
+        self.start: Optional[datetime] = None
+        self.duration = timedelta(0)
+        self.rrule: dict[str, str] = {}
+        self.exdates: set[float] = set()
+        self.recurrence_id: Optional[float] = None
+        self.busy = True
+
+
+def _unfold(text: str) -> list[str]:
+    """Join RFC 5545 folded continuation lines."""
+    lines: list[str] = []
+    for raw in text.splitlines():
+        if raw[:1] in (" ", "\t") and lines:
+            lines[-1] += raw[1:]
+        elif raw:
+            lines.append(raw)
+    return lines
+
+
+def _split_vevents(text: str) -> Iterator[str]:
+    """Yield the unfolded text of each VEVENT block."""
+    block: Optional[list[str]] = None
+    for line in _unfold(text):
+        upper = line.upper()
+        if upper == "BEGIN:VEVENT":
+            block = []
+        elif upper == "END:VEVENT":
+            if block is not None:
+                yield "\n".join(block)
+            block = None
+        elif block is not None:
+            block.append(line)
+
+
+def _parse_line(line: str) -> tuple[str, dict[str, str], str]:
+    """Split "NAME;PARAM=X:VALUE" into (name, params, value)."""
+    head, _, value = line.partition(":")
+    name, *params = head.split(";")
+    parsed = {}
+    for param in params:
+        key, _, val = param.partition("=")
+        parsed[key.upper()] = val.strip('"')
+    return name.upper(), parsed, value
+
+
+def _timezone(tzid: Optional[str]) -> Optional[tzinfo]:
+    if not tzid:
+        return None
+    try:
+        return ZoneInfo(tzid)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def _parse_datetime(value: str, params: dict[str, str]) -> Optional[datetime]:
+    """Parse a DATE-TIME value. All-day DATE values return None."""
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return None
+    try:
+        if value.endswith("Z"):
+            return datetime.strptime(value[:-1], "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
+        dt = datetime.strptime(value, "%Y%m%dT%H%M%S")
+    except ValueError:
+        return None
+    # Unknown or absent TZID: floating local time
+    return dt.replace(tzinfo=_timezone(params.get("TZID")))
+
+
+def _parse_duration(value: str) -> Optional[timedelta]:
+    match = _DURATION_RE.match(value.strip())
+    if not match:
+        return None
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0),
+        hours=int(hours or 0), minutes=int(minutes or 0), seconds=int(seconds or 0),
+    )
+    return -duration if sign == "-" else duration
+
+
+def _parse_event(block: str) -> Optional[_Event]:
+    """Parse one VEVENT block. Returns None for events that are never busy."""
+    event = _Event()
+    end: Optional[datetime] = None
+    duration: Optional[timedelta] = None
+    for line in block.split("\n"):
+        name, params, value = _parse_line(line)
+        if name == "UID":
+            event.uid = value
+        elif name == "DTSTART":
+            event.start = _parse_datetime(value, params)
+            if event.start is None:
+                return None
+        elif name == "DTEND":
+            end = _parse_datetime(value, params)
+        elif name == "DURATION":
+            duration = _parse_duration(value)
+        elif name == "RRULE":
+            event.rrule = _parse_rrule(value)
+            if event.rrule is None:
+                return None
+        elif name == "EXDATE":
+            for item in value.split(","):
+                exdate = _parse_datetime(item, params)
+                if exdate:
+                    event.exdates.add(exdate.timestamp())
+        elif name == "RECURRENCE-ID":
+            recurrence = _parse_datetime(value, params)
+            if recurrence:
+                event.recurrence_id = recurrence.timestamp()
+        elif name == "TRANSP" and value.upper() == "TRANSPARENT":
+            event.busy = False
+        elif name == "STATUS" and value.upper() == "CANCELLED":
+            event.busy = False
+
+    if event.start is None:
+        return None
+    if end is not None:
+        duration = end - event.start
+    event.duration = duration if duration and duration > timedelta(0) else timedelta(0)
+    return event
+
+
+def _parse_rrule(value: str) -> Optional[dict[str, str]]:
+    """RRULE parts by name, or None for a rule that cannot be expanded."""
+    rule = dict(part.partition("=")[::2] for part in value.upper().split(";") if part)
+    for key in ("INTERVAL", "COUNT"):
+        if key in rule and not (rule[key].isdigit() and int(rule[key]) > 0):
+            return None
+    for day in rule.get("BYDAY", "").split(","):
+        if not day:
+            continue
+        match = _BYDAY_RE.match(day)
+        if not match:
+            return None
+        # A month has at most five of any weekday
+        if match.group(1) and rule.get("FREQ") == "MONTHLY" and not 0 < abs(int(match.group(1))) <= 5:
+            return None
+    return rule
+
+
+def _add_months(dt: datetime, months: int) -> Optional[datetime]:
+    """Same day and time, months later. None if that month lacks the day."""
+    month = dt.month - 1 + months
+    year, month = dt.year + month // 12, month % 12 + 1
+    if dt.day > calendar.monthrange(year, month)[1]:
+        return None
+    return dt.replace(year=year, month=month)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> Optional[date]:
+    """The nth (or -nth from the end) weekday of a month."""
+    days_in_month = calendar.monthrange(year, month)[1]
+    days = [d for d in range(1, days_in_month + 1) if date(year, month, d).weekday() == weekday]
+    if n == 0 or abs(n) > len(days):
+        return None
+    return date(year, month, days[n - 1 if n > 0 else n])
+
+
+def _candidates(event: _Event, limit: datetime) -> Iterator[datetime]:
+    """Occurrence starts of a recurring event in order, before COUNT/UNTIL.
+
+    Stops at the first period (day, week, month or year) starting at or
+    after limit, whether or not any earlier period had an occurrence.
+    """
+    rule = event.rrule
+    start = event.start
+    freq = rule.get("FREQ")
+    interval = int(rule.get("INTERVAL", "1"))
+    byday = [_BYDAY_RE.match(day) for day in rule.get("BYDAY", "").split(",") if day]
+    byday = [(int(m.group(1)) if m.group(1) else 0, _WEEKDAYS[m.group(2)]) for m in byday]
+
+    if freq == "DAILY":
+        step = 0
+        while True:
+            dt = start + timedelta(days=step * interval)
+            if dt >= limit:
+                return
+            if not byday or dt.weekday() in {wd for _, wd in byday}:
+                yield dt
+            step += 1
+    elif freq == "WEEKLY":
+        weekdays = sorted({wd for _, wd in byday}) or [start.weekday()]
+        week_start = start - timedelta(days=start.weekday())
+        step = 0
+        while True:
+            week = week_start + timedelta(weeks=step * interval)
+            if week >= limit:
+                return
+            for wd in weekdays:
+                dt = week + timedelta(days=wd)
+                if dt >= start:
+                    yield dt
+            step += 1
+    elif freq == "MONTHLY":
+        first_of_month = start.replace(day=1)
+        step = 0
+        while True:
+            month = _add_months(first_of_month, step * interval)
+            if month >= limit:
+                return
+            if byday:
+                days = sorted(
+                    d for n, wd in byday
+                    for d in ([_nth_weekday(month.year, month.month, wd, n)] if n else
+                              [_nth_weekday(month.year, month.month, wd, i) for i in range(1, 6)])
+                    if d
+                )
+                for d in days:
+                    dt = datetime.combine(d, start.timetz())
+                    if dt >= start:
+                        yield dt
+            else:
+                dt = _add_months(start, step * interval)
+                if dt:
+                    yield dt
+            step += 1
+    elif freq == "YEARLY":
+        first_of_year = start.replace(month=1, day=1)
+        step = 0
+        while True:
+            if _add_months(first_of_year, 12 * step * interval) >= limit:
+                return
+            dt = _add_months(start, 12 * step * interval)
+            if dt:
+                yield dt
+            step += 1
+    else:
+        # Unsupported frequency: only the first occurrence is known to be right
+        yield start
+
+
+def _occurrences(event: _Event, window_start: datetime, window_end: datetime) -> Iterator[datetime]:
+    """Starts of the event's occurrences that overlap the window."""
+    if not event.rrule:
+        if event.start < window_end and event.start + event.duration > window_start:
+            yield event.start
+        return
+
+    count = int(event.rrule["COUNT"]) if "COUNT" in event.rrule else None
+    until = None
+    if "UNTIL" in event.rrule:
+        until_value = event.rrule["UNTIL"]
+        if len(until_value) == 8:
+            until_value += "T235959"
+        until = _parse_datetime(until_value, {})
+        if until is not None and until.tzinfo is None and event.start.tzinfo is not None:
+            until = until.replace(tzinfo=event.start.tzinfo)
+
+    yielded = 0
+    for index, dt in enumerate(_candidates(event, window_end)):
+        if count is not None and index >= count:
+            return
+        if until is not None and _timestamp(dt) > _timestamp(until):
+            return
+        if dt >= window_end or yielded >= _MAX_OCCURRENCES:
+            return
+        if dt + event.duration > window_start:
+            yielded += 1
+            yield dt
+
+
+def _timestamp(dt: datetime) -> float:
+    """Epoch seconds; naive (floating) times are taken as local time."""
+    return dt.timestamp()
+
+
+class _CalendarFile:
+    """Parse cache for one .ics file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.signature: Optional[tuple[float, int]] = None
+        self.events: dict[str, _Event] = {}
+
+
+class BusyIndex:
+    """Busy intervals from local .ics files, queried by instant.
+
+    Files are read and expanded on the I/O worker; busy_until() only
+    searches the intervals already in memory, so a calendar on a slow
+    mount never holds up the main loop. After watch(), a file monitor
+    triggers the re-read; without one, each query asks for a re-read
+    whose result the next query sees.
+    """
+
+    RELOAD_DELAY_MS = 200
+
+    def __init__(
+        self,
+        paths: Iterable[str] = (),
+        worker: Optional[IOWorker] = None,
+        loop: Optional[EventLoop] = None,
+    ):
+        self._worker = worker
+        self._loop = loop
+        self._paths: list[Path] = []
+        self._starts: list[float] = []
+        self._ends: list[float] = []
+        self._window: Optional[tuple[datetime, datetime]] = None
+        self._refreshing = False
+        # Instant to refresh around once the running refresh is done
+        self._refresh_again: Optional[datetime] = None
+        self._monitors: Optional[list] = None
+        self._reload_source: Optional[int] = None
+        # Owned by the I/O worker thread
+        self._files: dict[Path, _CalendarFile] = {}
+        self._expanded: Optional[tuple[datetime, datetime]] = None
+        self.set_paths(paths)
+
+    def set_paths(self, paths: Iterable[str]):
+        """Replace the set of calendar files, keeping caches of files still listed."""
+        self._paths = [Path(os.path.expanduser(p)) for p in paths]
+        if self._monitors is not None:
+            self.watch()
+        if self._paths:
+            self.refresh(datetime.now())
+        else:
+            self._window, self._starts, self._ends = None, [], []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._paths)
+
+    def busy_until(self, when: datetime) -> Optional[float]:
+        """End (epoch seconds) of the busy stretch containing when, or None if free."""
+        window = self._window
+        if self._monitors is None or window is None or not (window[0] <= when <= window[1] - WINDOW_BEFORE):
+            self.refresh(when)
+        instant = _timestamp(when)
+        i = bisect.bisect_right(self._starts, instant) - 1
+        if i >= 0 and instant < self._ends[i]:
+            return self._ends[i]
+        return None
+
+    def refresh(self, now: datetime):
+        """Pick up changed files and move the recurrence window on the I/O worker."""
+        if self._refreshing:
+            self._refresh_again = now
+            return
+        self._refreshing = True
+        paths = list(self._paths)
+
+        def _on_done(result, error):
+            self._refreshing = False
+            if error:
+                print(f"Calendar: {error}")
+            elif result is not None and paths == self._paths:
+                self._window, self._starts, self._ends = result
+            again, self._refresh_again = self._refresh_again, None
+            if again is not None:
+                self.refresh(again)
+
+        if self._worker is None:
+            self._worker = default_worker()
+        self._worker.submit(lambda: self._load(paths, now), _on_done)
+
+    # --- File monitoring ---
+
+    def watch(self):
+        """Re-read calendar files when they change instead of on every query."""
+        from gi.repository import Gio, GLib
+        for monitor in self._monitors or ():
+            monitor.cancel()
+        self._monitors = []
+        try:
+            for path in self._paths:
+                monitor = Gio.File.new_for_path(str(path)).monitor_file(Gio.FileMonitorFlags.WATCH_MOVES, None)
+                monitor.connect("changed", self._on_file_changed)
+                self._monitors.append(monitor)
+        except GLib.Error as e:
+            print(f"Calendar monitor unavailable: {e}")
+            for monitor in self._monitors:
+                monitor.cancel()
+            self._monitors = None
+
+    def _on_file_changed(self, monitor, file, other_file, event_type):
+        """Wait for a burst of file events (sync tool, atomic replace) to settle."""
+        if self._loop is None:
+            self._loop = default_loop()
+        if self._reload_source is not None:
+            self._loop.source_remove(self._reload_source)
+        self._reload_source = self._loop.timeout_add(self.RELOAD_DELAY_MS, self._on_reload_timeout)
+
+    def _on_reload_timeout(self) -> bool:
+        self._reload_source = None
+        self.refresh(datetime.now())
+        return False
+
+    # --- Worker thread ---
+
+    def _load(self, paths: list[Path], now: datetime) -> Optional[tuple[tuple[datetime, datetime], list[float], list[float]]]:
+        """(window, starts, ends) around now, or None if nothing changed."""
+        changed = set(paths) != set(self._files)
+        self._files = {path: self._files.get(path) or _CalendarFile(path) for path in paths}
+        for calendar_file in self._files.values():
+            changed |= self._reload(calendar_file)
+        window = self._expanded
+        if not changed and window is not None and window[0] <= now <= window[1] - WINDOW_BEFORE:
+            return None
+        return self._rebuild(now)
+
+    def _reload(self, calendar_file: _CalendarFile) -> bool:
+        """Re-parse the VEVENT blocks of a file that changed on disk."""
+        try:
+            stat = calendar_file.path.stat()
+            signature = (stat.st_mtime, stat.st_size)
+            if signature == calendar_file.signature:
+                return False
+            text = calendar_file.path.read_text(errors="replace")
+        except OSError:
+            if calendar_file.signature is None and not calendar_file.events:
+                return False
+            calendar_file.signature = None
+            calendar_file.events = {}
+            return True
+
+        events = {}
+        for block in _split_vevents(text):
+            key = hashlib.sha1(block.encode()).hexdigest()
+            if key in calendar_file.events:
+                events[key] = calendar_file.events[key]
+            elif key not in events:
+                event = _parse_event(block)
+                if event is not None:
+                    events[key] = event
+        calendar_file.signature = signature
+        calendar_file.events = events
+        return True
+
+    def _rebuild(self, now: datetime) -> tuple[tuple[datetime, datetime], list[float], list[float]]:
+        """Expand every cached event over the window and merge the busy intervals."""
+        window_start, window_end = now - WINDOW_BEFORE, now + WINDOW_AFTER
+        self._expanded = (window_start, window_end)
+        events = [event for f in self._files.values() for event in f.events.values()]
+
+        # Overridden instances of a series are dropped from the series itself
+        overridden = {(e.uid, e.recurrence_id) for e in events if e.recurrence_id is not None}
+
+        intervals = []
+        for event in events:
+            aware = event.start.tzinfo is not None
+            lo = window_start.astimezone() if aware else window_start
+            hi = window_end.astimezone() if aware else window_end
+            for dt in _occurrences(event, lo, hi):
+                start = _timestamp(dt)
+                if event.rrule and (start in event.exdates or (event.uid, start) in overridden):
+                    continue
+                if event.busy and event.duration:
+                    intervals.append((start, start + event.duration.total_seconds()))
+
+        intervals.sort()
+        starts: list[float] = []
+        ends: list[float] = []
+        for start, end in intervals:
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        return self._expanded, starts, ends
@@ -0,0 +1,202 @@
+"""Command-line entry point for SpineGuard.
+
+`spineguard` starts the app. `spineguard stats` prints break statistics
+for a date range as CSV or JSON lines without importing GTK, so it works
+from cron jobs and SSH sessions with no display:
+
+    spineguard stats summary --days 30
+    spineguard stats events --from 2026-01-01 --to 2026-03-31 --format jsonl
+
+`spineguard fleet ROOT` does the same for every stats log under ROOT,
+e.g. users' synced state directories, with per-team daily totals:
+
+    spineguard fleet /srv/spineguard-sync --team-depth 1 --days 30
+
+Rows are written as they are read, so memory use stays flat however long
+the history is. Days without events are left out of summaries.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Iterator, Optional, TextIO
+
+from .config import CHOICES, CONFIG_FILE, DEFAULTS, validate
+from .stats import StatsReader
+
+_SUMMARY_FIELDS = ("day", "completed", "done_early", "skipped", "compliance")
+_SUMMARY_BY_TYPE_FIELDS = ("day", "break_type", "completed", "done_early", "skipped", "compliance")
+_EVENT_FIELDS = ("timestamp", "event", "break_type")
+_FLEET_FIELDS = ("day", "team", "users", "completed", "done_early", "skipped", "compliance")
+_FLEET_EVENT_FIELDS = ("timestamp", "team", "user", "event", "break_type")
+
+
+def _configured_backend() -> str:
+    """stats_backend from config.json, read without setting up a Config."""
+    try:
+        with open(CONFIG_FILE, "r") as f:
+            return validate("stats_backend", json.load(f).get("stats_backend", DEFAULTS["stats_backend"]))
+    except (IOError, ValueError, AttributeError):
+        return DEFAULTS["stats_backend"]
+
+
+def _day(text: str) -> date:
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got {text!r}")
+
+
+def _counts(row: dict, counts: dict) -> dict:
+    """row with the outcome counts and compliance percentage added."""
+    due = counts["completed"] + counts["done_early"] + counts["skipped"]
+    compliance: Optional[int] = None
+    if due:
+        compliance = round((counts["completed"] + counts["done_early"]) / due * 100)
+    row.update(
+        completed=counts["completed"],
+        done_early=counts["done_early"],
+        skipped=counts["skipped"],
+        compliance=compliance,
+    )
+    return row
+
+
+def _summary_rows(reader: StatsReader, first: date, last: date, by_type: bool) -> Iterator[dict]:
+    for day, summary in reader.daily(first.isoformat(), last.isoformat()):
+        if not by_type:
+            yield _counts({"day": day}, summary)
+            continue
+        for break_type, counts in sorted(summary["by_type"].items()):
+            if counts["completed"] or counts["done_early"] or counts["skipped"]:
+                yield _counts({"day": day, "break_type": break_type}, counts)
+
+
+def _day_bounds(first: date, last: date) -> tuple[datetime, datetime]:
+    """Midnight starting first and midnight ending last."""
+    return (
+        datetime.combine(first, datetime.min.time()),
+        datetime.combine(last + timedelta(days=1), datetime.min.time()),
+    )
+
+
+def _write(rows: Iterator[dict], fields: tuple[str, ...], fmt: str, out: TextIO):
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fields, extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+    else:
+        for row in rows:
+            out.write(json.dumps(row) + "\n")
+
+
+def _add_range_arguments(parser: argparse.ArgumentParser):
+    """Date range and output format options shared by the subcommands."""
+    parser.add_argument("--days", type=int, default=7, help="today and the days before it (default 7)")
+    parser.add_argument("--from", dest="first", type=_day, metavar="YYYY-MM-DD", help="first day, instead of --days")
+    parser.add_argument("--to", dest="last", type=_day, metavar="YYYY-MM-DD", help="last day, inclusive (default today)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+
+
+def _range(parser: argparse.ArgumentParser, args: argparse.Namespace) -> tuple[date, date]:
+    last = args.last or date.today()
+    if args.first is None and args.days < 1:
+        parser.error("--days must be at least 1")
+    first = args.first or last - timedelta(days=args.days - 1)
+    if first > last:
+        parser.error("--from is after --to")
+    return first, last
+
+
+def _output(rows: Iterator[dict], fields: tuple[str, ...], fmt: str) -> int:
+    """Write rows to stdout; the exit status."""
+    try:
+        _write(rows, fields, fmt, sys.stdout)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Output cut short by e.g. `| head`; keep Python from complaining on exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except sqlite3.Error as e:
+        print(f"Could not read statistics: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def stats_main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="spineguard stats",
+        description="Print SpineGuard break statistics without starting the app.",
+    )
+    parser.add_argument("what", nargs="?", choices=("summary", "events"), default="summary",
+                        help="per-day totals (default) or raw events")
+    _add_range_arguments(parser)
+    parser.add_argument("--by-type", action="store_true", help="one summary row per day and break type")
+    parser.add_argument("--backend", choices=CHOICES["stats_backend"],
+                        help="where to read from (default: stats_backend in config.json)")
+    args = parser.parse_args(argv)
+
+    first, last = _range(parser, args)
+
+    reader = StatsReader(backend=args.backend or _configured_backend())
+    if args.what == "events":
+        rows, fields = reader.events(*_day_bounds(first, last)), _EVENT_FIELDS
+    else:
+        rows = _summary_rows(reader, first, last, args.by_type)
+        fields = _SUMMARY_BY_TYPE_FIELDS if args.by_type else _SUMMARY_FIELDS
+    return _output(rows, fields, args.format)
+
+
+def fleet_main(argv: list[str]) -> int:
+    # Imported here to keep multiprocessing out of `spineguard stats` start-up
+    from .stats_fleet import FLEET_CHECKPOINT_DIR, find_logs, merged_events, team_summaries
+
+    parser = argparse.ArgumentParser(
+        prog="spineguard fleet",
+        description="Combine the break statistics of every stats.jsonl under a directory.",
+    )
+    parser.add_argument("root", type=Path, help="directory to search for stats.jsonl files")
+    parser.add_argument("what", nargs="?", choices=("summary", "events"), default="summary",
+                        help="per-day team totals (default) or every user's events in time order")
+    _add_range_arguments(parser)
+    parser.add_argument("--team-depth", type=int, default=0, metavar="N",
+                        help="directories under ROOT that name a team (default 0: one team)")
+    parser.add_argument("--jobs", type=int, help="processes to scan logs with (default: one per CPU)")
+    parser.add_argument("--checkpoints", type=Path, default=FLEET_CHECKPOINT_DIR, metavar="DIR",
+                        help=f"where per-log progress is kept (default {FLEET_CHECKPOINT_DIR})")
+    args = parser.parse_args(argv)
+    first, last = _range(parser, args)
+    if not args.root.is_dir():
+        parser.error(f"{args.root} is not a directory")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    logs = find_logs(args.root, args.team_depth)
+    if not logs:
+        print(f"No {args.root}/**/stats.jsonl found", file=sys.stderr)
+    if args.what == "events":
+        return _output(merged_events(logs, *_day_bounds(first, last)), _FLEET_EVENT_FIELDS, args.format)
+    teams = team_summaries(logs, first.isoformat(), last.isoformat(), args.checkpoints, args.jobs)
+    rows = (_counts({"day": day, "team": team, "users": users}, summary) for day, team, users, summary in teams)
+    return _output(rows, _FLEET_FIELDS, args.format)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Entry point for the spineguard command."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["stats"]:
+        return stats_main(argv[1:])
+    if argv[:1] == ["fleet"]:
+        return fleet_main(argv[1:])
+    # Only the app itself needs GTK
+    from .app import main as app_main
+    return app_main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,14 @@
 """Configuration management for SpineGuard."""
 
 import json
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from .eventloop import EventLoop, default_loop
+from .io_worker import IOWorker, atomic_write, default_worker
+
+_MISSING = object()
 
 CONFIG_DIR = Path.home() / ".config" / "spineguard"
 CONFIG_FILE = CONFIG_DIR / "config.json"
@@ -35,77 +41,458 @@ DEFAULTS = {
     "physio_enabled": True,
     "physio_hour": 14,
     "physio_minute": 0,
+    "reminder_catch_up_minutes": 60,
     "breathing_enabled": True,
     "breathing_frequency": 3,
     "eye_rest_enabled": True,
     "eye_rest_interval_minutes": 20,
+    "suspend_counts_toward_break": True,
+    "calendar_files": [],
+    "calendar_busy_policy": "all",
+    "calendar_max_defer_minutes": 60,
+    "trace_recording": False,
+    "stats_backend": "jsonl",
+    "stats_retention_months": 24,
+    "stats_fsync": "batch",
     "routine_mode": "auto",
     "pinned_walk_track": None,
     "pinned_lie_down_track": None,
 }
 
+# Allowed (min, max) for integer settings; matches the settings dialog
+RANGES = {
+    "pomodoro_minutes": (1, 120),
+    "walk_break_minutes": (1, 30),
+    "lie_down_break_minutes": (1, 30),
+    "water_interval_minutes": (5, 180),
+    "supplement_morning_hour": (0, 23),
+    "supplement_morning_minute": (0, 59),
+    "supplement_evening_hour": (0, 23),
+    "supplement_evening_minute": (0, 59),
+    "position_switch_interval_minutes": (5, 120),
+    "position_switch_break_minutes": (1, 10),
+    "idle_threshold_minutes": (1, 30),
+    "pre_break_warning_minutes": (0, 10),
+    "physio_hour": (0, 23),
+    "physio_minute": (0, 59),
+    "reminder_catch_up_minutes": (0, 240),
+    "breathing_frequency": (1, 10),
+    "eye_rest_interval_minutes": (5, 60),
+    "calendar_max_defer_minutes": (0, 480),
+    "stats_retention_months": (0, 1200),
+}
+
+# Allowed values for settings that are one of a fixed set
+CHOICES = {
+    "mode": ("recovery", "sit_stand"),
+    "routine_mode": ("auto", "manual"),
+    "calendar_busy_policy": ("off", "pomodoro", "all"),
+    "stats_backend": ("jsonl", "sqlite"),
+    "stats_fsync": ("batch", "quit", "never"),
+}
+
+
+def validate(key: str, value: Any) -> Any:
+    """Return value coerced to the type of key's default, or raise ValueError."""
+    if key not in DEFAULTS:
+        return value
+    default = DEFAULTS[key]
+    if isinstance(default, bool):
+        if not isinstance(value, bool):
+            raise ValueError(f"{key} must be true or false, not {value!r}")
+    elif isinstance(default, int):
+        # bool is an int subclass; JSON may also hand us 25.0
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value != int(value):
+            raise ValueError(f"{key} must be a whole number, not {value!r}")
+        value = int(value)
+        low, high = RANGES.get(key, (value, value))
+        if not low <= value <= high:
+            raise ValueError(f"{key} must be between {low} and {high}, not {value}")
+    elif isinstance(default, list):
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            raise ValueError(f"{key} must be a list of strings, not {value!r}")
+    elif default is None:
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{key} must be a string or null, not {value!r}")
+    elif not isinstance(value, str):
+        raise ValueError(f"{key} must be a string, not {value!r}")
+    if key in CHOICES and value not in CHOICES[key]:
+        raise ValueError(f"{key} must be one of {', '.join(CHOICES[key])}, not {value!r}")
+    return value
+
+
+class ConfigSnapshot:
+    """Immutable, validated config values as typed attributes.
+
+    Config builds a new snapshot whenever a value changes, so hot paths can
+    read attributes without dict lookups or default fallbacks. Durations
+    are also precomputed in the units timers use.
+    """
+
+    mode: str
+    pomodoro_minutes: int
+    walk_break_minutes: int
+    lie_down_break_minutes: int
+    water_interval_minutes: int
+    supplement_morning_hour: int
+    supplement_morning_minute: int
+    supplement_evening_hour: int
+    supplement_evening_minute: int
+    position_switch_interval_minutes: int
+    position_switch_break_minutes: int
+    idle_threshold_minutes: int
+    idle_detection_enabled: bool
+    pre_break_warning_minutes: int
+    hotkey_pause: str
+    hotkey_break: str
+    sound_break_start: str
+    sound_break_end: str
+    sound_water: str
+    sound_supplement: str
+    physio_enabled: bool
+    physio_hour: int
+    physio_minute: int
+    reminder_catch_up_minutes: int
+    breathing_enabled: bool
+    breathing_frequency: int
+    eye_rest_enabled: bool
+    eye_rest_interval_minutes: int
+    suspend_counts_toward_break: bool
+    calendar_files: tuple[str, ...]
+    calendar_busy_policy: str
+    calendar_max_defer_minutes: int
+    trace_recording: bool
+    stats_backend: str
+    stats_retention_months: int
+    stats_fsync: str
+    routine_mode: str
+    pinned_walk_track: Optional[str]
+    pinned_lie_down_track: Optional[str]
+
+    # Derived
+    is_sit_stand: bool
+    pomodoro_seconds: int
+    pre_break_warning_seconds: int
+    water_interval_seconds: int
+    position_switch_interval_seconds: int
+    position_switch_cycle_seconds: int
+    eye_rest_interval_seconds: int
+    idle_threshold_ms: int
+    reminder_catch_up_seconds: int
+    calendar_max_defer_seconds: int
+
+    def __init__(self, values: dict):
+        """values must already be validated and contain every DEFAULTS key."""
+        set_ = super().__setattr__
+        for key in DEFAULTS:
+            value = values[key]
+            set_(key, tuple(value) if isinstance(value, list) else value)
+        set_("is_sit_stand", self.mode == "sit_stand")
+        set_("pomodoro_seconds", self.pomodoro_minutes * 60)
+        set_("pre_break_warning_seconds", self.pre_break_warning_minutes * 60)
+        set_("water_interval_seconds", self.water_interval_minutes * 60)
+        set_("position_switch_interval_seconds", self.position_switch_interval_minutes * 60)
+        set_("position_switch_cycle_seconds",
+             (self.position_switch_interval_minutes + self.position_switch_break_minutes) * 60)
+        set_("eye_rest_interval_seconds", self.eye_rest_interval_minutes * 60)
+        set_("idle_threshold_ms", self.idle_threshold_minutes * 60 * 1000)
+        set_("reminder_catch_up_seconds", self.reminder_catch_up_minutes * 60)
+        set_("calendar_max_defer_seconds", self.calendar_max_defer_minutes * 60)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("ConfigSnapshot is immutable; use Config.set()")
+
+    def break_minutes(self, break_type: str) -> int:
+        """Break length in minutes for a walk, lie-down or position-switch break."""
+        if break_type == "walk":
+            return self.walk_break_minutes
+        if break_type == "position_switch":
+            return self.position_switch_break_minutes
+        return self.lie_down_break_minutes
+
 
 class Config:
-    """Manages SpineGuard configuration with JSON persistence."""
+    """Manages SpineGuard configuration with JSON persistence.
+
+    set() validates, updates memory and the snapshot, and notifies
+    callbacks immediately. Inside batch() several set() calls become one
+    change: the snapshot is rebuilt, the save scheduled and subscribers
+    notified once, with every key that changed. The file is written once the values have been
+    quiet for SAVE_DELAY_MS, so a spin button held down costs one write.
+    Call flush() to write right away.
+
+    After watch(), edits made to the file by anything else (a text editor,
+    provisioning tooling) are applied live: the file is diffed against
+    what was last read or written, and callbacks fire only for the keys
+    that changed there.
+    """
 
-    def __init__(self):
+    SAVE_DELAY_MS = 500
+    RELOAD_DELAY_MS = 200
+
+    def __init__(
+        self,
+        path: Optional[Path] = CONFIG_FILE,
+        worker: Optional[IOWorker] = None,
+        loop: Optional[EventLoop] = None,
+    ):
+        """Load config from path. With path=None the config lives in memory only."""
+        self._path = path
+        self._worker = worker
+        self._loop = loop
+        self._save_source: Optional[int] = None
+        self._reload_source: Optional[int] = None
+        self._monitor = None
+        self._snapshot: ConfigSnapshot
         self._data: dict = {}
+        # What config.json holds as far as we know: last read or written
+        self._disk: dict = {}
+        # Bumped by every flush(); a read queued before it is stale
+        self._writes = 0
         self._callbacks: list[Callable[[str, Any], None]] = []
+        # Per-key subscriptions: key -> [(callback, keys)], see subscribe()
+        self._subscribers: dict[str, list[tuple[Callable[[frozenset], None], frozenset]]] = {}
+        # Open batch() depth, keys changed so far and their values before it
+        self._batch_depth = 0
+        self._changed: dict[str, None] = {}
+        self._undo: dict[str, Any] = {}
         self._load()
 
     def _load(self):
         """Load config from disk, writing defaults on first run."""
-        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-        if CONFIG_FILE.exists():
+        if self._path is None:
+            self._data = dict(DEFAULTS)
+            self._snapshot = ConfigSnapshot(self._data)
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        if self._path.exists():
             try:
-                with open(CONFIG_FILE, "r") as f:
+                with open(self._path, "r") as f:
                     self._data = json.load(f)
             except (json.JSONDecodeError, IOError):
                 self._data = {}
+            if not isinstance(self._data, dict):
+                self._data = {}
+        self._disk = dict(self._data)
 
-        # Merge in any missing defaults
+        # Merge in missing defaults and replace values that fail validation
         changed = False
         for key, value in DEFAULTS.items():
             if key not in self._data:
                 self._data[key] = value
                 changed = True
+                continue
+            try:
+                self._data[key] = validate(key, self._data[key])
+            except ValueError as e:
+                print(f"Config: {e}; using default {value!r}")
+                self._data[key] = value
+                changed = True
 
+        self._snapshot = ConfigSnapshot(self._data)
         if changed:
-            self._save()
+            self.flush()
 
-    def _save(self):
-        """Save config to disk."""
-        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-        try:
-            with open(CONFIG_FILE, "w") as f:
-                json.dump(self._data, f, indent=2)
-        except IOError:
-            pass
+    def _schedule_save(self):
+        """(Re)start the quiet period after which pending changes are written."""
+        if self._path is None:
+            return
+        if self._loop is None:
+            self._loop = default_loop()
+        if self._save_source is not None:
+            self._loop.source_remove(self._save_source)
+        self._save_source = self._loop.timeout_add(self.SAVE_DELAY_MS, self._on_save_timeout)
+
+    def _on_save_timeout(self) -> bool:
+        self._save_source = None
+        self.flush()
+        return False
+
+    def flush(self):
+        """Write the config now, atomically, on the I/O worker thread."""
+        if self._save_source is not None:
+            self._loop.source_remove(self._save_source)
+            self._save_source = None
+        if self._path is None:
+            return
+        text = json.dumps(self._data, indent=2)
+        self._disk = dict(self._data)
+        self._writes += 1
+        path = self._path
+        if self._worker is None:
+            self._worker = default_worker()
+        self._worker.submit(lambda: atomic_write(path, text))
 
     def get(self, key: str, default: Any = None) -> Any:
         """Get a config value."""
         return self._data.get(key, default if default is not None else DEFAULTS.get(key))
 
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """The current values as an immutable, typed snapshot."""
+        return self._snapshot
+
     def set(self, key: str, value: Any):
-        """Set a config value and notify callbacks."""
-        old_value = self._data.get(key)
+        """Set a config value and notify callbacks. Raises ValueError if invalid."""
+        value = validate(key, value)
+        old_value = self._data.get(key, _MISSING)
         if old_value == value:
             return
+        if self._batch_depth:
+            self._undo.setdefault(key, old_value)
         self._data[key] = value
-        self._save()
-        for callback in self._callbacks:
-            callback(key, value)
+        self._changed[key] = None
+        if not self._batch_depth:
+            self._commit()
+
+    @contextmanager
+    def batch(self) -> Iterator["Config"]:
+        """Group several set() calls into one change.
+
+        Until the outermost batch ends, get() returns the new values but the
+        snapshot still holds the old ones and no callback runs. If the block
+        raises, every value it set is restored and nobody is notified.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._batch_depth == 1:
+                for key, value in self._undo.items():
+                    if value is _MISSING:
+                        self._data.pop(key, None)
+                    else:
+                        self._data[key] = value
+                self._undo.clear()
+                self._changed.clear()
+            raise
+        finally:
+            self._batch_depth -= 1
+        if not self._batch_depth:
+            self._undo.clear()
+            self._commit()
+
+    def _commit(self, save: bool = True):
+        """Publish pending changes: snapshot, save and notifications, once."""
+        changed = list(self._changed)
+        self._changed.clear()
+        if not changed:
+            return
+        if any(key in DEFAULTS for key in changed):
+            self._snapshot = ConfigSnapshot(self._data)
+        if save:
+            self._schedule_save()
+        for key in changed:
+            for callback in self._callbacks:
+                callback(key, self._data[key])
+
+        # Each subscriber runs once, with the subset of keys it asked for
+        notify: dict[int, tuple[Callable[[frozenset], None], frozenset]] = {}
+        for key in changed:
+            for subscription in self._subscribers.get(key, ()):
+                notify.setdefault(id(subscription), subscription)
+        changed_keys = frozenset(changed)
+        for callback, keys in notify.values():
+            callback(keys & changed_keys)
+
+    # --- Live reload ---
+
+    def watch(self):
+        """Start applying outside edits of config.json without a restart."""
+        if self._path is None or self._monitor is not None:
+            return
+        from gi.repository import Gio, GLib
+        try:
+            self._monitor = Gio.File.new_for_path(str(self._path)).monitor_file(
+                Gio.FileMonitorFlags.WATCH_MOVES, None
+            )
+            self._monitor.connect("changed", self._on_file_changed)
+        except GLib.Error as e:
+            print(f"Config monitor unavailable: {e}")
+
+    def _on_file_changed(self, monitor, file, other_file, event_type):
+        """Wait for a burst of file events (editor save, atomic replace) to settle."""
+        if self._loop is None:
+            self._loop = default_loop()
+        if self._reload_source is not None:
+            self._loop.source_remove(self._reload_source)
+        self._reload_source = self._loop.timeout_add(self.RELOAD_DELAY_MS, self._on_reload_timeout)
+
+    def _on_reload_timeout(self) -> bool:
+        self._reload_source = None
+        self.reload()
+        return False
+
+    def reload(self):
+        """Re-read config.json on the I/O worker and apply what changed there."""
+        if self._path is None:
+            return
+        path = self._path
+        writes = self._writes
+
+        def _read() -> Any:
+            with open(path, "r") as f:
+                return json.load(f)
+
+        def _on_read(data, error):
+            # A half-written or deleted file is ignored; the next event retries.
+            # A read from before our own write would undo it: the write's
+            # file event reloads again once it is on disk.
+            if error is None and writes == self._writes:
+                self.apply_file_contents(data)
+
+        if self._worker is None:
+            self._worker = default_worker()
+        self._worker.submit(_read, _on_read)
+
+    def apply_file_contents(self, data: Any):
+        """Apply keys that differ from the last known file contents.
+
+        Values changed in memory but not in the file (e.g. a pending
+        debounced save) are kept. Keys removed from the file fall back to
+        their defaults; invalid values are reported and ignored.
+        """
+        if not isinstance(data, dict):
+            return
+        contents = dict(DEFAULTS)
+        contents.update(data)
+        for key, value in contents.items():
+            if key in self._disk and self._disk[key] == value:
+                continue
+            try:
+                value = validate(key, value)
+            except ValueError as e:
+                print(f"Config: {e}; ignoring the edit")
+                continue
+            if self._data.get(key) != value:
+                self._data[key] = value
+                self._changed[key] = None
+        self._disk = contents
+        if self._changed:
+            print(f"Config reloaded: {', '.join(self._changed)}")
+        # The file already holds these values, so there is nothing to save
+        self._commit(save=False)
+
+    def as_dict(self) -> dict:
+        """Copy of every config value."""
+        return dict(self._data)
 
     def on_change(self, callback: Callable[[str, Any], None]):
-        """Register a callback for config changes. Called with (key, value)."""
+        """Register a callback for every config change. Called with (key, value)."""
         self._callbacks.append(callback)
 
+    def subscribe(self, keys: Iterable[str], callback: Callable[[frozenset], None]):
+        """Call callback(changed_keys) once per change that touches any of keys."""
+        subscription = (callback, frozenset(keys))
+        for key in subscription[1]:
+            self._subscribers.setdefault(key, []).append(subscription)
+
     @property
     def is_sit_stand(self) -> bool:
         """Check if sit-stand desk mode is active."""
-        return self.get("mode") == "sit_stand"
+        return self._snapshot.is_sit_stand
 
     @property
     def mode(self) -> str:
         """Get the current mode."""
-        return self.get("mode")
+        return self._snapshot.mode
@@ -0,0 +1,156 @@
+"""Main-loop and clock abstraction for SpineGuard.
+
+Timing code talks to an EventLoop instead of calling GLib and
+datetime.now() directly. The app runs on GLibEventLoop; the simulation
+harness swaps in VirtualEventLoop, whose clock only moves when told to,
+so days of scheduling run in milliseconds without a display.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+
+class EventLoop:
+    """Timeouts plus the two clocks timing code needs."""
+
+    def monotonic(self) -> float:
+        """Seconds on a clock that never jumps and stops while suspended."""
+        raise NotImplementedError
+
+    def now(self) -> datetime:
+        """Current local wall-clock time (naive, like datetime.now())."""
+        raise NotImplementedError
+
+    def timeout_add(self, interval_ms: int, callback: Callable[[], bool]) -> int:
+        """Call callback after interval_ms, repeating while it returns True."""
+        raise NotImplementedError
+
+    def timeout_add_seconds(self, interval: int, callback: Callable[[], bool]) -> int:
+        """Like timeout_add with a whole-second interval."""
+        return self.timeout_add(interval * 1000, callback)
+
+    def idle_add(self, callback: Callable[[], bool]) -> int:
+        """Call callback as soon as the loop is idle."""
+        return self.timeout_add(0, callback)
+
+    def source_remove(self, source_id: int):
+        """Cancel a source returned by one of the add methods."""
+        raise NotImplementedError
+
+
+class GLibEventLoop(EventLoop):
+    """The real GLib main loop and system clocks."""
+
+    def __init__(self):
+        from gi.repository import GLib
+        self._glib = GLib
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def timeout_add(self, interval_ms: int, callback: Callable[[], bool]) -> int:
+        return self._glib.timeout_add(interval_ms, callback)
+
+    def timeout_add_seconds(self, interval: int, callback: Callable[[], bool]) -> int:
+        return self._glib.timeout_add_seconds(interval, callback)
+
+    def idle_add(self, callback: Callable[[], bool]) -> int:
+        return self._glib.idle_add(callback)
+
+    def source_remove(self, source_id: int):
+        self._glib.source_remove(source_id)
+
+
+_default_loop: Optional[EventLoop] = None
+
+
+def default_loop() -> EventLoop:
+    """The process-wide GLib loop, created on first use."""
+    global _default_loop
+    if _default_loop is None:
+        _default_loop = GLibEventLoop()
+    return _default_loop
+
+
+class VirtualEventLoop(EventLoop):
+    """A deterministic loop whose time only advances in run_for()/run_until().
+
+    Sources due at the same instant run in the order they were added.
+    Like GLib, sources may be added from other threads (e.g. IOWorker
+    completions); they are dispatched on the thread running the loop.
+    The wall clock starts at start and moves in lockstep with the
+    monotonic clock unless jump_wall_clock() or suspend() says otherwise.
+    """
+
+    def __init__(self, start: Optional[datetime] = None):
+        self._start = start or datetime(2026, 1, 5, 9, 0)  # a Monday morning
+        self._monotonic = 0.0
+        self._wall_offset = timedelta(0)
+        self._queue: list[tuple[float, int, int]] = []
+        self._sources: dict[int, tuple[Callable[[], bool], float]] = {}
+        self._counter = itertools.count()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.dispatched = 0
+
+    def monotonic(self) -> float:
+        return self._monotonic
+
+    def now(self) -> datetime:
+        return self._start + timedelta(seconds=self._monotonic) + self._wall_offset
+
+    def timeout_add(self, interval_ms: int, callback: Callable[[], bool]) -> int:
+        with self._lock:
+            source_id = next(self._ids)
+            interval = max(0, interval_ms) / 1000
+            self._sources[source_id] = (callback, interval)
+            heapq.heappush(self._queue, (self._monotonic + interval, next(self._counter), source_id))
+        return source_id
+
+    def source_remove(self, source_id: int):
+        with self._lock:
+            self._sources.pop(source_id, None)
+
+    def pending(self) -> int:
+        """Number of live sources."""
+        return len(self._sources)
+
+    def jump_wall_clock(self, delta: timedelta):
+        """Step the wall clock (NTP correction, manual change) without moving monotonic time."""
+        self._wall_offset += delta
+
+    def suspend(self, seconds: float):
+        """Sleep the machine: wall time moves on, monotonic time and sources do not."""
+        self._wall_offset += timedelta(seconds=seconds)
+
+    def run_until(self, deadline: float):
+        """Dispatch every source due up to the monotonic deadline."""
+        while True:
+            with self._lock:
+                if not self._queue or self._queue[0][0] > deadline:
+                    break
+                due, _, source_id = heapq.heappop(self._queue)
+                entry = self._sources.get(source_id)
+                if entry is None:
+                    continue
+                self._monotonic = max(self._monotonic, due)
+            callback, interval = entry
+            self.dispatched += 1
+            repeat = callback()
+            with self._lock:
+                if repeat and source_id in self._sources:
+                    heapq.heappush(self._queue, (self._monotonic + interval, next(self._counter), source_id))
+                else:
+                    self._sources.pop(source_id, None)
+        self._monotonic = max(self._monotonic, deadline)
+
+    def run_for(self, seconds: float):
+        """Advance time by seconds, dispatching everything that falls due."""
+        self.run_until(self._monotonic + seconds)
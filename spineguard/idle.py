@@ -8,9 +8,8 @@ import ctypes
 import ctypes.util
 from typing import Callable, Optional
 
-from gi.repository import Gio, GLib
-
 from .config import Config
+from .eventloop import EventLoop, default_loop
 
 
 class _X11IdleBackend:
@@ -89,6 +88,8 @@ class _WaylandIdleBackend:
         self._proxy = None
 
         try:
+            from gi.repository import Gio
+            self._Gio = Gio
             self._proxy = Gio.DBusProxy.new_for_bus_sync(
                 Gio.BusType.SESSION,
                 Gio.DBusProxyFlags.NONE,
@@ -122,7 +123,7 @@ class _WaylandIdleBackend:
             result = self._proxy.call_sync(
                 "GetIdletime",
                 None,
-                Gio.DBusCallFlags.NONE,
+                self._Gio.DBusCallFlags.NONE,
                 1000,
                 None,
             )
@@ -139,47 +140,79 @@ class IdleDetector:
         config: Config,
         on_idle: Callable[[], None],
         on_active: Callable[[], None],
+        loop: Optional[EventLoop] = None,
+        backend: Optional[object] = None,
     ):
+        """backend is anything with get_idle_ms(); autodetected when omitted."""
         self._config = config
         self._on_idle = on_idle
         self._on_active = on_active
+        self._loop = loop or default_loop()
         self._is_idle = False
         self._poll_id: Optional[int] = None
-        self._backend: Optional[object] = None
+        self._backend: Optional[object] = backend
+        self._started = False
+        self._suspended = False
 
         # Try X11 first, then Wayland/GNOME
-        x11 = _X11IdleBackend()
-        if x11.available:
-            self._backend = x11
-        else:
-            wayland = _WaylandIdleBackend()
-            if wayland.available:
-                self._backend = wayland
+        if self._backend is None:
+            x11 = _X11IdleBackend()
+            if x11.available:
+                self._backend = x11
+            else:
+                wayland = _WaylandIdleBackend()
+                if wayland.available:
+                    self._backend = wayland
 
         if not self._backend:
             print("IdleDetector: no idle detection backend available")
 
+        self._config.subscribe(("idle_detection_enabled",), self._on_config_change)
+
     def start(self):
         """Start polling for idle state."""
-        if not self._backend:
-            return
-        if not self._config.get("idle_detection_enabled"):
-            return
-        self._poll_id = GLib.timeout_add_seconds(10, self._poll)
+        self._started = True
+        self._update_polling()
 
     def stop(self):
         """Stop polling."""
+        self._started = False
+        self._update_polling()
+
+    def suspend(self):
+        """Stop polling while the session is locked (the user is away anyway)."""
+        self._suspended = True
+        self._update_polling()
+
+    def resume(self):
+        """Resume polling after unlock, checking the idle state right away."""
+        self._suspended = False
+        self._update_polling()
         if self._poll_id:
-            GLib.source_remove(self._poll_id)
+            self._poll()
+
+    def _update_polling(self):
+        """Keep the poll source alive only while it can report anything."""
+        wanted = (
+            self._started
+            and not self._suspended
+            and self._backend is not None
+            and self._config.snapshot.idle_detection_enabled
+        )
+        if wanted and not self._poll_id:
+            self._poll_id = self._loop.timeout_add_seconds(10, self._poll)
+        elif not wanted and self._poll_id:
+            self._loop.source_remove(self._poll_id)
             self._poll_id = None
 
+    def _on_config_change(self, changed: frozenset):
+        self._update_polling()
+
     def _poll(self) -> bool:
         """Check idle state every 10 seconds."""
-        if not self._config.get("idle_detection_enabled"):
-            return True
 
         idle_ms = self._backend.get_idle_ms()
-        threshold_ms = self._config.get("idle_threshold_minutes") * 60 * 1000
+        threshold_ms = self._config.snapshot.idle_threshold_ms
 
         if idle_ms >= threshold_ms and not self._is_idle:
             self._is_idle = True
@@ -0,0 +1,121 @@
+"""Background file I/O for SpineGuard.
+
+Config, state, stats and trace writes run on one worker thread so a slow
+filesystem (e.g. an NFS home directory) never stalls the GLib main loop.
+Jobs run strictly in submission order, completions are delivered back on
+the main loop, and flush() is a barrier for shutdown.
+"""
+
+import os
+import queue
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+from .eventloop import EventLoop, default_loop
+
+Completion = Callable[[Any, Optional[BaseException]], None]
+
+
+def atomic_write(path: Path, text: Union[str, bytes]):
+    """Replace path with text (or bytes) via a fsynced temp file and rename."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb" if isinstance(text, bytes) else "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    # Make the rename itself durable
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+class IOWorker:
+    """A single background thread that runs file jobs in FIFO order."""
+
+    def __init__(self, loop: Optional[EventLoop] = None):
+        self._loop = loop
+        self._queue: "queue.Queue[Optional[tuple[Callable[[], Any], Optional[Completion]]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, job: Callable[[], Any], on_done: Optional[Completion] = None):
+        """Queue job; on_done(result, error) is then called on the main loop.
+
+        job must not touch GTK or state shared with the main thread: take
+        a snapshot (e.g. serialized JSON) before submitting.
+        """
+        self._ensure_thread()
+        self._queue.put((job, on_done))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every job submitted so far has run. False on timeout."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put((done.set, None))
+        return done.wait(timeout)
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """Finish queued jobs and end the thread. False if it did not finish in time."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return True
+        self._queue.put(None)
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None:
+                if self._loop is None:
+                    self._loop = default_loop()
+                self._thread = threading.Thread(target=self._run, name="spineguard-io", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            job, on_done = item
+            result, error = None, None
+            try:
+                result = job()
+            except Exception as e:
+                error = e
+            if on_done:
+                self._loop.idle_add(self._completion(on_done, result, error))
+            elif error:
+                print(f"Background write failed: {error}")
+
+    @staticmethod
+    def _completion(on_done: Completion, result: Any, error: Optional[BaseException]) -> Callable[[], bool]:
+        def _deliver() -> bool:
+            on_done(result, error)
+            return False
+        return _deliver
+
+
+_default_worker: Optional[IOWorker] = None
+
+
+def default_worker() -> IOWorker:
+    """The process-wide I/O worker, created on first use."""
+    global _default_worker
+    if _default_worker is None:
+        _default_worker = IOWorker()
+    return _default_worker
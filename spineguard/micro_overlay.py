@@ -1,5 +1,6 @@
 """Lightweight micro-break overlay for SpineGuard (eye rest, etc.)."""
 
+import math
 from typing import Callable, Optional
 
 import gi
@@ -10,6 +11,7 @@ gi.require_version("Gdk", "4.0")
 from gi.repository import GLib, Gtk
 
 from .overlay import _keep_above_on_realize
+from .scheduler import Countdown
 
 
 class MicroBreakOverlay(Gtk.Window):
@@ -24,7 +26,7 @@ class MicroBreakOverlay(Gtk.Window):
         super().__init__()
 
         self._duration_seconds = duration_seconds
-        self._seconds_remaining = duration_seconds
+        self._countdown = Countdown(duration_seconds)
         self._on_complete = on_complete
         self._timer_id: Optional[int] = None
 
@@ -66,12 +68,12 @@ class MicroBreakOverlay(Gtk.Window):
         self._timer_id = GLib.timeout_add_seconds(1, self._tick)
 
     def _tick(self) -> bool:
-        self._seconds_remaining -= 1
-        if self._seconds_remaining <= 0:
+        remaining = math.ceil(self._countdown.remaining())
+        if remaining <= 0:
             self.close()
             self._on_complete()
             return False
-        self._countdown_label.set_text(f"{self._seconds_remaining}s")
+        self._countdown_label.set_text(f"{remaining}s")
         return True
 
     def close(self):
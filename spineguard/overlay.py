@@ -12,8 +12,11 @@ gi.require_version("Gdk", "4.0")
 from gi.repository import Gdk, GLib, Gtk
 
 from . import tips
+from .scheduler import Countdown, boottime_clock, monotonic_clock
 from .timers import BreakType
 
+DONE_BUTTON_DELAY_SECONDS = 10
+
 
 def _keep_above_on_realize(widget):
     """Ensure window stays on top via surface (shared by all overlay types)."""
@@ -67,14 +70,19 @@ class BreakOverlay(Gtk.Window):
         track_info: Optional[dict] = None,
         streak: int = 0,
         breathing_exercise: Optional[dict] = None,
+        count_suspend: bool = True,
     ):
         super().__init__()
 
         self._break_type = break_type
         self._untimed = duration_minutes is None
         self._duration_seconds = (duration_minutes * 60) if duration_minutes else 0
-        self._seconds_remaining = self._duration_seconds
-        self._seconds_elapsed = 0
+        # Suspend policy: on CLOCK_BOOTTIME a break keeps running while the
+        # machine sleeps; on CLOCK_MONOTONIC it resumes where it left off.
+        self._countdown = Countdown(
+            self._duration_seconds,
+            clock=boottime_clock if count_suspend else monotonic_clock,
+        )
         self._on_complete = on_complete
         self._on_skip = on_skip
         self._on_done_early_cb = on_done_early
@@ -86,18 +94,16 @@ class BreakOverlay(Gtk.Window):
         self._streak = streak
         self._breathing_exercise = breathing_exercise
         self._breath_phase_index = 0
-        self._breath_phase_elapsed = 0
         self._breath_circle_scale = 0.3
 
         # Routine tracking (set by _build_ui if a routine is selected)
         self._routine = None
         self._routine_step_index = 0
-        self._routine_step_elapsed = 0
         self._tip_label: Optional[Gtk.Label] = None
 
         # Done button delay for untimed breaks
         self._done_button: Optional[Gtk.Button] = None
-        self._done_delay_remaining: int = 10
+        self._done_delay_remaining: int = DONE_BUTTON_DELAY_SECONDS
 
         self._setup_window()
         self._build_ui()
@@ -281,9 +287,10 @@ class BreakOverlay(Gtk.Window):
         cr.arc(cx, cy, radius, 0, 2 * math.pi)
         cr.fill()
 
+        remaining = self._countdown.remaining()
         if not self._untimed:
             # Progress arc (bright) — only for timed breaks
-            progress = self._seconds_remaining / self._duration_seconds
+            progress = remaining / self._duration_seconds
             cr.set_source_rgba(0.4, 0.8, 0.6, 0.9)
             cr.set_line_width(12)
             cr.arc(
@@ -297,9 +304,9 @@ class BreakOverlay(Gtk.Window):
 
         # Time text
         if self._untimed:
-            display_seconds = self._seconds_elapsed
+            display_seconds = int(self._countdown.elapsed())
         else:
-            display_seconds = self._seconds_remaining
+            display_seconds = math.ceil(remaining)
         minutes = display_seconds // 60
         seconds = display_seconds % 60
         time_text = f"{minutes}:{seconds:02d}"
@@ -346,72 +353,99 @@ class BreakOverlay(Gtk.Window):
         return None
 
     def _start_countdown(self):
-        """Start the countdown timer."""
-        self._timer_id = GLib.timeout_add_seconds(1, self._tick)
+        """Start refreshing the display from the countdown clock."""
+        self._schedule_tick()
+
+    def _schedule_tick(self):
+        """Wake just after the next whole second of the countdown."""
+        fraction = self._countdown.elapsed() % 1
+        self._timer_id = GLib.timeout_add(int((1 - fraction) * 1000) + 1, self._tick)
 
     def _tick(self) -> bool:
-        """Called every second to update countdown."""
+        """Refresh the display. All state is derived from elapsed time."""
+        self._timer_id = None
+        elapsed = self._countdown.elapsed()
+
         if self._untimed:
-            self._seconds_elapsed += 1
-            # Handle Done button enable countdown
-            if self._done_delay_remaining > 0:
-                self._done_delay_remaining -= 1
-                if self._done_delay_remaining <= 0:
-                    if self._done_button:
-                        self._done_button.set_label("Done")
-                        self._done_button.set_sensitive(True)
-                elif self._done_button:
-                    self._done_button.set_label(f"Done ({self._done_delay_remaining}s)")
-            if hasattr(self, "_countdown_drawing"):
-                self._countdown_drawing.queue_draw()
-            return True
-
-        self._seconds_remaining -= 1
+            self._update_done_button(elapsed)
+        else:
+            if self._break_type == BreakType.BREATHING and self._breathing_exercise:
+                self._update_breathing(elapsed)
+            if self._routine and self._tip_label:
+                self._update_routine_step(elapsed)
+
         if hasattr(self, "_countdown_drawing"):
             self._countdown_drawing.queue_draw()
 
-        # Advance breathing phases
-        if self._break_type == BreakType.BREATHING and self._breathing_exercise:
-            self._breath_phase_elapsed += 1
-            phases = self._breathing_exercise["phases"]
-            if self._breath_phase_index < len(phases):
-                current_phase = phases[self._breath_phase_index]
-                phase_progress = self._breath_phase_elapsed / current_phase["seconds"]
-                label = current_phase["label"].lower()
-                if "inhale" in label:
-                    self._breath_circle_scale = 0.3 + 0.7 * min(phase_progress, 1.0)
-                elif "exhale" in label:
-                    self._breath_circle_scale = 1.0 - 0.7 * min(phase_progress, 1.0)
-
-                if self._breath_phase_elapsed >= current_phase["seconds"]:
-                    self._breath_phase_index = (self._breath_phase_index + 1) % len(phases)
-                    self._breath_phase_elapsed = 0
-                    next_phase = phases[self._breath_phase_index]
-                    if hasattr(self, "_phase_label"):
-                        self._phase_label.set_text(f"{next_phase['label']}... {next_phase['seconds']}s")
-
-            if hasattr(self, "_breath_drawing"):
-                self._breath_drawing.queue_draw()
-
-        # Advance routine step if active
-        if self._routine and self._tip_label:
-            self._routine_step_elapsed += 1
-            steps = self._routine["steps"]
-            if self._routine_step_index < len(steps):
-                current_step = steps[self._routine_step_index]
-                step_duration = current_step["duration_seconds"]
-                # duration_seconds == 0 means "fill remaining time"
-                if step_duration > 0 and self._routine_step_elapsed >= step_duration:
-                    self._routine_step_index += 1
-                    self._routine_step_elapsed = 0
-                    if self._routine_step_index < len(steps):
-                        self._tip_label.set_text(steps[self._routine_step_index]["instruction"])
-
-        if self._seconds_remaining <= 0:
+        if not self._untimed and self._countdown.remaining() <= 0:
             self._finish()
             return False
 
-        return True
+        self._schedule_tick()
+        return False
+
+    def _update_done_button(self, elapsed: float):
+        """Unlock the Done button once the delay has passed."""
+        delay_remaining = max(0, DONE_BUTTON_DELAY_SECONDS - int(elapsed))
+        if delay_remaining == self._done_delay_remaining:
+            return
+        self._done_delay_remaining = delay_remaining
+        if not self._done_button:
+            return
+        if delay_remaining <= 0:
+            self._done_button.set_label("Done")
+            self._done_button.set_sensitive(True)
+        else:
+            self._done_button.set_label(f"Done ({delay_remaining}s)")
+
+    def _update_breathing(self, elapsed: float):
+        """Place the breathing circle and phase label for this point in the cycle."""
+        phases = self._breathing_exercise["phases"]
+        position = elapsed % sum(phase["seconds"] for phase in phases)
+
+        scale = 0.3
+        index = 0
+        for index, phase in enumerate(phases):
+            label = phase["label"].lower()
+            if position < phase["seconds"]:
+                progress = position / phase["seconds"]
+                if "inhale" in label:
+                    scale = 0.3 + 0.7 * progress
+                elif "exhale" in label:
+                    scale = 1.0 - 0.7 * progress
+                break
+            # A completed phase leaves the circle fully in or out
+            if "inhale" in label:
+                scale = 1.0
+            elif "exhale" in label:
+                scale = 0.3
+            position -= phase["seconds"]
+
+        self._breath_circle_scale = scale
+        if index != self._breath_phase_index:
+            self._breath_phase_index = index
+            if hasattr(self, "_phase_label"):
+                self._phase_label.set_text(f"{phases[index]['label']}... {phases[index]['seconds']}s")
+
+        if hasattr(self, "_breath_drawing"):
+            self._breath_drawing.queue_draw()
+
+    def _update_routine_step(self, elapsed: float):
+        """Show the routine step that covers this point in the break."""
+        steps = self._routine["steps"]
+        index = len(steps) - 1
+        step_start = 0
+        for i, step in enumerate(steps):
+            # duration_seconds == 0 means "fill remaining time"
+            step_duration = step["duration_seconds"]
+            if step_duration <= 0 or elapsed < step_start + step_duration:
+                index = i
+                break
+            step_start += step_duration
+
+        if index != self._routine_step_index:
+            self._routine_step_index = index
+            self._tip_label.set_text(steps[index]["instruction"])
 
     @staticmethod
     def _make_tip_label(text: str) -> Gtk.Label:
@@ -1,12 +1,10 @@
 """Routine progression and streak tracking for SpineGuard."""
 
-import json
 from datetime import date, timedelta
-from pathlib import Path
 from typing import Optional
 
 from . import tips
-from .config import STATE_DIR, STATE_FILE
+from .state import StateStore
 
 # Daily rotation: day-of-week (0=Mon) maps to track index
 ROTATION = [0, 1, 2, 0, 1, 2, 0]  # Mon=0, Tue=1, Wed=2, Thu=0, ...
@@ -17,40 +15,22 @@ COMPLETIONS_TO_LEVEL_UP = 5
 class RoutineProgress:
     """Manages routine track progression and streak tracking."""
 
-    def __init__(self):
+    def __init__(self, state: Optional[StateStore] = None):
+        """state is shared with TimerManager; by default state.json is used."""
+        self._state = state or StateStore()
         self._progress: dict = {}
         self._streak: dict = {"current": 0, "last_date": None, "skipped_today": False}
         self._load()
 
     def _load(self):
-        """Load progress from state.json."""
-        STATE_DIR.mkdir(parents=True, exist_ok=True)
-        if STATE_FILE.exists():
-            try:
-                with open(STATE_FILE, "r") as f:
-                    state = json.load(f)
-                    self._progress = state.get("routine_progress", {})
-                    self._streak = state.get("streak", {"current": 0, "last_date": None, "skipped_today": False})
-            except (json.JSONDecodeError, IOError):
-                pass
+        """Load progress from the state store."""
+        self._progress = self._state.get("routine_progress", {})
+        self._streak = self._state.get("streak", {"current": 0, "last_date": None, "skipped_today": False})
 
     def _save(self):
-        """Save progress to state.json (merge with existing state)."""
-        STATE_DIR.mkdir(parents=True, exist_ok=True)
-        state = {}
-        if STATE_FILE.exists():
-            try:
-                with open(STATE_FILE, "r") as f:
-                    state = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                pass
-        state["routine_progress"] = self._progress
-        state["streak"] = self._streak
-        try:
-            with open(STATE_FILE, "w") as f:
-                json.dump(state, f)
-        except IOError:
-            pass
+        """Hand progress to the state store, which writes it out shortly."""
+        self._state.set("routine_progress", self._progress)
+        self._state.set("streak", self._streak)
 
     def get_today_track_id(self, tracks: dict, pinned: Optional[str] = None) -> str:
         """Get today's track ID based on rotation or pinned preference."""
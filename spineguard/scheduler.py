@@ -0,0 +1,379 @@
+"""Deadline-driven scheduler for SpineGuard.
+
+All timers share one priority queue of absolute deadlines on the
+monotonic clock. A single main-loop timeout is armed for the earliest
+deadline, so the process only wakes up when something is actually due.
+Daily wall-clock reminders sit on top of it in CalendarScheduler.
+"""
+
+import heapq
+import itertools
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from .eventloop import EventLoop, default_loop
+
+_CLOCK_BOOTTIME = getattr(time, "CLOCK_BOOTTIME", None)
+
+
+def monotonic_clock() -> float:
+    """Seconds on CLOCK_MONOTONIC, which stands still while suspended."""
+    return time.monotonic()
+
+
+def boottime_clock() -> float:
+    """Seconds on CLOCK_BOOTTIME, which keeps counting while suspended."""
+    if _CLOCK_BOOTTIME is None:
+        return time.monotonic()
+    return time.clock_gettime(_CLOCK_BOOTTIME)
+
+
+class Countdown:
+    """A countdown derived from a start timestamp and accumulated pauses.
+
+    Nothing is decremented per tick: elapsed time is always
+    now - started_at - paused_total, so late or coalesced callbacks cannot
+    drift it. The clock decides whether suspend counts: monotonic_clock
+    excludes it, boottime_clock includes it.
+    """
+
+    def __init__(self, duration: float = 0.0, clock: Callable[[], float] = monotonic_clock):
+        self._clock = clock
+        self.duration = duration
+        self._started_at = clock()
+        self._paused_total = 0.0
+        self._paused_at: Optional[float] = None
+
+    @property
+    def paused(self) -> bool:
+        return self._paused_at is not None
+
+    def restart(self, duration: float):
+        """Start over with a new duration, keeping the paused state."""
+        now = self._clock()
+        self.duration = duration
+        self._started_at = now
+        self._paused_total = 0.0
+        if self._paused_at is not None:
+            self._paused_at = now
+
+    def pause(self):
+        if self._paused_at is None:
+            self._paused_at = self._clock()
+
+    def resume(self):
+        if self._paused_at is not None:
+            self._paused_total += self._clock() - self._paused_at
+            self._paused_at = None
+
+    def elapsed(self) -> float:
+        """Seconds counted so far, excluding paused spans."""
+        end = self._paused_at if self._paused_at is not None else self._clock()
+        return max(0.0, end - self._started_at - self._paused_total)
+
+    def remaining(self) -> float:
+        """Seconds left until the duration is reached."""
+        return max(0.0, self.duration - self.elapsed())
+
+    def deadline(self) -> Optional[float]:
+        """Clock time at which the countdown expires, or None while paused."""
+        if self._paused_at is not None:
+            return None
+        return self._started_at + self._paused_total + self.duration
+
+
+class ScheduledCall:
+    """Cancellable handle for a callback queued on a Scheduler."""
+
+    __slots__ = ("deadline", "_callback", "_scheduler", "_seq", "_active")
+
+    def __init__(self, scheduler: "Scheduler", deadline: float, callback: Callable[[], None], seq: int):
+        self.deadline = deadline
+        self._callback = callback
+        self._scheduler = scheduler
+        self._seq = seq
+        self._active = True
+
+    def __lt__(self, other: "ScheduledCall") -> bool:
+        return (self.deadline, self._seq) < (other.deadline, other._seq)
+
+    @property
+    def active(self) -> bool:
+        """True until the call has fired or been cancelled."""
+        return self._active
+
+    def remaining(self) -> float:
+        """Seconds until the deadline (0 once due, fired or cancelled)."""
+        if not self._active:
+            return 0.0
+        return max(0.0, self.deadline - self._scheduler.now())
+
+    def cancel(self):
+        """Cancel the call. Safe to call more than once."""
+        if self._active:
+            self._active = False
+            self._scheduler._on_cancel(self)
+
+
+class Scheduler:
+    """Priority queue of deadlines backed by a single main-loop timeout source."""
+
+    def __init__(self, loop: Optional[EventLoop] = None):
+        self.loop = loop or default_loop()
+        self._queue: list[ScheduledCall] = []
+        self._counter = itertools.count()
+        self._source_id: Optional[int] = None
+        self._armed_deadline: Optional[float] = None
+        self._dispatching = False
+        self._wakeup_hooks: list[Callable[[], None]] = []
+
+    def now(self) -> float:
+        """Current time on the scheduler clock (seconds, monotonic)."""
+        return self.loop.monotonic()
+
+    def on_wakeup(self, hook: Callable[[], None]):
+        """Run hook on every wakeup, before the calls that are due."""
+        self._wakeup_hooks.append(hook)
+
+    def call_at(self, deadline: float, callback: Callable[[], None]) -> ScheduledCall:
+        """Run callback once the monotonic clock reaches deadline."""
+        call = ScheduledCall(self, deadline, callback, next(self._counter))
+        heapq.heappush(self._queue, call)
+        if not self._dispatching:
+            self._rearm()
+        return call
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> ScheduledCall:
+        """Run callback after delay seconds."""
+        return self.call_at(self.now() + max(0.0, delay), callback)
+
+    def clear(self):
+        """Cancel every pending call and release the timeout source."""
+        for call in self._queue:
+            call._active = False
+        self._queue.clear()
+        self._disarm()
+
+    def _on_cancel(self, call: ScheduledCall):
+        """Re-arm if the cancelled call was the one we are waiting on."""
+        if not self._dispatching and self._queue and self._queue[0] is call:
+            self._rearm()
+
+    def _rearm(self):
+        """Arm the timeout source for the earliest live deadline."""
+        while self._queue and not self._queue[0].active:
+            heapq.heappop(self._queue)
+
+        if not self._queue:
+            self._disarm()
+            return
+
+        deadline = self._queue[0].deadline
+        if self._source_id is not None and self._armed_deadline == deadline:
+            return
+
+        self._disarm()
+        delay_ms = max(0, math.ceil((deadline - self.now()) * 1000))
+        self._armed_deadline = deadline
+        self._source_id = self.loop.timeout_add(delay_ms, self._dispatch)
+
+    def _disarm(self):
+        if self._source_id is not None:
+            self.loop.source_remove(self._source_id)
+            self._source_id = None
+        self._armed_deadline = None
+
+    def _dispatch(self) -> bool:
+        """Run every call whose deadline has passed, then re-arm."""
+        # The source is one-shot; forget it before callbacks can re-arm.
+        self._source_id = None
+        self._armed_deadline = None
+
+        self._dispatching = True
+        try:
+            for hook in self._wakeup_hooks:
+                hook()
+            now = self.now()
+            while self._queue and self._queue[0].deadline <= now:
+                call = heapq.heappop(self._queue)
+                if not call.active:
+                    continue
+                call._active = False
+                call._callback()
+        finally:
+            self._dispatching = False
+            self._rearm()
+
+        return False
+
+
+class DailyAlarm:
+    """A reminder that fires once a day at a local wall-clock time."""
+
+    def __init__(
+        self,
+        calendar: "CalendarScheduler",
+        hour: int,
+        minute: int,
+        callback: Callable[[], None],
+        last_fired: Optional[datetime] = None,
+    ):
+        self.hour = hour
+        self.minute = minute
+        self.last_fired = last_fired
+        self._callback = callback
+        self._calendar = calendar
+
+    def latest_occurrence(self, now: datetime) -> datetime:
+        """The most recent occurrence at or before now."""
+        occurrence = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if occurrence > now:
+            occurrence -= timedelta(days=1)
+        return occurrence
+
+    def next_occurrence(self, now: datetime) -> datetime:
+        """The first occurrence strictly after now."""
+        return self.latest_occurrence(now) + timedelta(days=1)
+
+    def set_time(self, hour: int, minute: int):
+        """Move the alarm. Occurrences already in the past are not caught up."""
+        self.hour = hour
+        self.minute = minute
+        self.last_fired = self.latest_occurrence(self._calendar.now())
+        self._calendar.resync()
+
+    def cancel(self):
+        """Remove the alarm from its calendar."""
+        self._calendar._remove(self)
+
+
+class CalendarScheduler:
+    """Daily wall-clock alarms multiplexed onto one Scheduler deadline.
+
+    The next occurrence is converted to a delay on the monotonic clock, so a
+    wall-clock jump, a timezone change or a suspend can leave the armed
+    deadline pointing at the wrong instant. Call resync() when any of those
+    is detected. Steps are also caught on every scheduler wakeup: if wall
+    time minus monotonic time moved by more than CLOCK_STEP_TOLERANCE
+    seconds since the last resync, it resyncs at once and calls on_step.
+    NTP slewing stays well inside that tolerance between resyncs. As a
+    backstop the deadline is never armed more than MAX_SLEEP_SECONDS ahead,
+    so a step while nothing else wakes up is corrected within that bound.
+    Occurrences missed by at most catch_up_seconds (asleep at the time, app
+    started late, main loop stalled) fire as soon as they are noticed.
+
+    While suspended (e.g. the session is locked) nothing is armed at all;
+    resume() catches up on whatever fell due in the meantime.
+    """
+
+    MAX_SLEEP_SECONDS = 15 * 60
+    CLOCK_STEP_TOLERANCE = 1.0
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        catch_up_seconds: float = 3600,
+        on_step: Optional[Callable[[], None]] = None,
+    ):
+        self._scheduler = scheduler
+        self._catch_up = timedelta(seconds=catch_up_seconds)
+        self._on_step = on_step
+        self._alarms: list[DailyAlarm] = []
+        self._wakeup: Optional[ScheduledCall] = None
+        self._suspended = False
+        # Wall minus monotonic seconds at the last resync
+        self._clock_offset: Optional[float] = None
+        scheduler.on_wakeup(self.check_clock)
+
+    def now(self) -> datetime:
+        """Current local wall-clock time."""
+        return self._scheduler.loop.now()
+
+    def add_daily(
+        self,
+        hour: int,
+        minute: int,
+        callback: Callable[[], None],
+        last_fired: Optional[datetime] = None,
+    ) -> DailyAlarm:
+        """Register a daily alarm. last_fired suppresses an already-fired occurrence."""
+        alarm = DailyAlarm(self, hour, minute, callback, last_fired)
+        self._alarms.append(alarm)
+        # Resync on the next dispatch rather than now, so a catch-up fire
+        # never runs before the caller has stored the returned handle.
+        self._cancel_wakeup()
+        if not self._suspended:
+            self._wakeup = self._scheduler.call_later(0, self.resync)
+        return alarm
+
+    def set_catch_up(self, seconds: float):
+        """Change how late a missed occurrence may still fire."""
+        self._catch_up = timedelta(seconds=seconds)
+
+    def clear(self):
+        """Drop every alarm and the pending wakeup."""
+        self._alarms.clear()
+        self._cancel_wakeup()
+
+    def suspend(self):
+        """Stop waking up until resume()."""
+        self._suspended = True
+        self._cancel_wakeup()
+
+    def resume(self):
+        """Re-arm, firing anything that fell due within the catch-up window."""
+        self._suspended = False
+        self.resync()
+
+    def check_clock(self) -> bool:
+        """Resync if the wall clock stepped since the last resync; True if it did."""
+        if self._suspended or self._clock_offset is None:
+            return False
+        if abs(self._wall_offset() - self._clock_offset) <= self.CLOCK_STEP_TOLERANCE:
+            return False
+        self.resync()
+        if self._on_step:
+            self._on_step()
+        return True
+
+    def resync(self):
+        """Fire due alarms and re-arm from the current wall-clock time."""
+        self._cancel_wakeup()
+        if self._suspended:
+            return
+        now = self.now()
+        self._clock_offset = self._wall_offset()
+
+        due = []
+        for alarm in self._alarms:
+            occurrence = alarm.latest_occurrence(now)
+            if alarm.last_fired is not None and alarm.last_fired >= occurrence:
+                continue
+            alarm.last_fired = occurrence
+            if now - occurrence <= self._catch_up:
+                due.append(alarm)
+
+        if self._alarms:
+            next_time = min(alarm.next_occurrence(now) for alarm in self._alarms)
+            # timestamp() applies the local UTC offset of each instant, so the
+            # delay stays correct across DST transitions.
+            delay = next_time.timestamp() - now.timestamp()
+            self._wakeup = self._scheduler.call_later(min(delay, self.MAX_SLEEP_SECONDS), self.resync)
+
+        for alarm in due:
+            alarm._callback()
+
+    def _wall_offset(self) -> float:
+        return self.now().timestamp() - self._scheduler.now()
+
+    def _remove(self, alarm: DailyAlarm):
+        if alarm in self._alarms:
+            self._alarms.remove(alarm)
+            self.resync()
+
+    def _cancel_wakeup(self):
+        if self._wakeup:
+            self._wakeup.cancel()
+            self._wakeup = None
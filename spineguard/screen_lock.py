@@ -12,9 +12,14 @@ class ScreenLockDetector:
         self,
         on_lock: Callable[[], None],
         on_unlock: Callable[[], None],
+        on_resume: Optional[Callable[[], None]] = None,
+        on_signal: Optional[Callable[[str, bool], None]] = None,
     ):
+        """on_signal, if given, sees every signal as (name, active) before it is handled."""
         self._on_lock = on_lock
         self._on_unlock = on_unlock
+        self._on_resume = on_resume
+        self._on_signal = on_signal
         self._subscription_ids: list[tuple] = []  # (bus, sub_id)
 
     def start(self):
@@ -102,6 +107,7 @@ class ScreenLockDetector:
     def _on_screensaver_changed(self, connection, sender, path, interface, signal, params):
         """Handle ScreenSaver ActiveChanged signal."""
         active = params.unpack()[0]
+        self._notify(signal, active)
         if active:
             self._on_lock()
         else:
@@ -109,16 +115,25 @@ class ScreenLockDetector:
 
     def _on_session_lock(self, connection, sender, path, interface, signal, params):
         """Handle login1 Session Lock signal."""
+        self._notify(signal, True)
         self._on_lock()
 
     def _on_session_unlock(self, connection, sender, path, interface, signal, params):
         """Handle login1 Session Unlock signal."""
+        self._notify(signal, False)
         self._on_unlock()
 
     def _on_prepare_for_sleep(self, connection, sender, path, interface, signal, params):
         """Handle PrepareForSleep signal (suspend/resume)."""
         going_to_sleep = params.unpack()[0]
+        self._notify(signal, going_to_sleep)
         if going_to_sleep:
             self._on_lock()
         else:
             self._on_unlock()
+            if self._on_resume:
+                self._on_resume()
+
+    def _notify(self, signal: str, active: bool):
+        if self._on_signal:
+            self._on_signal(signal, bool(active))
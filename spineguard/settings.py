@@ -24,6 +24,12 @@ class SettingsDialog(Gtk.Window):
         self.set_resizable(True)
         self.add_css_class("settings-window")
         self._build_ui()
+        self.connect("close-request", self._on_close_request)
+
+    def _on_close_request(self, window) -> bool:
+        """Write any debounced config changes as the dialog closes."""
+        self._config.flush()
+        return False
 
     def _build_ui(self):
         stack = Gtk.Stack()
@@ -75,6 +81,15 @@ class SettingsDialog(Gtk.Window):
              self._make_spin(self._config.get("water_interval_minutes"), 5, 180, "water_interval_minutes")),
         ]))
 
+        suspend_switch = Gtk.Switch()
+        suspend_switch.set_active(self._config.get("suspend_counts_toward_break"))
+        suspend_switch.connect("notify::active", lambda s, _: self._config.set("suspend_counts_toward_break", s.get_active()))
+        suspend_switch.set_valign(Gtk.Align.CENTER)
+
+        page.append(self._build_card([
+            ("Count sleep toward breaks", "A break keeps running while the computer is suspended", suspend_switch),
+        ]))
+
         page.append(self._section_header("SIT-STAND DESK"))
         page.append(self._build_card([
             ("Position switch interval", "Minutes between sit/stand transitions",
@@ -139,6 +154,8 @@ class SettingsDialog(Gtk.Window):
                  self._config.get("physio_hour"),
                  self._config.get("physio_minute"),
                  "physio_hour", "physio_minute")),
+            ("Catch-up window", "Minutes late a missed reminder may still fire (e.g. after suspend)",
+             self._make_spin(self._config.get("reminder_catch_up_minutes"), 0, 240, "reminder_catch_up_minutes")),
         ]))
 
         page.append(self._section_header("IDLE DETECTION"))
@@ -0,0 +1,265 @@
+"""Virtual-clock simulation harness for SpineGuard.
+
+Runs the real TimerManager, BreakCoordinator and IdleDetector on a
+VirtualEventLoop with an in-memory config, so a full workday or week of
+pomodoros, water, eye rest, physio and position switches completes in
+milliseconds and yields a deterministic event log. Nothing here imports
+GTK, so it also runs headless.
+
+    python -m spineguard.simulation --days 7 --set mode=sit_stand
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+from .breaks import BreakCoordinator
+from .config import Config, DEFAULTS
+from .eventloop import VirtualEventLoop
+from .idle import IdleDetector
+from .scheduler import Scheduler
+from .state import StateStore
+from .timers import TimerManager
+
+
+def _once(callback: Callable[[], None]) -> Callable[[], bool]:
+    """Wrap callback as a one-shot loop source."""
+    def _run() -> bool:
+        callback()
+        return False
+    return _run
+
+
+class SimulatedUser:
+    """How the simulated person reacts to a break overlay."""
+
+    def __init__(self, seed: int = 0, skip_rate: float = 0.0, done_early_rate: float = 0.0,
+                 physio_minutes: int = 15):
+        self._random = random.Random(seed)
+        self.skip_rate = skip_rate
+        self.done_early_rate = done_early_rate
+        self.physio_minutes = physio_minutes
+
+    def choose_outcome(self, timed: bool) -> str:
+        """Return "completed", "done_early" or "skipped"."""
+        if not timed:
+            return "done_early"
+        roll = self._random.random()
+        if roll < self.skip_rate:
+            return "skipped"
+        if roll < self.skip_rate + self.done_early_rate:
+            return "done_early"
+        return "completed"
+
+
+class _IdleBackend:
+    """Reports idle time from the simulation's away periods."""
+
+    def __init__(self, sim: "Simulation"):
+        self._sim = sim
+
+    def get_idle_ms(self) -> int:
+        if self._sim.away_since is None:
+            return 0
+        return int((self._sim.loop.monotonic() - self._sim.away_since) * 1000)
+
+
+class _StatsRecorder:
+    """Stands in for StatsManager, writing break outcomes to the event log."""
+
+    def __init__(self, sim: "Simulation"):
+        self._sim = sim
+
+    def log_break_completed(self, break_type: str):
+        self._sim.log("break_completed", break_type)
+
+    def log_break_skipped(self, break_type: str):
+        self._sim.log("break_skipped", break_type)
+
+    def log_break_done_early(self, break_type: str):
+        self._sim.log("break_done_early", break_type)
+
+
+class Simulation:
+    """A headless SpineGuard instance driven by a virtual clock."""
+
+    def __init__(
+        self,
+        config: Optional[dict[str, Any]] = None,
+        start: Optional[datetime] = None,
+        user: Optional[SimulatedUser] = None,
+    ):
+        self.loop = VirtualEventLoop(start)
+        self.user = user or SimulatedUser()
+        self.events: list[tuple[datetime, str, str]] = []
+        self.away_since: Optional[float] = None
+
+        self.config = Config(path=None)
+        with self.config.batch():
+            for key, value in (config or {}).items():
+                self.config.set(key, value)
+
+        self.scheduler = Scheduler(self.loop)
+        self.state = StateStore(path=None)
+        self.timers = TimerManager(self.config, self.scheduler, self.state)
+        self.breaks = BreakCoordinator(self.config, self.timers, presenter=self,
+                                       stats_manager=_StatsRecorder(self))
+        self.timers.set_pause_callback(lambda paused: self.log("paused" if paused else "resumed"))
+        self.idle = IdleDetector(self.config, self.breaks.on_idle, self.breaks.on_active,
+                                 loop=self.loop, backend=_IdleBackend(self))
+
+        self.timers.start()
+        self.idle.start()
+
+    # --- Event log ---
+
+    def log(self, event: str, detail: str = ""):
+        self.events.append((self.loop.now(), event, detail))
+
+    def event_log(self) -> list[str]:
+        """The event log as stable, human-readable lines."""
+        return [f"{ts:%a %H:%M:%S} {event} {detail}".rstrip() for ts, event, detail in self.events]
+
+    def counts(self) -> Counter:
+        """Number of log entries per (event, detail)."""
+        return Counter((event, detail) for _, event, detail in self.events)
+
+    # --- Inputs ---
+
+    def at(self, when: datetime, action: Callable[[], None]):
+        """Run action when the virtual wall clock reaches when."""
+        delay_ms = max(0, int((when - self.loop.now()).total_seconds() * 1000))
+        self.loop.timeout_add(delay_ms, _once(action))
+
+    def lock(self):
+        self.log("lock")
+        self.breaks.on_screen_lock()
+        self.idle.suspend()
+
+    def unlock(self):
+        self.log("unlock")
+        self.breaks.on_screen_unlock()
+        self.idle.resume()
+
+    def step_away(self):
+        self.log("away")
+        self.away_since = self.loop.monotonic()
+
+    def come_back(self):
+        self.log("back")
+        self.away_since = None
+
+    # --- Running ---
+
+    def run_for(self, seconds: float):
+        self.loop.run_for(seconds)
+
+    def run_workdays(self, days: int, day_start: str = "09:00", day_end: str = "17:00",
+                     lunch: Optional[tuple[str, int]] = ("12:30", 45)):
+        """Simulate days of work: locked overnight, away for lunch.
+
+        The simulation is assumed to start at day_start on the first day.
+        """
+        first_day = self.loop.now().date()
+        for day in range(days):
+            date = first_day + timedelta(days=day)
+            start = datetime.combine(date, datetime.strptime(day_start, "%H:%M").time())
+            end = datetime.combine(date, datetime.strptime(day_end, "%H:%M").time())
+            if day > 0:
+                self.at(start, self.unlock)
+            if lunch:
+                lunch_start = datetime.combine(date, datetime.strptime(lunch[0], "%H:%M").time())
+                self.at(lunch_start, self.step_away)
+                self.at(lunch_start + timedelta(minutes=lunch[1]), self.come_back)
+            self.at(end, self.lock)
+        end_of_run = datetime.combine(first_day + timedelta(days=days), datetime.strptime(day_start, "%H:%M").time())
+        self.run_for((end_of_run - self.loop.now()).total_seconds() - 1)
+
+    # --- BreakPresenter ---
+
+    def show_break(self, break_type, duration, on_complete, on_skip, on_done_early, context):
+        self.log("break_start", break_type)
+        outcome = self.user.choose_outcome(timed=duration is not None)
+        minutes = duration if duration is not None else self.user.physio_minutes
+        if outcome == "skipped":
+            callback, delay = on_skip, 0
+        elif outcome == "done_early" and on_done_early:
+            callback, delay = on_done_early, minutes * 30
+        elif outcome == "done_early":
+            callback, delay = on_complete, minutes * 60
+        else:
+            callback, delay = on_complete, minutes * 60
+        self.loop.timeout_add(int(delay * 1000), _once(callback))
+
+    def close_break(self):
+        pass
+
+    def show_micro_break(self, message, duration_seconds, on_complete):
+        self.log("micro_break_start", "eye_rest")
+        self.loop.timeout_add_seconds(duration_seconds, _once(on_complete))
+
+    def play_break_start(self):
+        pass
+
+    def notify_water(self):
+        self.log("water_reminder")
+
+    def notify_supplement(self, morning: bool):
+        self.log("supplement_reminder", "morning" if morning else "evening")
+
+    def notify_pre_break_warning(self, break_type: str, seconds: int):
+        self.log("pre_break_warning", break_type)
+
+
+def _parse_value(key: str, raw: str) -> Any:
+    """Coerce a --set value to the type of its default."""
+    default = DEFAULTS.get(key)
+    if isinstance(default, bool):
+        return raw.lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, list):
+        return [item for item in raw.split(",") if item]
+    return raw
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate SpineGuard on a virtual clock.")
+    parser.add_argument("--days", type=int, default=1, help="workdays to simulate (default 1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-rate", type=float, default=0.0)
+    parser.add_argument("--done-early-rate", type=float, default=0.0)
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="override a config value (repeatable)")
+    parser.add_argument("--quiet", action="store_true", help="print only the summary")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    try:
+        for item in args.set:
+            key, _, raw = item.partition("=")
+            overrides[key] = _parse_value(key, raw)
+        started = time.perf_counter()
+        sim = Simulation(overrides, user=SimulatedUser(args.seed, args.skip_rate, args.done_early_rate))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    sim.run_workdays(args.days)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if not args.quiet:
+        for line in sim.event_log():
+            print(line)
+        print()
+    for (event, detail), count in sorted(sim.counts().items()):
+        print(f"{count:6d}  {event} {detail}".rstrip())
+    print(f"\n{args.days} day(s) simulated in {elapsed_ms:.1f} ms, {sim.loop.dispatched} wakeups")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
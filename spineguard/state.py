@@ -0,0 +1,105 @@
+"""Persistent app state for SpineGuard.
+
+state.json is owned by a single StateStore: it is read once at startup,
+components read and update the in-memory copy, and changes are written
+back at most once per flush window with an atomic replace on the I/O
+worker thread, so several updates during a break completion cost one
+write, the main loop never waits on the disk, and a crash never leaves
+a truncated file.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+from .config import STATE_FILE
+from .eventloop import EventLoop, default_loop
+from .io_worker import IOWorker, atomic_write, default_worker
+
+
+class StateStore:
+    """In-memory state shared by TimerManager and RoutineProgress."""
+
+    FLUSH_DELAY_MS = 2000
+    RETRY_DELAY_MS = 30000
+
+    def __init__(
+        self,
+        path: Optional[Path] = STATE_FILE,
+        loop: Optional[EventLoop] = None,
+        worker: Optional[IOWorker] = None,
+    ):
+        """Load state from path. With path=None the state lives in memory only."""
+        self._path = path
+        self._loop = loop
+        self._worker = worker
+        self._data: dict = {}
+        self._dirty: set[str] = set()
+        self._flush_source: Optional[int] = None
+        self._load()
+
+    def _load(self):
+        """Read state.json once; a missing or corrupt file starts empty."""
+        if self._path is None or not self._path.exists():
+            return
+        try:
+            with open(self._path, "r") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._data = data
+        except (json.JSONDecodeError, IOError):
+            pass
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a state value. Mutable values are shared; call set() after changing them."""
+        return self._data.get(key, default)
+
+    def set(self, key: str, value: Any):
+        """Store a value and schedule a flush."""
+        self._data[key] = value
+        self._dirty.add(key)
+        self._schedule_flush()
+
+    @property
+    def dirty(self) -> bool:
+        """True while changes are waiting to be written."""
+        return bool(self._dirty)
+
+    def flush(self):
+        """Hand pending changes to the I/O worker now (e.g. on quit)."""
+        if self._flush_source is not None:
+            (self._loop or default_loop()).source_remove(self._flush_source)
+            self._flush_source = None
+        if not self._dirty or self._path is None:
+            self._dirty.clear()
+            return
+        try:
+            text = json.dumps(self._data)
+        except (TypeError, ValueError):
+            return
+        keys, self._dirty = self._dirty, set()
+        path = self._path
+
+        def _on_written(result, error):
+            if error:
+                # Mark the keys dirty again and try once more later, even if nothing else changes
+                print(f"Could not save state, will retry: {error}")
+                self._dirty |= keys
+                self._schedule_flush(self.RETRY_DELAY_MS)
+
+        if self._worker is None:
+            self._worker = default_worker()
+        self._worker.submit(lambda: atomic_write(path, text), _on_written)
+
+    def _schedule_flush(self, delay_ms: int = FLUSH_DELAY_MS):
+        """Coalesce every change within delay_ms into one write."""
+        if self._path is None or self._flush_source is not None:
+            return
+        if self._loop is None:
+            self._loop = default_loop()
+        self._flush_source = self._loop.timeout_add(delay_ms, self._on_flush_timeout)
+
+    def _on_flush_timeout(self) -> bool:
+        self._flush_source = None
+        self.flush()
+        return False
@@ -0,0 +1,201 @@
+"""Long-range break analytics for SpineGuard.
+
+Range totals come from the daily rollup; this module covers what needs
+individual events, such as compliance by hour of day and weekday. Events
+are loaded as columns (epoch seconds, outcome code, break type code) in
+arrays: compacted segments are converted with bytes.translate instead of
+per-event Python, and only the current log is decoded line by line.
+With NumPy installed the hour-of-week arithmetic and the counting are
+vectorized too, and local UTC offsets are looked up once per day (per
+hour only on days with a DST change) instead of once per clock hour.
+"""
+
+import bisect
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from .stats_log import read_events
+from .stats_segments import KIND_EVENTS, StatsSegments
+
+# Outcome codes; anything else is OUTCOME_OTHER and not counted
+OUTCOME_COMPLETED = 0
+OUTCOME_DONE_EARLY = 1
+OUTCOME_SKIPPED = 2
+OUTCOME_OTHER = 255
+
+_OUTCOME_CODES = {
+    "break_completed": OUTCOME_COMPLETED,
+    "break_done_early": OUTCOME_DONE_EARLY,
+    "break_skipped": OUTCOME_SKIPPED,
+}
+
+HOURS_PER_WEEK = 7 * 24
+
+# 1970-01-01 was a Thursday: shift so hour-of-week 0 is Monday 00:00
+_EPOCH_WEEK_SHIFT_HOURS = 3 * 24
+
+
+class EventColumns:
+    """Events as parallel arrays, oldest first."""
+
+    __slots__ = ("time", "outcome", "break_type", "break_types")
+
+    def __init__(self):
+        self.time = array("q")
+        self.outcome = array("B")
+        self.break_type = array("B")
+        self.break_types: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def _break_code(self, name: str) -> int:
+        try:
+            return self.break_types.index(name)
+        except ValueError:
+            self.break_types.append(name)
+            return len(self.break_types) - 1
+
+    def extend_segment(self, times: array, events: array, break_types: array,
+                       event_names: list[str], break_names: list[str]):
+        """Append segment columns, recoding their name tables with bytes.translate."""
+        outcome_table = bytearray([OUTCOME_OTHER]) * 256
+        for code, name in enumerate(event_names):
+            outcome_table[code] = _OUTCOME_CODES.get(name, OUTCOME_OTHER)
+        break_table = bytearray(256)
+        for code, name in enumerate(break_names):
+            break_table[code] = self._break_code(name)
+        self.time.extend(times)
+        self.outcome.frombytes(events.tobytes().translate(outcome_table))
+        self.break_type.frombytes(break_types.tobytes().translate(break_table))
+
+    def extend_events(self, events: Iterable[dict]):
+        """Append decoded events (e.g. from stats.jsonl)."""
+        for event in events:
+            try:
+                epoch = int(datetime.fromisoformat(event["timestamp"]).timestamp())
+            except (KeyError, TypeError, ValueError):
+                continue
+            self.time.append(epoch)
+            self.outcome.append(_OUTCOME_CODES.get(event.get("event", ""), OUTCOME_OTHER))
+            self.break_type.append(self._break_code(event.get("break_type", "unknown")))
+
+
+def load_columns(segments: StatsSegments, log_path: Path, start: datetime) -> EventColumns:
+    """Every event since start from the compacted segments and the log."""
+    columns = EventColumns()
+    first = int(start.timestamp())
+    for month in segments.months():
+        if month < start.strftime("%Y-%m"):
+            continue
+        segment = segments.load(month)
+        if segment is None or segment.kind != KIND_EVENTS:
+            continue
+        # Segments are sorted; only the first one can start before the range
+        skip = bisect.bisect_left(segment.columns["time"], first)
+        columns.extend_segment(
+            segment.columns["time"][skip:], segment.columns["event"][skip:], segment.columns["break_type"][skip:],
+            segment.events, segment.break_types,
+        )
+    columns.extend_events(read_events(log_path, start.isoformat(), merged=segments.merged_sources()))
+    return columns
+
+
+def _utc_offset(epoch: int) -> int:
+    """Local UTC offset in seconds at an epoch time."""
+    return int(datetime.fromtimestamp(epoch).astimezone().utcoffset().total_seconds())
+
+
+def _hours_of_week(times: array) -> list[int]:
+    """Local hour of the week (0 = Monday 00:00) for each epoch time."""
+    offsets: dict[int, int] = {}
+    result = []
+    for epoch in times:
+        hour = epoch // 3600
+        offset = offsets.get(hour)
+        if offset is None:
+            # Looked up once per clock hour, so DST changes are respected
+            offset = offsets[hour] = _utc_offset(hour * 3600)
+        result.append(((epoch + offset) // 3600 + _EPOCH_WEEK_SHIFT_HOURS) % HOURS_PER_WEEK)
+    return result
+
+
+def _hours_of_week_numpy(times: "np.ndarray") -> "np.ndarray":
+    """_hours_of_week() for an int64 array, with one offset lookup per UTC day."""
+    hours = times // 3600
+    days, day_index = np.unique(hours // 24, return_inverse=True)
+    first = np.array([_utc_offset(int(day) * 86400) for day in days], dtype=np.int64)
+    last = np.array([_utc_offset(int(day) * 86400 + 86399) for day in days], dtype=np.int64)
+    offsets = first[day_index]
+    # Days with a DST change: look up each of their clock hours instead
+    for changed in np.flatnonzero(first != last):
+        in_day = day_index == changed
+        day_hours, hour_index = np.unique(hours[in_day], return_inverse=True)
+        offsets[in_day] = np.array([_utc_offset(int(hour) * 3600) for hour in day_hours], dtype=np.int64)[hour_index]
+    return ((times + offsets) // 3600 + _EPOCH_WEEK_SHIFT_HOURS) % HOURS_PER_WEEK
+
+
+def compliance_heatmap(columns: EventColumns) -> list[list[tuple[int, int]]]:
+    """Grid [weekday][hour] of (breaks kept, breaks due); Monday is weekday 0.
+
+    Kept counts completed and done-early breaks; due adds skipped ones.
+    """
+    if HAS_NUMPY and len(columns):
+        how = _hours_of_week_numpy(np.frombuffer(columns.time, dtype=np.int64))
+        outcome = np.frombuffer(columns.outcome, dtype=np.uint8)
+        counted = outcome <= OUTCOME_SKIPPED
+        due = np.bincount(how[counted], minlength=HOURS_PER_WEEK)
+        kept = np.bincount(how[outcome <= OUTCOME_DONE_EARLY], minlength=HOURS_PER_WEEK)
+        kept_list, due_list = kept.tolist(), due.tolist()
+    else:
+        kept_list = [0] * HOURS_PER_WEEK
+        due_list = [0] * HOURS_PER_WEEK
+        for how, outcome in zip(_hours_of_week(columns.time), columns.outcome):
+            if outcome <= OUTCOME_SKIPPED:
+                due_list[how] += 1
+                if outcome <= OUTCOME_DONE_EARLY:
+                    kept_list[how] += 1
+    return [
+        [(kept_list[day * 24 + hour], due_list[day * 24 + hour]) for hour in range(24)]
+        for day in range(7)
+    ]
+
+
+def add_to_heatmap(grid: list[list[tuple[int, int]]], event: dict):
+    """Count one new event into a grid from compliance_heatmap()."""
+    outcome = _OUTCOME_CODES.get(event.get("event", ""), OUTCOME_OTHER)
+    if outcome > OUTCOME_SKIPPED:
+        return
+    when = datetime.fromisoformat(event["timestamp"])
+    kept, due = grid[when.weekday()][when.hour]
+    grid[when.weekday()][when.hour] = (kept + (outcome <= OUTCOME_DONE_EARLY), due + 1)
+
+
+def heatmap_from_counts(rows: Iterable[tuple[int, int, int, int]]) -> list[list[tuple[int, int]]]:
+    """Build a heatmap from (weekday, hour, kept, due) rows, e.g. an SQL GROUP BY."""
+    grid = [[(0, 0)] * 24 for _ in range(7)]
+    for weekday, hour, kept, due in rows:
+        grid[weekday][hour] = (kept, due)
+    return grid
+
+
+def format_heatmap(grid: list[list[tuple[int, int]]], first_hour: int = 0, last_hour: Optional[int] = None) -> str:
+    """Plain-text heatmap of compliance percentages for a terminal report."""
+    last_hour = 23 if last_hour is None else last_hour
+    hours = range(first_hour, last_hour + 1)
+    lines = ["     " + "".join(f"{hour:>4d}" for hour in hours)]
+    for day, name in enumerate(("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")):
+        cells = []
+        for hour in hours:
+            kept, due = grid[day][hour]
+            cells.append(f"{round(kept / due * 100):>4d}" if due else "   .")
+        lines.append(f"{name}  " + "".join(cells))
+    return "\n".join(lines)
@@ -0,0 +1,165 @@
+"""Team statistics across many SpineGuard installs.
+
+For fleets that sync each user's ~/.local/share/spineguard to a shared
+volume: every stats.jsonl under a root directory (with its compacted
+segments) is counted per day by a DailyRollup, the same counters the
+app keeps. Each log gets a checkpoint in a separate directory holding
+those counters plus the log's inode and the byte offset they cover, so
+a nightly re-run reads only bytes appended since the last one. A log
+that was replaced (compaction, or a sync tool that writes a new file)
+is recounted, which costs its current month.
+
+Logs are scanned in a process pool. Each returns its days in order, and
+the parent merges them with heapq.merge into one stream of team rows;
+raw events are merged by timestamp the same way. A fleet can have more
+logs than the process may open files, so each log is read
+EVENTS_PER_READ events at a time and closed in between.
+"""
+
+import hashlib
+import heapq
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .io_worker import atomic_write
+from .stats import StatsReader
+from .stats_rollup import DailyRollup, empty_summary
+from .stats_segments import StatsSegments
+
+FLEET_CHECKPOINT_DIR = Path.home() / ".cache" / "spineguard" / "fleet"
+
+LOG_NAME = "stats.jsonl"
+
+# Events read from one log per open by merged_events()
+EVENTS_PER_READ = 256
+
+# Where a synced home directory keeps the log; dropped from user names
+_STATE_SUFFIX = (".local", "share", "spineguard")
+
+
+class FleetLog:
+    """One user's log under the fleet root."""
+
+    __slots__ = ("path", "user", "team")
+
+    def __init__(self, path: Path, root: Path, team_depth: int = 0):
+        self.path = path
+        parts = path.parent.relative_to(root).parts
+        if parts[-len(_STATE_SUFFIX):] == _STATE_SUFFIX:
+            parts = parts[:-len(_STATE_SUFFIX)]
+        self.user = "/".join(parts) or "."
+        self.team = "/".join(parts[:team_depth]) if team_depth else "all"
+
+
+def find_logs(root: Path, team_depth: int = 0) -> list[FleetLog]:
+    """Every stats log under root, in path order."""
+    logs = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        if LOG_NAME in filenames:
+            logs.append(FleetLog(Path(dirpath) / LOG_NAME, root, team_depth))
+    return logs
+
+
+def checkpoint_path(log_path: Path, checkpoint_dir: Path) -> Path:
+    digest = hashlib.sha1(str(log_path.resolve()).encode()).hexdigest()[:20]
+    return checkpoint_dir / f"{digest}.json"
+
+
+def scan_log(log_path: Path, checkpoint_dir: Path, first_day: str, last_day: str) -> list[tuple[str, dict]]:
+    """Bring one log's checkpoint up to date; its (day, summary) rows in range.
+
+    Runs in a pool process: everything it takes and returns is picklable.
+    A log that cannot be read is reported and counts as empty, so one
+    broken home directory does not fail the whole fleet.
+    """
+    try:
+        rollup = DailyRollup(log_path, path=checkpoint_path(log_path, checkpoint_dir), segments=StatsSegments(log_path))
+        rollup.load()
+    except OSError as e:
+        print(f"Skipping {log_path}: {e}", file=sys.stderr)
+        return []
+    if rollup.dirty:
+        try:
+            atomic_write(rollup.path, rollup.to_json())
+        except OSError as e:
+            print(f"Could not save checkpoint for {log_path}: {e}", file=sys.stderr)
+    return list(rollup.daily(first_day, last_day))
+
+
+def _add_summary(total: dict, summary: dict):
+    for outcome in ("completed", "done_early", "skipped"):
+        total[outcome] += summary[outcome]
+    for break_type, counts in summary["by_type"].items():
+        into = total["by_type"].setdefault(break_type, {"completed": 0, "skipped": 0, "done_early": 0})
+        for outcome, count in counts.items():
+            into[outcome] += count
+
+
+def _with_team(days: list[tuple[str, dict]], team: str) -> Iterator[tuple[str, str, dict]]:
+    for day, summary in days:
+        yield day, team, summary
+
+
+def team_summaries(
+    logs: list[FleetLog],
+    first_day: str,
+    last_day: str,
+    checkpoint_dir: Path = FLEET_CHECKPOINT_DIR,
+    jobs: Optional[int] = None,
+) -> Iterator[tuple[str, str, int, dict]]:
+    """(day, team, users with events, summary) in day then team order."""
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    scan = partial(scan_log, checkpoint_dir=checkpoint_dir, first_day=first_day, last_day=last_day)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(scan, [log.path for log in logs], chunksize=max(1, len(logs) // 64)))
+
+    streams = [_with_team(days, log.team) for log, days in zip(logs, results)]
+    current: Optional[tuple[str, str]] = None
+    users = 0
+    total = empty_summary()
+    for day, team, summary in heapq.merge(*streams, key=lambda row: row[:2]):
+        if (day, team) != current:
+            if current is not None:
+                yield current[0], current[1], users, total
+            current, users, total = (day, team), 0, empty_summary()
+        users += 1
+        _add_summary(total, summary)
+    if current is not None:
+        yield current[0], current[1], users, total
+
+
+def _tagged_events(log: FleetLog, start: datetime, end: Optional[datetime]) -> Iterator[dict]:
+    """The log's events, reopening it for every EVENTS_PER_READ of them."""
+    reader = StatsReader(log.path)
+    # Events at the resume timestamp that were already yielded
+    skip = 0
+    while True:
+        events = reader.events(start, end)
+        try:
+            chunk = list(itertools.islice(events, skip, skip + EVENTS_PER_READ))
+        finally:
+            events.close()
+        for event in chunk:
+            event["user"] = log.user
+            event["team"] = log.team
+            yield event
+        if len(chunk) < EVENTS_PER_READ:
+            return
+        last = chunk[-1]["timestamp"]
+        same = sum(1 for event in chunk if event["timestamp"] == last)
+        skip = skip + same if datetime.fromisoformat(last) == start else same
+        start = datetime.fromisoformat(last)
+
+
+def merged_events(logs: list[FleetLog], start: datetime, end: Optional[datetime] = None) -> Iterator[dict]:
+    """Every user's events in timestamp order, each with "user" and "team" added."""
+    streams = [_tagged_events(log, start, end) for log in logs]
+    return heapq.merge(*streams, key=lambda event: event["timestamp"])
+
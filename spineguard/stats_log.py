@@ -0,0 +1,382 @@
+"""Reading and writing stats.jsonl for SpineGuard.
+
+StatsWriter buffers events on the main loop and appends them in batches
+through a descriptor the I/O worker keeps open with O_APPEND. A batch
+that fails to write stays in a bounded queue on the worker and is
+written ahead of the next one, so a briefly unavailable disk delays
+events instead of losing them. fsync runs after every batch ("batch"),
+only when the writer is closed ("quit"), or never.
+
+Several processes may write the same log (a second app instance, the
+compaction of another one). Writers hold an exclusive flock on the log
+while they append a batch, in one write() when the kernel allows, and
+compaction holds it while it replaces the log. Both lock through a
+descriptor opened for writing, which NFS needs for an exclusive lock.
+Whoever gets the lock on a log that has since been replaced reopens it. Readers take no lock:
+they skip undecodable lines and a final line without its newline, which
+may still be being written. A write that fails part way leaves a line
+fragment, which the next write ends with a newline so it stays one bad
+line; its event is written again whole.
+
+Each event carries a random "id". A line that was written twice has the
+same id both times, and readers skip repeats among recent events.
+
+Events are appended in time order, so the first event at or after a
+given time is found by binary search over the byte offsets of the
+memory-mapped log, and only the lines from there on are decoded. A query
+for today or the last week costs a few probes plus the lines in the
+window, however long the history is.
+
+Timestamps are local ISO strings, which sort the same as the times they
+name. Lines that cannot be decoded are skipped.
+
+Compaction writes its segments before it replaces the log, so for a
+moment (or, after a crash, until the next compaction) the moved lines
+are in both. Each segment records the inode, length and SHA-1 of the
+log prefix it took in; readers given those records skip the segment's
+month in that prefix when the log they opened still starts with it.
+"""
+
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+from collections import deque
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from .eventloop import EventLoop, default_loop
+from .io_worker import IOWorker
+
+FSYNC_BATCH = "batch"
+FSYNC_QUIT = "quit"
+FSYNC_NEVER = "never"
+
+# (event, its encoded line) as handed to the worker
+_Entry = tuple[dict, bytes]
+
+
+class RecentIds:
+    """The ids of the last few events seen, to skip lines written twice."""
+
+    SIZE = 1024
+
+    def __init__(self):
+        self._order: "deque[str]" = deque()
+        self._ids: set[str] = set()
+
+    def seen(self, event: dict) -> bool:
+        """True if event's id was seen recently; otherwise remember it."""
+        event_id = event.get("id")
+        if event_id is None:
+            return False
+        if event_id in self._ids:
+            return True
+        self._ids.add(event_id)
+        self._order.append(event_id)
+        if len(self._order) > self.SIZE:
+            self._ids.discard(self._order.popleft())
+        return False
+
+
+def new_event_id() -> str:
+    return os.urandom(8).hex()
+
+
+def merged_lengths(inode: int, data, sources: dict[str, list]) -> dict[str, int]:
+    """month -> length of the prefix of the log (inode, data) merged into that month's segment.
+
+    sources is StatsSegments.merged_sources(). Lines of the month that
+    start before the length are already in the segment.
+    """
+    lengths = {}
+    digests: dict[int, str] = {}
+    for month, (source_inode, length, digest) in sources.items():
+        if source_inode != inode or length > len(data):
+            continue
+        if length not in digests:
+            digests[length] = hashlib.sha1(data[:length]).hexdigest()
+        if digests[length] == digest:
+            lengths[month] = length
+    return lengths
+
+
+def lock_log(path: Path, flags: int, fd: Optional[int] = None) -> int:
+    """Open path (unless fd is given) and take an exclusive flock on it.
+
+    flags must open the file for writing (O_WRONLY or O_RDWR): on NFS,
+    flock is emulated with fcntl locks, and an exclusive one on a
+    read-only descriptor fails with EBADF.
+
+    If the log was replaced while waiting for the lock, the descriptor is
+    closed and the current file opened and locked instead. Release with
+    fcntl.flock(fd, fcntl.LOCK_UN).
+    """
+    while True:
+        if fd is None:
+            fd = os.open(path, flags, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                return fd
+        except FileNotFoundError:
+            pass  # replaced and not yet recreated
+        except OSError:
+            os.close(fd)
+            raise
+        os.close(fd)
+        fd = None
+
+
+def _timestamp(mm: mmap.mmap, start: int, end: int) -> Optional[str]:
+    try:
+        timestamp = json.loads(mm[start:end])["timestamp"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    return timestamp if isinstance(timestamp, str) else None
+
+
+def _line_end(mm: mmap.mmap, start: int) -> int:
+    """Offset just past the line starting at start (its newline included)."""
+    newline = mm.find(b"\n", start)
+    return len(mm) if newline == -1 else newline + 1
+
+
+def find_offset(mm: mmap.mmap, start: str) -> int:
+    """Byte offset of the first line whose timestamp is >= start."""
+    # Lines starting before lo are older than start; lines starting at hi or later are not
+    lo, hi = 0, len(mm)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if mid == 0 or mm[mid - 1] == 0x0A:
+            line_start = mid
+        else:
+            line_start = _line_end(mm, mid)
+        if line_start >= hi:
+            hi = mid
+            continue
+        # Probe the first decodable line; undecodable ones go with it
+        probe = line_start
+        timestamp = None
+        while probe < hi and timestamp is None:
+            line_end = _line_end(mm, probe)
+            timestamp = _timestamp(mm, probe, line_end)
+            probe = line_end
+        if timestamp is not None and timestamp < start:
+            lo = line_end
+        else:
+            hi = line_start
+    return lo
+
+
+def iter_events(
+    path: Path,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    merged: Optional[dict[str, list]] = None,
+) -> Iterator[dict]:
+    """Yield events with start <= timestamp < end (ISO strings; None = unbounded).
+
+    Lines are decoded one at a time from the mapped file, so memory use
+    does not grow with the size of the log. merged is the segments'
+    StatsSegments.merged_sources(); lines they already hold are skipped.
+    """
+    recent = RecentIds()
+    try:
+        with open(path, "rb") as f:
+            if f.seek(0, 2) == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offset = find_offset(mm, start) if start else 0
+                lengths = merged_lengths(os.fstat(f.fileno()).st_ino, mm, merged) if merged else {}
+                size = len(mm)
+                while offset < size:
+                    line_end = _line_end(mm, offset)
+                    if mm[line_end - 1] != 0x0A:
+                        break  # still being written
+                    try:
+                        event = json.loads(mm[offset:line_end])
+                        timestamp = event["timestamp"]
+                    except (ValueError, KeyError, TypeError):
+                        offset = line_end
+                        continue
+                    if end is not None and timestamp >= end:
+                        break
+                    line_start, offset = offset, line_end
+                    if line_start < lengths.get(timestamp[:7], 0):
+                        continue  # already in a segment
+                    if not recent.seen(event):
+                        yield event
+    except (IOError, ValueError):
+        pass
+
+
+def read_events(
+    path: Path,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    merged: Optional[dict[str, list]] = None,
+) -> list[dict]:
+    """Decode events with start <= timestamp < end (ISO strings; None = unbounded)."""
+    return list(iter_events(path, start, end, merged))
+
+
+class StatsWriter:
+    """Batched, durable appends to a stats log."""
+
+    FLUSH_DELAY_MS = 2000
+    RETRY_DELAY_MS = 30000
+    MAX_QUEUED = 5000
+
+    def __init__(
+        self,
+        path: Path,
+        worker: IOWorker,
+        loop: Optional[EventLoop] = None,
+        fsync: str = FSYNC_BATCH,
+        on_written: Optional[Callable[[list[_Entry], int], None]] = None,
+    ):
+        """on_written(entries, end_offset) runs on the main loop after each successful write."""
+        self._path = path
+        self._worker = worker
+        self._loop = loop
+        self._fsync = fsync
+        self._on_written = on_written
+        self._buffer: list[_Entry] = []
+        self._flush_source: Optional[int] = None
+        self._retry_pending = False
+        # Owned by the I/O worker thread
+        self._fd: Optional[int] = None
+        self._queue: "deque[_Entry]" = deque()
+        # A failed write left a line fragment at the end of the log
+        self._torn = False
+
+    # --- Main thread ---
+
+    def append(self, event: dict):
+        """Buffer an event; it is written with the next batch. Adds an "id" if it has none."""
+        event.setdefault("id", new_event_id())
+        self._buffer.append((event, (json.dumps(event) + "\n").encode()))
+        self._schedule_flush(self.FLUSH_DELAY_MS)
+
+    def _schedule_flush(self, delay_ms: int):
+        if self._flush_source is not None:
+            return
+        if self._loop is None:
+            self._loop = default_loop()
+        self._flush_source = self._loop.timeout_add(delay_ms, self._on_flush_timeout)
+
+    def _on_flush_timeout(self) -> bool:
+        self._flush_source = None
+        self.flush()
+        return False
+
+    def flush(self):
+        """Hand buffered events (and any waiting for a retry) to the I/O worker now."""
+        if self._flush_source is not None:
+            self._loop.source_remove(self._flush_source)
+            self._flush_source = None
+        if not self._buffer and not self._retry_pending:
+            return
+        batch, self._buffer = self._buffer, []
+        self._worker.submit(lambda: self._write(batch), self._on_batch_done)
+
+    def _on_batch_done(self, result, error):
+        if error:
+            # The batch job itself failed; its events are still on the worker's queue
+            print(f"Could not write statistics, will retry: {error}")
+            self._retry_pending = True
+            self._schedule_flush(self.RETRY_DELAY_MS)
+            return
+        written, end_offset, write_error = result
+        if written and self._on_written:
+            self._on_written(written, end_offset)
+        self._retry_pending = write_error is not None
+        if write_error:
+            print(f"Could not write statistics, will retry: {write_error}")
+            self._schedule_flush(self.RETRY_DELAY_MS)
+
+    def close(self):
+        """Write everything, fsync unless the policy is "never", and close the file."""
+        self.flush()
+        self._worker.submit(self._close)
+
+    # --- Worker thread ---
+
+    def _write(self, batch: list[_Entry]) -> tuple[list[_Entry], int, Optional[OSError]]:
+        """Append the retry queue plus batch. Returns (written, end offset, error)."""
+        queue = self._queue
+        queue.extend(batch)
+        if len(queue) > self.MAX_QUEUED:
+            dropped = len(queue) - self.MAX_QUEUED
+            for _ in range(dropped):
+                queue.popleft()
+            print(f"Statistics queue full: dropped {dropped} oldest event(s)")
+        if not queue:
+            return [], 0, None
+        # End a fragment left by a failed write, so it stays one bad line
+        prefix = b"\n" if self._torn else b""
+        data = memoryview(prefix + b"".join(line for _, line in queue))
+        done = 0
+        end_offset = 0
+        error: Optional[OSError] = None
+        try:
+            fd = self._lock()
+            try:
+                while done < len(data):
+                    done += os.write(fd, data[done:])
+                if self._fsync == FSYNC_BATCH:
+                    os.fsync(fd)
+            finally:
+                try:
+                    end_offset = os.lseek(fd, 0, os.SEEK_CUR)
+                except OSError:
+                    pass
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        except OSError as e:
+            error = e
+        if error:
+            # Reopen next time, in case the file was replaced or remounted
+            self.close_file()
+
+        if done >= len(prefix):
+            self._torn = False
+            done -= len(prefix)
+        # Dequeue what reached the file; a line cut short is written again whole
+        written: list[_Entry] = []
+        while queue and done >= len(queue[0][1]):
+            entry = queue.popleft()
+            done -= len(entry[1])
+            written.append(entry)
+        if done:
+            self._torn = True
+            end_offset -= done
+        return written, end_offset, error
+
+    def _lock(self) -> int:
+        """The open log, exclusively locked; reopened first if it was replaced."""
+        fd, self._fd = self._fd, None
+        if fd is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = lock_log(self._path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, fd)
+        return self._fd
+
+    def close_file(self):
+        """Close the descriptor, e.g. before the log is replaced. Worker thread only."""
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+
+    def _close(self):
+        if self._fd is not None and self._fsync != FSYNC_NEVER:
+            try:
+                os.fsync(self._fd)
+            except OSError as e:
+                print(f"Could not sync statistics: {e}")
+        if self._queue:
+            print(f"{len(self._queue)} statistics event(s) could not be written")
+        self.close_file()
@@ -0,0 +1,267 @@
+"""Per-day break statistics for SpineGuard.
+
+DailyRollup keeps one counter per (event, break type) for every day in
+stats.jsonl, so summaries no longer reparse the whole log. The rollup is
+saved next to the log with the log's inode and the byte offset it
+covers: on load only lines appended since then are read, and a log that
+was replaced or truncated is recounted from scratch, starting from the
+daily counts of the compacted monthly segments. Prefix sums over the
+sorted days answer any date range with two bisects per counter.
+"""
+
+import bisect
+import json
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .stats_log import RecentIds, merged_lengths
+from .stats_segments import StatsSegments
+
+ROLLUP_VERSION = 1
+
+# Inode recorded while the log does not exist
+_NO_LOG = -1
+
+# Summary field for each counted event
+_OUTCOMES = {
+    "break_completed": "completed",
+    "break_skipped": "skipped",
+    "break_done_early": "done_early",
+}
+
+
+def empty_summary() -> dict:
+    """A summary with no breaks in it."""
+    return {"completed": 0, "skipped": 0, "done_early": 0, "by_type": {}}
+
+
+def add_to_summary(summary: dict, event: str, break_type: str, count: int):
+    """Add count occurrences of event for break_type to summary."""
+    by_type = summary["by_type"].setdefault(break_type, {"completed": 0, "skipped": 0, "done_early": 0})
+    outcome = _OUTCOMES.get(event)
+    if outcome:
+        summary[outcome] += count
+        by_type[outcome] += count
+
+
+class DailyRollup:
+    """Day-by-day event counters for one stats log."""
+
+    def __init__(self, log_path: Path, path: Optional[Path] = None, segments: Optional[StatsSegments] = None):
+        self._log_path = log_path
+        self._segments = segments
+        self._path = path or log_path.with_name(log_path.stem + ".rollup.json")
+        self._days: list[str] = []
+        self._counts: list[dict[str, int]] = []
+        # key -> running totals, _prefix[key][i] = sum of days[:i]; None when stale
+        self._prefix: Optional[dict[str, list[int]]] = None
+        self._inode = 0
+        self._offset = 0
+        self._dirty = False
+        self._recent = RecentIds()
+
+    @property
+    def dirty(self) -> bool:
+        """True if the rollup changed since it was last saved."""
+        return self._dirty
+
+    # --- Loading ---
+
+    def load(self):
+        """Read the saved rollup and bring it up to date with the log."""
+        try:
+            with open(self._path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == ROLLUP_VERSION:
+                self._inode = int(data["inode"])
+                self._offset = int(data["offset"])
+                self._days = sorted(data["days"])
+                self._counts = [dict(data["days"][day]) for day in self._days]
+        except (IOError, ValueError, KeyError, TypeError, AttributeError):
+            self._reset()
+        self._prefix = None
+        self.catch_up()
+
+    def catch_up(self):
+        """Count complete lines appended to the log since the covered offset."""
+        try:
+            stat = os.stat(self._log_path)
+        except OSError:
+            if self._inode != _NO_LOG:
+                self._recount(_NO_LOG)
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            # Replaced or truncated: what we counted is no longer in the log
+            self._recount(stat.st_ino)
+        if stat.st_size == self._offset:
+            return
+        try:
+            with open(self._log_path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except IOError:
+            return
+        end = data.rfind(b"\n") + 1
+        merged = {}
+        if self._offset == 0 and self._segments:
+            # Lines a compaction moved into segments before it replaced the log
+            merged = merged_lengths(stat.st_ino, data, self._segments.merged_sources())
+        offset = 0
+        for line in data[:end].splitlines(keepends=True):
+            self._count_line(line, offset, merged)
+            offset += len(line)
+        self._offset += end
+        self._dirty = True
+
+    def _count_line(self, line: bytes, offset: int, merged: dict[str, int]):
+        try:
+            event = json.loads(line)
+            day = event["timestamp"][:10]
+        except (ValueError, KeyError, TypeError):
+            return
+        if offset < merged.get(day[:7], 0) or self._recent.seen(event):
+            return
+        if len(day) == 10 and day[4] == "-" and day[7] == "-":
+            self._increment(day, _key(event.get("event", ""), event.get("break_type", "unknown")))
+
+    def _reset(self):
+        self._recent = RecentIds()
+        self._days = []
+        self._counts = []
+        self._prefix = None
+        self._inode = 0
+        self._offset = 0
+        self._dirty = True
+
+    def _recount(self, inode: int):
+        """Start over from the compacted segments, before reading the log from offset 0."""
+        self._reset()
+        self._inode = inode
+        if self._segments:
+            for day, event, break_type, count in self._segments.daily_counts():
+                self._increment(day, _key(event, break_type), count)
+
+    def rebase(self, read_size: int, inode: int, size: int):
+        """Follow a compaction that moved old lines out of the log.
+
+        Counts are unchanged by compaction; only the log they map to is
+        new. If the rollup had not covered exactly what compaction read,
+        the next catch_up() recounts instead.
+        """
+        if self._inode != _NO_LOG and self._offset == read_size:
+            self._inode = inode
+            self._offset = size
+            self._dirty = True
+
+    # --- Updating ---
+
+    def add(self, event: dict, end_offset: int, size: int):
+        """Count an event just written to the log, ending at end_offset.
+
+        Lines already counted by catch_up() are ignored; if the log grew
+        by more than this line (another writer), the gap is read instead.
+        """
+        start = end_offset - size
+        if end_offset <= self._offset:
+            return
+        if start != self._offset:
+            self.catch_up()
+            return
+        self._offset = end_offset
+        self._dirty = True
+        if self._recent.seen(event):
+            return
+        self._increment(event["timestamp"][:10], _key(event["event"], event["break_type"]))
+
+    def _increment(self, day: str, key: str, count: int = 1):
+        """Add count to key on day, keeping the prefix sums current when cheap."""
+        days = self._days
+        if days and day == days[-1]:
+            counts = self._counts[-1]
+        elif not days or day > days[-1]:
+            days.append(day)
+            counts = {}
+            self._counts.append(counts)
+            if self._prefix is not None:
+                for totals in self._prefix.values():
+                    totals.append(totals[-1])
+        else:
+            # An older day (clock set back): insert and rebuild sums lazily
+            index = bisect.bisect_left(days, day)
+            if index == len(days) or days[index] != day:
+                days.insert(index, day)
+                self._counts.insert(index, {})
+            self._counts[index][key] = self._counts[index].get(key, 0) + count
+            self._prefix = None
+            return
+        counts[key] = counts.get(key, 0) + count
+        if self._prefix is not None:
+            totals = self._prefix.get(key)
+            if totals is None:
+                totals = self._prefix[key] = [0] * (len(days) + 1)
+            totals[-1] += count
+
+    # --- Queries ---
+
+    def _prefix_sums(self) -> dict[str, list[int]]:
+        if self._prefix is None:
+            prefix: dict[str, list[int]] = {}
+            n = len(self._days)
+            for i, counts in enumerate(self._counts):
+                for key, count in counts.items():
+                    totals = prefix.get(key)
+                    if totals is None:
+                        totals = prefix[key] = [0] * (n + 1)
+                    totals[i + 1] = count
+            for totals in prefix.values():
+                for i in range(1, n + 1):
+                    totals[i] += totals[i - 1]
+            self._prefix = prefix
+        return self._prefix
+
+    def summary(self, first_day: str, last_day: str) -> dict:
+        """Summarize events from first_day to last_day inclusive ("YYYY-MM-DD")."""
+        lo = bisect.bisect_left(self._days, first_day)
+        hi = bisect.bisect_right(self._days, last_day)
+        summary = empty_summary()
+        if lo >= hi:
+            return summary
+        for key, totals in self._prefix_sums().items():
+            count = totals[hi] - totals[lo]
+            if not count:
+                continue
+            event, _, break_type = key.partition("/")
+            add_to_summary(summary, event, break_type, count)
+        return summary
+
+    def daily(self, first_day: str, last_day: str) -> Iterator[tuple[str, dict]]:
+        """(day, summary) for each day with events from first_day to last_day inclusive."""
+        lo = bisect.bisect_left(self._days, first_day)
+        hi = bisect.bisect_right(self._days, last_day)
+        for day, counts in zip(self._days[lo:hi], self._counts[lo:hi]):
+            summary = empty_summary()
+            for key, count in counts.items():
+                event, _, break_type = key.partition("/")
+                add_to_summary(summary, event, break_type, count)
+            yield day, summary
+
+    # --- Saving ---
+
+    def to_json(self) -> str:
+        """Serialize for saving; marks the rollup clean."""
+        self._dirty = False
+        return json.dumps({
+            "version": ROLLUP_VERSION,
+            "inode": self._inode,
+            "offset": self._offset,
+            "days": dict(zip(self._days, self._counts)),
+        }, separators=(",", ":"))
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+
+def _key(event: str, break_type: str) -> str:
+    return f"{event}/{break_type}"
@@ -0,0 +1,414 @@
+"""Compact monthly segments of SpineGuard break statistics.
+
+Once a month is over, its lines are moved out of stats.jsonl into
+stats-YYYY-MM.seg beside it. A segment stores columns instead of JSON:
+epoch seconds, and event and break type as one-byte codes into name
+tables kept in the segment header. The body is zlib-compressed, so a
+month of breaks and eye-rest events takes a few kilobytes.
+
+Months older than the retention period are downsampled to one count per
+day, event and break type. They still count in summaries but no longer
+return individual events.
+
+File layout, all integers little-endian:
+
+    b"SGSG" | version u8 | flags u8 (bit 0: zlib) | body
+    body = header length u32 | header JSON | columns
+
+The header holds the kind ("events" or "daily"), the row count, the
+name tables and the source: the inode, length and SHA-1 of the log
+prefix last merged in. Segments are written before the log is rewritten
+without the moved lines, so a compaction cut short leaves them in both
+places; the next one recognises the prefix and does not merge it again,
+and readers skip the month's lines in it (see merged_sources()).
+Columns follow the header in the order given by _COLUMNS.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .io_worker import atomic_write
+from .stats_log import lock_log, merged_lengths
+
+SEGMENT_MAGIC = b"SGSG"
+SEGMENT_VERSION = 1
+_FLAG_ZLIB = 1
+
+KIND_EVENTS = "events"
+KIND_DAILY = "daily"
+
+# Column names and array typecodes, in file order
+_COLUMNS = {
+    KIND_EVENTS: (("time", "q"), ("event", "B"), ("break_type", "B")),
+    KIND_DAILY: (("day", "i"), ("event", "B"), ("break_type", "B"), ("count", "I")),
+}
+
+
+class Segment:
+    """One month of events, column by column."""
+
+    __slots__ = ("kind", "columns", "events", "break_types", "source")
+
+    def __init__(self, kind: str, events: Optional[list[str]] = None, break_types: Optional[list[str]] = None):
+        self.kind = kind
+        self.columns = {name: array(code) for name, code in _COLUMNS[kind]}
+        self.events: list[str] = events or []
+        self.break_types: list[str] = break_types or []
+        # [inode, length, sha1 hex] of the log prefix merged in last
+        self.source: Optional[list] = None
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values())))
+
+    def code(self, table: list[str], name: str) -> int:
+        """Index of name in table, adding it if new."""
+        try:
+            return table.index(name)
+        except ValueError:
+            if len(table) > 255:
+                raise ValueError(f"too many distinct names in segment: {name!r}")
+            table.append(name)
+            return len(table) - 1
+
+    def append_event(self, epoch: int, event: str, break_type: str):
+        self.columns["time"].append(epoch)
+        self.columns["event"].append(self.code(self.events, event))
+        self.columns["break_type"].append(self.code(self.break_types, break_type))
+
+    def daily_counts(self) -> dict[tuple[int, str, str], int]:
+        """Counts keyed by (day ordinal, event, break type)."""
+        c = self.columns
+        counts: dict[tuple[int, str, str], int] = {}
+        if self.kind == KIND_DAILY:
+            rows = zip(c["day"], c["event"], c["break_type"], c["count"])
+        else:
+            rows = self._event_days()
+        for ordinal, event, break_type, count in rows:
+            key = (ordinal, self.events[event], self.break_types[break_type])
+            counts[key] = counts.get(key, 0) + count
+        return counts
+
+    def _event_days(self) -> Iterator[tuple[int, int, int, int]]:
+        """(day ordinal, event code, break type code, 1) per event."""
+        c = self.columns
+        day_start = day_end = 0
+        ordinal = 0
+        for epoch, event, break_type in zip(c["time"], c["event"], c["break_type"]):
+            if not day_start <= epoch < day_end:
+                # Local midnights, so DST and odd UTC offsets are handled
+                day = datetime.fromtimestamp(epoch).date()
+                ordinal = day.toordinal()
+                day_start = int(datetime.combine(day, datetime.min.time()).timestamp())
+                day_end = int(datetime.combine(date.fromordinal(ordinal + 1), datetime.min.time()).timestamp())
+            yield ordinal, event, break_type, 1
+
+    @classmethod
+    def from_daily_counts(cls, counts: dict[tuple[int, str, str], int]) -> "Segment":
+        """A daily segment holding counts keyed by (day ordinal, event, break type)."""
+        segment = cls(KIND_DAILY)
+        c = segment.columns
+        for (ordinal, event, break_type), count in sorted(counts.items()):
+            c["day"].append(ordinal)
+            c["event"].append(segment.code(segment.events, event))
+            c["break_type"].append(segment.code(segment.break_types, break_type))
+            c["count"].append(count)
+        return segment
+
+    def to_daily(self) -> "Segment":
+        """The same month downsampled to daily counts."""
+        segment = Segment.from_daily_counts(self.daily_counts())
+        segment.source = self.source
+        return segment
+
+    def to_bytes(self, compress: bool = True) -> bytes:
+        header = json.dumps({
+            "kind": self.kind,
+            "count": len(self),
+            "events": self.events,
+            "break_types": self.break_types,
+            "source": self.source,
+        }).encode()
+        parts = [struct.pack("<I", len(header)), header]
+        for name, _ in _COLUMNS[self.kind]:
+            column = self.columns[name]
+            if sys.byteorder == "big":
+                column = array(column.typecode, column)
+                column.byteswap()
+            parts.append(column.tobytes())
+        body = b"".join(parts)
+        flags = 0
+        if compress:
+            body = zlib.compress(body, 6)
+            flags |= _FLAG_ZLIB
+        return SEGMENT_MAGIC + struct.pack("<BB", SEGMENT_VERSION, flags) + body
+
+    @staticmethod
+    def read_source(data: bytes) -> Optional[list]:
+        """The source recorded in a segment's header, decoding only the header."""
+        if data[:4] != SEGMENT_MAGIC:
+            raise ValueError("not a statistics segment")
+        version, flags = struct.unpack_from("<BB", data, 4)
+        if version != SEGMENT_VERSION:
+            raise ValueError(f"unsupported segment version {version}")
+        if flags & _FLAG_ZLIB:
+            decompressor = zlib.decompressobj()
+            body = decompressor.decompress(data[6:], 4)
+            (header_len,) = struct.unpack_from("<I", body, 0)
+            body += decompressor.decompress(decompressor.unconsumed_tail, header_len)
+        else:
+            body = data[6:]
+            (header_len,) = struct.unpack_from("<I", body, 0)
+        return json.loads(body[4:4 + header_len]).get("source")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Segment":
+        if data[:4] != SEGMENT_MAGIC:
+            raise ValueError("not a statistics segment")
+        version, flags = struct.unpack_from("<BB", data, 4)
+        if version != SEGMENT_VERSION:
+            raise ValueError(f"unsupported segment version {version}")
+        body = data[6:]
+        if flags & _FLAG_ZLIB:
+            body = zlib.decompress(body)
+        (header_len,) = struct.unpack_from("<I", body, 0)
+        header = json.loads(body[4:4 + header_len])
+        segment = cls(header["kind"], header["events"], header["break_types"])
+        segment.source = header.get("source")
+        offset = 4 + header_len
+        count = header["count"]
+        for name, _ in _COLUMNS[segment.kind]:
+            column = segment.columns[name]
+            size = count * column.itemsize
+            column.frombytes(body[offset:offset + size])
+            if sys.byteorder == "big":
+                column.byteswap()
+            offset += size
+        return segment
+
+
+def _epoch(timestamp: str) -> int:
+    return int(datetime.fromisoformat(timestamp).timestamp())
+
+
+def _month_before(month: str, months: int) -> str:
+    """The "YYYY-MM" month that is months before month."""
+    year, mon = int(month[:4]), int(month[5:7])
+    index = year * 12 + (mon - 1) - months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+class StatsSegments:
+    """The compacted months of one stats log."""
+
+    def __init__(self, log_path: Path, retention_months: int = 0, compress: bool = True):
+        self._log_path = log_path
+        self._retention_months = retention_months
+        self._compress = compress
+
+    def path_for(self, month: str) -> Path:
+        return self._log_path.with_name(f"{self._log_path.stem}-{month}.seg")
+
+    def months(self) -> list[str]:
+        """Compacted months, oldest first."""
+        prefix = self._log_path.stem + "-"
+        try:
+            names = os.listdir(self._log_path.parent)
+        except OSError:
+            return []
+        return sorted(
+            name[len(prefix):-4] for name in names
+            if name.startswith(prefix) and name.endswith(".seg") and len(name) == len(prefix) + 11
+        )
+
+    def load(self, month: str) -> Optional[Segment]:
+        try:
+            with open(self.path_for(month), "rb") as f:
+                return Segment.from_bytes(f.read())
+        except (IOError, ValueError, KeyError, struct.error, zlib.error) as e:
+            print(f"Skipping statistics segment {month}: {e}")
+            return None
+
+    def merged_sources(self) -> dict[str, list]:
+        """month -> [inode, length, sha1] of the log prefix merged into its segment, for skipping it in the log."""
+        sources = {}
+        for month in self.months():
+            try:
+                with open(self.path_for(month), "rb") as f:
+                    source = Segment.read_source(f.read())
+            except (IOError, ValueError, KeyError, TypeError, struct.error, zlib.error):
+                continue
+            if source:
+                sources[month] = source
+        return sources
+
+    # --- Reading ---
+
+    def events(self, start: Optional[str] = None, end: Optional[str] = None) -> list[dict]:
+        """Events with start <= timestamp < end from segments that still hold them."""
+        return list(self.iter_events(start, end))
+
+    def iter_events(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[dict]:
+        """Like events(), but yielded one at a time with one month loaded at once."""
+        first = _epoch(start) if start else None
+        last = _epoch(end) if end else None
+        for month in self.months():
+            if (start and month < start[:7]) or (end and month > end[:7]):
+                continue
+            segment = self.load(month)
+            if segment is None or segment.kind != KIND_EVENTS:
+                continue
+            c = segment.columns
+            for epoch, event, break_type in zip(c["time"], c["event"], c["break_type"]):
+                if (first is not None and epoch < first) or (last is not None and epoch >= last):
+                    continue
+                yield {
+                    "event": segment.events[event],
+                    "break_type": segment.break_types[break_type],
+                    "timestamp": datetime.fromtimestamp(epoch).isoformat(),
+                }
+
+    def all_events(self) -> Iterator[dict]:
+        """Every compacted event; downsampled days yield their count at noon."""
+        for month in self.months():
+            segment = self.load(month)
+            if segment is None:
+                continue
+            if segment.kind == KIND_EVENTS:
+                c = segment.columns
+                for epoch, event, break_type in zip(c["time"], c["event"], c["break_type"]):
+                    yield {
+                        "event": segment.events[event],
+                        "break_type": segment.break_types[break_type],
+                        "timestamp": datetime.fromtimestamp(epoch).isoformat(),
+                    }
+                continue
+            for (ordinal, event, break_type), count in segment.daily_counts().items():
+                timestamp = f"{date.fromordinal(ordinal).isoformat()}T12:00:00"
+                for _ in range(count):
+                    yield {"event": event, "break_type": break_type, "timestamp": timestamp}
+
+    def daily_counts(
+        self, first_day: Optional[str] = None, last_day: Optional[str] = None
+    ) -> Iterator[tuple[str, str, str, int]]:
+        """(day, event, break type, count) for every compacted day, optionally within a range."""
+        for month in self.months():
+            if (first_day and month < first_day[:7]) or (last_day and month > last_day[:7]):
+                continue
+            segment = self.load(month)
+            if segment is None:
+                continue
+            for (ordinal, event, break_type), count in segment.daily_counts().items():
+                day = date.fromordinal(ordinal).isoformat()
+                if (first_day and day < first_day) or (last_day and day > last_day):
+                    continue
+                yield day, event, break_type, count
+
+    # --- Compaction (I/O worker thread) ---
+
+    def compact(self, current_month: str) -> Optional[tuple[int, int, int]]:
+        """Move lines from months before current_month into segments.
+
+        Returns (bytes of the old log that were read, new inode, new size),
+        or None if there was nothing to move or lines written twice were
+        dropped (counts taken from the old log no longer match). Holds the
+        log's flock throughout, so appends from any process wait for it.
+        """
+        try:
+            fd = lock_log(self._log_path, os.O_RDWR)
+        except FileNotFoundError:
+            self.apply_retention(current_month)
+            return None
+        try:
+            return self._compact_locked(fd, current_month)
+        finally:
+            os.close(fd)
+
+    def _compact_locked(self, fd: int, current_month: str) -> Optional[tuple[int, int, int]]:
+        with open(fd, "rb", closefd=False) as f:
+            data = f.read()
+        # month -> (offset of the line in the log, row)
+        moved: dict[str, list[tuple[int, tuple[int, str, str]]]] = {}
+        kept: list[bytes] = []
+        seen: set[str] = set()
+        duplicates = 0
+        end = data.rfind(b"\n") + 1
+        offset = 0
+        for line in data[:end].splitlines(keepends=True):
+            line_offset, offset = offset, offset + len(line)
+            try:
+                event = json.loads(line)
+                timestamp = event["timestamp"]
+                row = (_epoch(timestamp), event.get("event", ""), event.get("break_type", "unknown"))
+                event_id = event.get("id")
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue  # unreadable anyway
+            if event_id is not None:
+                if event_id in seen:
+                    duplicates += 1
+                    continue
+                seen.add(event_id)
+            if timestamp[:7] < current_month:
+                moved.setdefault(timestamp[:7], []).append((line_offset, row))
+            else:
+                kept.append(line)
+
+        inode = os.fstat(fd).st_ino
+        source = [inode, end, hashlib.sha1(data[:end]).hexdigest()]
+        for month, rows in moved.items():
+            existing = self.load(month) if self.path_for(month).exists() else None
+            merged = merged_lengths(inode, data, {month: existing.source}).get(month, 0) if existing and existing.source else 0
+            new_rows = [row for line_offset, row in rows if line_offset >= merged]
+            if new_rows:
+                self._merge(month, new_rows, existing, source)
+        self.apply_retention(current_month)
+        if not moved:
+            return None
+
+        # A torn final line stays at the end of the log
+        atomic_write(self._log_path, b"".join(kept) + data[end:])
+        if duplicates:
+            print(f"Dropped {duplicates} statistics event(s) written twice")
+            return None
+        stat = os.stat(self._log_path)
+        return len(data), stat.st_ino, stat.st_size
+
+    def _merge(self, month: str, rows: list[tuple[int, str, str]], existing: Optional[Segment], source: list):
+        """Write rows into the month's segment, merging with what is there."""
+        if existing and existing.kind == KIND_EVENTS:
+            c = existing.columns
+            rows = rows + [
+                (epoch, existing.events[event], existing.break_types[break_type])
+                for epoch, event, break_type in zip(c["time"], c["event"], c["break_type"])
+            ]
+        rows.sort(key=lambda row: row[0])
+        segment = Segment(KIND_EVENTS)
+        for epoch, event, break_type in rows:
+            segment.append_event(epoch, event, break_type)
+        if existing and existing.kind == KIND_DAILY:
+            # Late events for a month that was already downsampled
+            counts = existing.daily_counts()
+            for key, count in segment.daily_counts().items():
+                counts[key] = counts.get(key, 0) + count
+            segment = Segment.from_daily_counts(counts)
+        segment.source = source
+        atomic_write(self.path_for(month), segment.to_bytes(self._compress))
+
+    def apply_retention(self, current_month: str):
+        """Downsample event segments older than the retention period."""
+        if not self._retention_months:
+            return
+        cutoff = _month_before(current_month, self._retention_months)
+        for month in self.months():
+            if month >= cutoff:
+                break
+            segment = self.load(month)
+            if segment is not None and segment.kind == KIND_EVENTS:
+                atomic_write(self.path_for(month), segment.to_daily().to_bytes(self._compress))
@@ -0,0 +1,290 @@
+"""SQLite storage for SpineGuard break statistics.
+
+An alternative to stats.jsonl, selected with "stats_backend": "sqlite".
+Events live in one indexed table of a WAL-mode database, so summaries
+are GROUP BY queries over the requested range and other programs (e.g.
+reporting scripts) can read the file while SpineGuard writes to it.
+
+Inserts are batched: events wait in memory for BATCH_DELAY_MS and are
+written in one transaction on the I/O worker, which owns the connection.
+A database that cannot be opened is opened again with the next batch,
+and a batch that fails is retried after RETRY_DELAY_MS; at most
+MAX_QUEUED events wait, the oldest are dropped first.
+Queries run as worker jobs too, so they see every batch handed over
+before them without the main loop waiting for the disk.
+On first use the existing stats.jsonl is imported once. Event ids are
+unique, so inserting an event again (a retried batch) does nothing.
+"""
+
+import json
+import os
+import sqlite3
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .config import STATE_DIR, STATS_FILE
+from .eventloop import EventLoop, default_loop
+from .io_worker import IOWorker, default_worker
+from .stats_rollup import add_to_summary, empty_summary
+from .stats_log import merged_lengths
+from .stats_segments import StatsSegments
+
+STATS_DB = STATE_DIR / "stats.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    event TEXT NOT NULL,
+    break_type TEXT NOT NULL,
+    uid TEXT
+);
+CREATE INDEX IF NOT EXISTS events_timestamp ON events (timestamp);
+CREATE INDEX IF NOT EXISTS events_break_type ON events (break_type, timestamp);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+_INSERT = "INSERT OR IGNORE INTO events (timestamp, event, break_type, uid) VALUES (?, ?, ?, ?)"
+
+_SELECT_EVENTS = (
+    "SELECT timestamp, event, break_type FROM events"
+    " WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp"
+)
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), timeout=5.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def connect_readonly(path: Path = STATS_DB) -> sqlite3.Connection:
+    """A connection that cannot write, for reading beside a running SpineGuard."""
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=5.0)
+
+
+def iter_events(conn: sqlite3.Connection, start: str, end: Optional[str] = None) -> Iterator[dict]:
+    """Yield events with start <= timestamp < end (ISO strings; None = unbounded)."""
+    for timestamp, event, break_type in conn.execute(_SELECT_EVENTS, (start, end or "\uffff")):
+        yield {"event": event, "break_type": break_type, "timestamp": timestamp}
+
+
+def iter_daily(conn: sqlite3.Connection, first_day: str, last_day: str) -> Iterator[tuple[str, dict]]:
+    """(day, summary) for each day with events from first_day to last_day inclusive."""
+    end = (date.fromisoformat(last_day) + timedelta(days=1)).isoformat()
+    rows = conn.execute(
+        "SELECT substr(timestamp, 1, 10), event, break_type, COUNT(*) FROM events"
+        " WHERE timestamp >= ? AND timestamp < ? GROUP BY 1, 2, 3 ORDER BY 1",
+        (first_day, end),
+    )
+    day, summary = None, empty_summary()
+    for row_day, event, break_type, count in rows:
+        if row_day != day:
+            if day is not None:
+                yield day, summary
+            day, summary = row_day, empty_summary()
+        add_to_summary(summary, event, break_type, count)
+    if day is not None:
+        yield day, summary
+
+
+def _rows(event: dict) -> tuple[str, str, str, Optional[str]]:
+    return (event["timestamp"], event.get("event", ""), event.get("break_type", "unknown"), event.get("id"))
+
+
+class SQLiteStatsStore:
+    """Break events in an SQLite database."""
+
+    BATCH_DELAY_MS = 2000
+    RETRY_DELAY_MS = 30000
+    MAX_QUEUED = 5000
+
+    def __init__(
+        self,
+        path: Path = STATS_DB,
+        import_from: Optional[Path] = STATS_FILE,
+        worker: Optional[IOWorker] = None,
+        loop: Optional[EventLoop] = None,
+    ):
+        self._path = path
+        self._worker = worker or default_worker()
+        self._loop = loop
+        self._pending: list[tuple[str, str, str, Optional[str]]] = []
+        self._batch_source: Optional[int] = None
+        self._closed = False
+        # Owned by the I/O worker thread
+        self._conn: Optional[sqlite3.Connection] = None
+        self._import_from = import_from
+        self._worker.submit(self._open, self._on_opened)
+
+    def _on_opened(self, result, error):
+        if error:
+            print(f"Could not open {self._path}, will retry with the next batch: {error}")
+
+    # --- Worker thread ---
+
+    def _open(self):
+        """Open the database if it is not open yet. Raises sqlite3.Error or OSError."""
+        if self._conn is not None:
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        conn = _connect(self._path)
+        try:
+            conn.executescript(_SCHEMA)
+            self._migrate(conn)
+            if self._import_from is not None:
+                self._import(conn, self._import_from)
+        except BaseException:
+            conn.close()
+            raise
+        self._conn = conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection):
+        """Bring a database from an older version up to the current schema."""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(events)")}
+        if "uid" not in columns:
+            conn.execute("ALTER TABLE events ADD COLUMN uid TEXT")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS events_uid ON events (uid)")
+
+    @staticmethod
+    def _import(conn: sqlite3.Connection, source: Path):
+        """Copy stats.jsonl and its compacted segments into the database, once."""
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'imported'").fetchone():
+            return
+        segments = StatsSegments(source)
+        rows = [_rows(event) for event in segments.all_events()]
+        try:
+            with open(source, "rb") as f:
+                data = f.read()
+                inode = os.fstat(f.fileno()).st_ino
+        except FileNotFoundError:
+            data, inode = b"", 0
+        # Skip lines a compaction moved into segments before it replaced the log
+        merged = merged_lengths(inode, data, segments.merged_sources())
+        offset = 0
+        for line in data.splitlines(keepends=True):
+            line_start, offset = offset, offset + len(line)
+            try:
+                event = json.loads(line)
+                if line_start < merged.get(event["timestamp"][:7], 0):
+                    continue
+                rows.append(_rows(event))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue
+        with conn:
+            conn.executemany(_INSERT, rows)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('imported', ?)", (str(source),))
+        if rows:
+            print(f"Imported {len(rows)} statistics events from {source}")
+
+    def _insert(self, rows: list[tuple[str, str, str, Optional[str]]]):
+        self._open()
+        with self._conn:
+            self._conn.executemany(_INSERT, rows)
+
+    def _close(self, rows: list[tuple[str, str, str, Optional[str]]]):
+        if rows:
+            try:
+                self._insert(rows)
+            except (sqlite3.Error, OSError) as e:
+                print(f"{len(rows)} statistics event(s) could not be written: {e}")
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # --- Main thread ---
+
+    def add(self, event: dict):
+        """Queue an event; it is written with the next batch."""
+        self._pending.append(_rows(event))
+        self._schedule_flush(self.BATCH_DELAY_MS)
+
+    def _schedule_flush(self, delay_ms: int):
+        if self._batch_source is not None:
+            return
+        if self._loop is None:
+            self._loop = default_loop()
+        self._batch_source = self._loop.timeout_add(delay_ms, self._on_batch_timeout)
+
+    def _on_batch_timeout(self) -> bool:
+        self._batch_source = None
+        self.flush()
+        return False
+
+    def flush(self):
+        """Hand queued events to the I/O worker now."""
+        if self._batch_source is not None:
+            self._loop.source_remove(self._batch_source)
+            self._batch_source = None
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+
+        def _on_written(result, error):
+            if not error:
+                return
+            if self._closed:
+                print(f"{len(rows)} statistics event(s) could not be written: {error}")
+                return
+            print(f"Could not write statistics, will retry: {error}")
+            # Keep them for the next batch rather than losing them
+            self._pending[:0] = rows
+            if len(self._pending) > self.MAX_QUEUED:
+                dropped = len(self._pending) - self.MAX_QUEUED
+                del self._pending[:dropped]
+                print(f"Statistics queue full: dropped {dropped} oldest event(s)")
+            self._schedule_flush(self.RETRY_DELAY_MS)
+
+        self._worker.submit(lambda: self._insert(rows), _on_written)
+
+    def close(self):
+        """Write queued events and close the database, reporting any that could not be written."""
+        if self._batch_source is not None:
+            self._loop.source_remove(self._batch_source)
+            self._batch_source = None
+        self._closed = True
+        rows, self._pending = self._pending, []
+        self._worker.submit(lambda: self._close(rows))
+
+    # --- Queries (worker thread: submit them after flush()) ---
+
+    def _query(self, sql: str, params: tuple) -> list[tuple]:
+        try:
+            self._open()
+            return self._conn.execute(sql, params).fetchall()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Could not read statistics: {e}")
+            return []
+
+    def events(self, start: str, end: Optional[str] = None) -> list[dict]:
+        """Events with start <= timestamp < end (ISO strings; None = unbounded)."""
+        rows = self._query(_SELECT_EVENTS, (start, end or "\uffff"))
+        return [{"event": event, "break_type": break_type, "timestamp": timestamp}
+                for timestamp, event, break_type in rows]
+
+    def heatmap_rows(self, start: str) -> list[tuple[int, int, int, int]]:
+        """(weekday, hour, kept, due) since start; Monday is weekday 0."""
+        rows = self._query(
+            "SELECT CAST(strftime('%w', timestamp) AS INTEGER), CAST(strftime('%H', timestamp) AS INTEGER),"
+            " SUM(event != 'break_skipped'), COUNT(*) FROM events"
+            " WHERE timestamp >= ? AND event IN ('break_completed', 'break_done_early', 'break_skipped')"
+            " GROUP BY 1, 2",
+            (start,),
+        )
+        return [((weekday + 6) % 7, hour, kept, due) for weekday, hour, kept, due in rows]
+
+    def summary(self, first_day: str, last_day: str) -> dict:
+        """Summarize events from first_day to last_day inclusive ("YYYY-MM-DD")."""
+        end = (date.fromisoformat(last_day) + timedelta(days=1)).isoformat()
+        rows = self._query(
+            "SELECT event, break_type, COUNT(*) FROM events"
+            " WHERE timestamp >= ? AND timestamp < ? GROUP BY event, break_type",
+            (first_day, end),
+        )
+        summary = empty_summary()
+        for event, break_type, count in rows:
+            add_to_summary(summary, event, break_type, count)
+        return summary
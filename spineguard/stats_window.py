@@ -0,0 +1,488 @@
+"""Statistics window for SpineGuard."""
+
+import math
+from datetime import date
+from typing import Optional
+
+import gi
+
+gi.require_version("Gtk", "4.0")
+
+from gi.repository import Gtk
+
+from .stats import StatsManager
+from .stats_analytics import add_to_heatmap
+from .stats_rollup import add_to_summary
+
+
+# ── Break type display metadata ──────────────────────────────
+
+_BREAK_META = {
+    "walk":            {"icon": "\U0001f6b6", "name": "Walk Breaks"},
+    "lie_down":        {"icon": "\U0001f6cf\ufe0f", "name": "Lie-Down Breaks"},
+    "position_switch": {"icon": "\U0001f9cd", "name": "Position Switches"},
+    "breathing":       {"icon": "\U0001f32c\ufe0f", "name": "Breathing Breaks"},
+    "eye_rest":        {"icon": "\U0001f440", "name": "Eye Rest Breaks"},
+}
+
+
+# (days, tab label, hero subtitle) for each period tab
+_PERIODS = (
+    (1, "TODAY", "today"),
+    (8, "7 DAYS", "last 7 days"),
+    (30, "30 DAYS", "last 30 days"),
+    (90, "90 DAYS", "last 90 days"),
+    (365, "365 DAYS", "last 365 days"),
+)
+
+# Periods long enough for the hour-by-weekday heatmap to mean something
+_HEATMAP_MIN_DAYS = 30
+
+
+class StatsWindow(Gtk.Window):
+    """Dashboard-style statistics window.
+
+    The widgets are built once; switching period updates their labels
+    and drawing data from a per-period cache. The cache is filled by
+    queries on the I/O worker, the shown period first and then the
+    others one at a time; a period not read yet shows a placeholder
+    until its data arrives. While the window is open, each break logged is
+    added to every cached period (and to queries still running) instead
+    of re-reading the statistics.
+    """
+
+    def __init__(self, stats_manager: StatsManager, application: Optional[Gtk.Application] = None):
+        super().__init__(title="SpineGuard — Statistics")
+        if application:
+            self.set_application(application)
+        self._stats = stats_manager
+        self.set_default_size(520, 640)
+        self.add_css_class("stats-window")
+
+        self._period = 1  # days, one of _PERIODS
+        self._tabs: dict[int, Gtk.Button] = {}
+        # Per period: summary and, for long periods, heatmap grid
+        self._summaries: dict[int, dict] = {}
+        self._heatmaps: dict[int, list] = {}
+        self._cache_day = date.today()
+        # ("summary" or "heatmap", period) -> events logged since it was requested
+        self._loading: dict[tuple[str, int], list[dict]] = {}
+        # Bumped to drop the results of queries made for an older cache
+        self._generation = 0
+        # None while the shown period is loading
+        self._compliance: Optional[int] = None
+        self._heatmap_grid: Optional[list] = None
+        self._build_ui()
+        self._stats.subscribe(self._on_event)
+        self.connect("close-request", self._on_close_request)
+
+    def _build_ui(self):
+        """Build the full stats dashboard."""
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+
+        outer = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
+        outer.set_margin_top(32)
+        outer.set_margin_bottom(32)
+        outer.set_margin_start(28)
+        outer.set_margin_end(28)
+
+        # ── Window title ─────────────────────────────────
+        title = Gtk.Label(label="Statistics")
+        title.add_css_class("settings-page-title")
+        title.set_halign(Gtk.Align.START)
+        outer.append(title)
+
+        subtitle = Gtk.Label(label="Your break compliance overview")
+        subtitle.add_css_class("settings-page-subtitle")
+        subtitle.set_halign(Gtk.Align.START)
+        subtitle.set_margin_bottom(24)
+        outer.append(subtitle)
+
+        # ── Period tabs ──────────────────────────────────
+        tab_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
+        tab_box.set_margin_bottom(20)
+
+        for days, label, _ in _PERIODS:
+            tab = Gtk.Button(label=label)
+            tab.add_css_class("stats-period-tab")
+            if days == self._period:
+                tab.add_css_class("stats-period-tab-active")
+            tab.connect("clicked", lambda _, d=days: self._switch_period(d))
+            tab_box.append(tab)
+            self._tabs[days] = tab
+
+        outer.append(tab_box)
+
+        # ── Hero: compliance percentage ──────────────────
+        hero_card = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
+        hero_card.add_css_class("panel-card")
+        hero_card.set_halign(Gtk.Align.FILL)
+        hero_card.set_margin_bottom(16)
+
+        hero_inner = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=24)
+        hero_inner.set_halign(Gtk.Align.CENTER)
+        hero_inner.set_valign(Gtk.Align.CENTER)
+
+        # Compliance ring (custom drawn)
+        self._ring = Gtk.DrawingArea()
+        self._ring.set_size_request(100, 100)
+        self._ring.set_draw_func(
+            lambda area, cr, width, height: self._draw_compliance_ring(area, cr, width, height, self._compliance)
+        )
+        hero_inner.append(self._ring)
+
+        # Text beside ring
+        hero_text = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+        hero_text.set_valign(Gtk.Align.CENTER)
+
+        hero_label = Gtk.Label(label="COMPLIANCE")
+        hero_label.add_css_class("stats-hero-label")
+        hero_label.set_halign(Gtk.Align.START)
+        hero_text.append(hero_label)
+
+        self._hero_value = Gtk.Label()
+        self._hero_value.add_css_class("stats-hero-value")
+        self._hero_value.set_halign(Gtk.Align.START)
+        hero_text.append(self._hero_value)
+
+        self._hero_sub = Gtk.Label()
+        self._hero_sub.add_css_class("stats-hero-subtitle")
+        self._hero_sub.set_halign(Gtk.Align.START)
+        hero_text.append(self._hero_sub)
+
+        hero_inner.append(hero_text)
+        hero_card.append(hero_inner)
+        outer.append(hero_card)
+
+        # ── Three metric cards ───────────────────────────
+        metrics_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        metrics_box.set_homogeneous(True)
+        metrics_box.set_margin_bottom(20)
+
+        self._metric_labels: dict[str, Gtk.Label] = {}
+        for key, label, css_variant in (
+            ("completed", "COMPLETED", "metric-completed"),
+            ("done_early", "DONE EARLY", "metric-early"),
+            ("skipped", "SKIPPED", "metric-skipped"),
+        ):
+            card, self._metric_labels[key] = self._build_metric_card(label, css_variant)
+            metrics_box.append(card)
+        outer.append(metrics_box)
+
+        # ── Breakdown by type ────────────────────────────
+        self._breakdown_title = Gtk.Label(label="BREAKDOWN")
+        self._breakdown_title.add_css_class("stats-section-title")
+        self._breakdown_title.set_halign(Gtk.Align.START)
+        self._breakdown_title.set_margin_bottom(10)
+        outer.append(self._breakdown_title)
+
+        breakdown_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
+        # break type -> (row, count labels by summary key)
+        self._breakdown_rows: dict[str, tuple[Gtk.Box, dict[str, Gtk.Label]]] = {}
+        for break_type, meta in _BREAK_META.items():
+            row, labels = self._build_breakdown_row(meta["icon"], meta["name"])
+            breakdown_box.append(row)
+            self._breakdown_rows[break_type] = (row, labels)
+        outer.append(breakdown_box)
+
+        # ── Compliance by hour and weekday ───────────────
+        self._heatmap_title = Gtk.Label(label="BY HOUR AND WEEKDAY")
+        self._heatmap_title.add_css_class("stats-section-title")
+        self._heatmap_title.set_halign(Gtk.Align.START)
+        self._heatmap_title.set_margin_top(20)
+        self._heatmap_title.set_margin_bottom(10)
+        outer.append(self._heatmap_title)
+
+        self._heatmap = Gtk.DrawingArea()
+        self._heatmap.set_size_request(-1, 7 * 18 + 20)
+        self._heatmap.set_draw_func(
+            lambda area, cr, width, height: self._draw_heatmap(area, cr, width, height, self._heatmap_grid)
+        )
+        outer.append(self._heatmap)
+
+        self._empty = Gtk.Label(label="No breaks recorded yet. Take your first break!")
+        self._empty.add_css_class("stats-empty")
+        self._empty.set_margin_top(40)
+        outer.append(self._empty)
+
+        scrolled.set_child(outer)
+        self.set_child(scrolled)
+
+        self._update_period()
+
+    def _switch_period(self, period: int):
+        if period == self._period:
+            return
+        self._tabs[self._period].remove_css_class("stats-period-tab-active")
+        self._tabs[period].add_css_class("stats-period-tab-active")
+        self._period = period
+        self._update_period()
+
+    # --- Cached data ---
+
+    def _request(self, kind: str, period: int):
+        """Query one period's summary or heatmap on the I/O worker, unless already asked."""
+        key = (kind, period)
+        if key in self._loading:
+            return
+        self._loading[key] = []
+        generation = self._generation
+        query = self._stats.get_summary if kind == "summary" else self._stats.get_heatmap
+        query(period, lambda result, error: self._on_loaded(key, generation, result, error))
+
+    def _on_loaded(self, key: tuple[str, int], generation: int, result, error: Optional[BaseException]):
+        if generation != self._generation:
+            return
+        missed = self._loading.pop(key)
+        kind, period = key
+        if error:
+            # Left uncached, so switching back to the period asks again
+            print(f"Could not read statistics: {error}")
+            return
+        # The query ran ahead of breaks logged since it was made
+        for event in missed:
+            if kind == "summary":
+                add_to_summary(result, event["event"], event["break_type"], 1)
+            else:
+                add_to_heatmap(result, event)
+        (self._summaries if kind == "summary" else self._heatmaps)[period] = result
+        if period == self._period:
+            self._update_period()
+        self._prefetch()
+
+    def _prefetch(self):
+        """Ask for the next missing period once nothing else is loading, so tab switches are instant."""
+        if self._loading:
+            return
+        for days, _, _ in _PERIODS:
+            if days not in self._summaries:
+                self._request("summary", days)
+                return
+            if days >= _HEATMAP_MIN_DAYS and days not in self._heatmaps:
+                self._request("heatmap", days)
+                return
+
+    def _on_event(self, event: dict):
+        """Apply a newly logged break to the cached periods and refresh the view."""
+        if date.fromisoformat(event["timestamp"][:10]) != self._cache_day:
+            # Past midnight every period has moved on by a day: start over
+            self._summaries.clear()
+            self._heatmaps.clear()
+            self._loading.clear()
+            self._generation += 1
+            self._heatmap_grid = None
+            self._cache_day = date.today()
+        else:
+            # Every period ends today, so the event belongs to all of them
+            for summary in self._summaries.values():
+                add_to_summary(summary, event["event"], event["break_type"], 1)
+            for grid in self._heatmaps.values():
+                add_to_heatmap(grid, event)
+            for missed in self._loading.values():
+                missed.append(event)
+            if self._heatmap_grid is not None and self._heatmap.get_visible():
+                self._heatmap.queue_draw()
+        self._update_period()
+
+    def _on_close_request(self, _window) -> bool:
+        self._stats.unsubscribe(self._on_event)
+        # Results still on their way have no window to go to
+        self._loading.clear()
+        self._generation += 1
+        return False
+
+    # --- Display ---
+
+    def _update_period(self):
+        """Show the active period's numbers in the existing widgets, or query them."""
+        summary = self._summaries.get(self._period)
+        if summary is None:
+            self._show_loading()
+            self._request("summary", self._period)
+            return
+        total = summary["completed"] + summary["done_early"] + summary["skipped"]
+
+        compliance = 0
+        if total > 0:
+            compliance = round((summary["completed"] + summary["done_early"]) / total * 100)
+        if compliance != self._compliance:
+            self._compliance = compliance
+            self._ring.queue_draw()
+        self._hero_value.set_label(f"{compliance}%")
+        period_label = next(text for days, _, text in _PERIODS if days == self._period)
+        self._hero_sub.set_label(f"{total} breaks {period_label}")
+
+        for key, label in self._metric_labels.items():
+            label.set_label(str(summary[key]))
+
+        by_type = summary["by_type"]
+        for break_type, (row, labels) in self._breakdown_rows.items():
+            counts = by_type.get(break_type)
+            row.set_visible(counts is not None)
+            if counts is not None:
+                for key, label in labels.items():
+                    label.set_label(str(counts[key]))
+        self._breakdown_title.set_visible(bool(by_type))
+
+        show_heatmap = bool(by_type) and self._period >= _HEATMAP_MIN_DAYS
+        self._heatmap_title.set_visible(show_heatmap)
+        self._heatmap.set_visible(show_heatmap)
+        if show_heatmap:
+            # Left blank until the period's heatmap arrives
+            grid = self._heatmaps.get(self._period)
+            if grid is None:
+                self._request("heatmap", self._period)
+            if grid is not self._heatmap_grid:
+                self._heatmap_grid = grid
+                self._heatmap.queue_draw()
+        self._empty.set_visible(not by_type and total == 0)
+
+    def _show_loading(self):
+        """Placeholder while the active period's summary is being read."""
+        if self._compliance is not None:
+            self._compliance = None
+            self._ring.queue_draw()
+        self._hero_value.set_label("–")
+        self._hero_sub.set_label("Loading…")
+        for label in self._metric_labels.values():
+            label.set_label("–")
+        for row, _ in self._breakdown_rows.values():
+            row.set_visible(False)
+        for widget in (self._breakdown_title, self._heatmap_title, self._heatmap, self._empty):
+            widget.set_visible(False)
+
+    def _build_metric_card(self, label: str, css_variant: str) -> tuple[Gtk.Box, Gtk.Label]:
+        card = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=4)
+        card.add_css_class("metric-card")
+        card.add_css_class(css_variant)
+        card.set_halign(Gtk.Align.FILL)
+
+        val = Gtk.Label(label="0")
+        val.add_css_class("metric-value")
+        card.append(val)
+
+        lbl = Gtk.Label(label=label)
+        lbl.add_css_class("metric-label")
+        card.append(lbl)
+
+        return card, val
+
+    def _build_breakdown_row(self, icon: str, name: str) -> tuple[Gtk.Box, dict[str, Gtk.Label]]:
+        row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
+        row.add_css_class("breakdown-row")
+
+        # Icon
+        icon_label = Gtk.Label(label=icon)
+        icon_label.add_css_class("breakdown-type-icon")
+        icon_label.set_valign(Gtk.Align.CENTER)
+        row.append(icon_label)
+
+        # Name
+        name_label = Gtk.Label(label=name)
+        name_label.add_css_class("breakdown-type-name")
+        name_label.set_hexpand(True)
+        name_label.set_halign(Gtk.Align.START)
+        name_label.set_valign(Gtk.Align.CENTER)
+        row.append(name_label)
+
+        # Count cells
+        labels: dict[str, Gtk.Label] = {}
+        for key, count_label, css_class in [
+            ("completed", "done", "breakdown-count-completed"),
+            ("done_early", "early", "breakdown-count-early"),
+            ("skipped", "skip", "breakdown-count-skipped"),
+        ]:
+            cell = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=1)
+            cell.set_valign(Gtk.Align.CENTER)
+            cell.set_halign(Gtk.Align.CENTER)
+            cell.set_size_request(48, -1)
+
+            cv = Gtk.Label(label="0")
+            cv.add_css_class("breakdown-count")
+            cv.add_css_class(css_class)
+            cell.append(cv)
+            labels[key] = cv
+
+            cl = Gtk.Label(label=count_label.upper())
+            cl.add_css_class("breakdown-count-label")
+            cell.append(cl)
+
+            row.append(cell)
+
+        return row, labels
+
+    @staticmethod
+    def _draw_heatmap(area, cr, width, height, grid):
+        """Draw compliance per weekday (rows) and hour (columns)."""
+        if grid is None:
+            return
+        label_w = 34
+        top = 16
+        cell_w = (width - label_w) / 24
+        cell_h = (height - top) / 7
+
+        cr.select_font_face("Sans", 0, 0)
+        cr.set_font_size(10)
+        cr.set_source_rgba(0.34, 0.39, 0.47, 1.0)
+        for hour in range(0, 24, 3):
+            cr.move_to(label_w + hour * cell_w, top - 5)
+            cr.show_text(f"{hour:02d}")
+        for day, name in enumerate(("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")):
+            cr.move_to(0, top + day * cell_h + cell_h * 0.7)
+            cr.show_text(name)
+
+        for day in range(7):
+            for hour in range(24):
+                kept, due = grid[day][hour]
+                x = label_w + hour * cell_w + 1
+                y = top + day * cell_h + 1
+                if not due:
+                    cr.set_source_rgba(0.54, 0.61, 0.69, 0.06)
+                else:
+                    compliance = kept / due * 100
+                    if compliance >= 70:
+                        cr.set_source_rgba(0.27, 0.83, 0.54, 0.85)  # green
+                    elif compliance >= 40:
+                        cr.set_source_rgba(0.91, 0.72, 0.29, 0.85)  # amber
+                    else:
+                        cr.set_source_rgba(0.91, 0.39, 0.35, 0.85)  # coral
+                cr.rectangle(x, y, cell_w - 2, cell_h - 2)
+                cr.fill()
+
+    @staticmethod
+    def _draw_compliance_ring(area, cr, width, height, compliance):
+        """Draw a compliance ring with the percentage."""
+        cx = width / 2
+        cy = height / 2
+        radius = min(width, height) / 2 - 6
+        line_w = 7
+
+        # Background ring
+        cr.set_source_rgba(0.54, 0.61, 0.69, 0.1)
+        cr.set_line_width(line_w)
+        cr.arc(cx, cy, radius, 0, 2 * math.pi)
+        cr.stroke()
+
+        # Progress arc
+        if compliance:
+            fraction = compliance / 100.0
+            if compliance >= 70:
+                cr.set_source_rgba(0.27, 0.83, 0.54, 0.85)  # green
+            elif compliance >= 40:
+                cr.set_source_rgba(0.91, 0.72, 0.29, 0.85)  # amber
+            else:
+                cr.set_source_rgba(0.91, 0.39, 0.35, 0.85)  # coral
+            cr.set_line_width(line_w)
+            cr.set_line_cap(1)  # CAIRO_LINE_CAP_ROUND
+            cr.arc(cx, cy, radius, -math.pi / 2, -math.pi / 2 + 2 * math.pi * fraction)
+            cr.stroke()
+
+        # Center percentage text
+        cr.set_source_rgba(0.89, 0.93, 0.96, 1.0)
+        cr.select_font_face("Sans", 0, 1)
+        cr.set_font_size(22)
+        text = "–" if compliance is None else f"{compliance}%"
+        extents = cr.text_extents(text)
+        cr.move_to(cx - extents.width / 2, cy + extents.height / 3)
+        cr.show_text(text)
@@ -1,13 +1,55 @@
 """Timer management for SpineGuard."""
 
-import json
-from datetime import datetime, time as dt_time
-from pathlib import Path
-from typing import Any, Callable, Optional
-
-from gi.repository import GLib
-
-from .config import Config, STATE_DIR, STATE_FILE
+import bisect
+import heapq
+import math
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, Iterable, Optional
+
+from .busy import BusyIndex
+from .config import DEFAULTS, Config
+from .scheduler import CalendarScheduler, Countdown, DailyAlarm, ScheduledCall, Scheduler
+from .state import StateStore
+
+
+REMINDER_SUPPLEMENT_MORNING = "supplement_morning"
+REMINDER_SUPPLEMENT_EVENING = "supplement_evening"
+REMINDER_PHYSIO = "physio"
+
+# Kinds of TimelineEvent
+EVENT_BREAK = "break"
+EVENT_PRE_BREAK_WARNING = "pre_break_warning"
+EVENT_WATER = "water"
+EVENT_POSITION_SWITCH = "position_switch"
+EVENT_EYE_REST = "eye_rest"
+EVENT_SUPPLEMENT = "supplement"
+EVENT_PHYSIO = "physio"
+
+TIMELINE_HORIZON = timedelta(hours=24)
+
+# Daily reminder -> (timeline kind, detail)
+_REMINDER_EVENTS = {
+    REMINDER_SUPPLEMENT_MORNING: (EVENT_SUPPLEMENT, "morning"),
+    REMINDER_SUPPLEMENT_EVENING: (EVENT_SUPPLEMENT, "evening"),
+    REMINDER_PHYSIO: (EVENT_PHYSIO, ""),
+}
+
+# Merge order of the day plan's kinds; ties keep this order
+_TIMELINE_KINDS = (
+    EVENT_BREAK, EVENT_PRE_BREAK_WARNING, EVENT_WATER, EVENT_EYE_REST,
+    EVENT_POSITION_SWITCH, EVENT_SUPPLEMENT, EVENT_PHYSIO,
+)
+
+# calendar_busy_policy values: which breaks wait for a meeting to end
+BUSY_POLICY_OFF = "off"
+BUSY_POLICY_POMODORO = "pomodoro"
+BUSY_POLICY_ALL = "all"
+
+_SUPPLEMENT_KEYS = (
+    "supplement_morning_hour", "supplement_morning_minute",
+    "supplement_evening_hour", "supplement_evening_minute",
+)
 
 
 class BreakType:
@@ -19,11 +61,111 @@ class BreakType:
     EYE_REST = "eye_rest"
 
 
+class TimelineEvent:
+    """A scheduled event on the day plan: what happens, and when (local wall time)."""
+
+    __slots__ = ("at", "kind", "detail")
+
+    def __init__(self, at: datetime, kind: str, detail: str = ""):
+        self.at = at
+        self.kind = kind
+        self.detail = detail
+
+    def __repr__(self) -> str:
+        return f"TimelineEvent({self.at:%H:%M:%S}, {self.kind!r}, {self.detail!r})"
+
+
+class _ScheduledCountdown:
+    """A pausable Countdown whose expiry is a single scheduler deadline.
+
+    Work timers use the scheduler's monotonic clock, so time spent
+    suspended never counts toward the next break.
+    """
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        on_expire: Callable[[], None],
+        on_change: Optional[Callable[[], None]] = None,
+    ):
+        self._scheduler = scheduler
+        self._on_expire = on_expire
+        self._on_change = on_change
+        self._countdown = Countdown(clock=scheduler.now)
+        self._handle: Optional[ScheduledCall] = None
+        self._running = False
+
+    def start(self, seconds: float):
+        """(Re)start the countdown. Stays frozen if currently paused."""
+        self._cancel()
+        self._countdown.restart(seconds)
+        self._running = True
+        self._arm()
+        self._changed()
+
+    def stop(self):
+        """Cancel the countdown and clear its remaining time."""
+        self._cancel()
+        self._running = False
+        self._changed()
+
+    def pause(self):
+        """Freeze the remaining time and drop the deadline."""
+        self._countdown.pause()
+        self._cancel()
+        self._changed()
+
+    def resume(self):
+        """Re-arm the deadline from the frozen remaining time."""
+        self._countdown.resume()
+        self._arm()
+        self._changed()
+
+    @property
+    def running(self) -> bool:
+        """True while counting down (not stopped, expired or paused)."""
+        return self._running and not self._countdown.paused
+
+    def seconds_remaining(self) -> int:
+        """Whole seconds left, rounded up so the display never shows 0 early."""
+        if not self._running:
+            return 0
+        return math.ceil(self._countdown.remaining())
+
+    def _arm(self):
+        deadline = self._countdown.deadline()
+        if self._running and self._handle is None and deadline is not None:
+            self._handle = self._scheduler.call_at(deadline, self._expire)
+
+    def _cancel(self):
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+
+    def _changed(self):
+        if self._on_change:
+            self._on_change()
+
+    def _expire(self):
+        self._handle = None
+        self._running = False
+        self._changed()
+        self._on_expire()
+
+
 class TimerManager:
     """Manages all timers for SpineGuard."""
 
-    def __init__(self, config: Config):
+    def __init__(
+        self,
+        config: Config,
+        scheduler: Optional[Scheduler] = None,
+        state: Optional[StateStore] = None,
+    ):
+        """state is shared with RoutineProgress; by default state.json is used."""
         self._config = config
+        self._scheduler = scheduler or Scheduler()
+        self._state = state or StateStore()
 
         self._pomodoro_callback: Optional[Callable[[str], None]] = None
         self._water_callback: Optional[Callable[[], None]] = None
@@ -31,21 +173,39 @@ class TimerManager:
         self._position_callback: Optional[Callable[[str], None]] = None
         self._physio_callback: Optional[Callable[[], None]] = None
         self._pre_break_warning_callback: Optional[Callable[[str, int], None]] = None
+        self._pause_callback: Optional[Callable[[bool], None]] = None
         self._warning_fired: bool = False
 
-        self._pomodoro_timer_id: Optional[int] = None
-        self._supplement_timer_id: Optional[int] = None
-        self._physio_timer_id: Optional[int] = None
-        self._countdown_timer_id: Optional[int] = None
-
-        # Water timer fields (1-second tick, respects pause)
-        self._water_countdown_id: Optional[int] = None
-        self._water_seconds_remaining: int = 0
+        # Daily wall-clock reminders (supplements, physio)
+        self._calendar = CalendarScheduler(
+            self._scheduler,
+            catch_up_seconds=self._config.snapshot.reminder_catch_up_seconds,
+            on_step=self._invalidate_timeline,
+        )
+        self._alarms: dict[str, DailyAlarm] = {}
+        self._reminders_last_fired: dict[str, str] = {}
+        self._snoozes: list[tuple[str, ScheduledCall]] = []
+
+        # Day plan of the next TIMELINE_HORIZON: one sorted list per kind,
+        # rebuilt lazily after a change to that kind, and their merge
+        self._timeline_parts: dict[str, list[TimelineEvent]] = {}
+        self._timeline: Optional[list[TimelineEvent]] = None
+
+        # Busy time from local calendars; breaks due in a meeting wait for its end
+        self._busy = BusyIndex(self._config.snapshot.calendar_files)
+        self._deferred_since: dict[str, float] = {}
+
+        # Pausable countdowns, each a single deadline on the shared scheduler
+        def changed(kind: str) -> Callable[[], None]:
+            return partial(self._invalidate_timeline, kind)
+
+        self._pomodoro = _ScheduledCountdown(self._scheduler, self._on_pomodoro_expired, changed(EVENT_BREAK))
+        self._warning = _ScheduledCountdown(self._scheduler, self._on_warning_due, changed(EVENT_PRE_BREAK_WARNING))
+        self._water = _ScheduledCountdown(self._scheduler, self._on_water_due, changed(EVENT_WATER))
+        self._position = _ScheduledCountdown(self._scheduler, self._on_position_due, changed(EVENT_POSITION_SWITCH))
+        self._eye_rest = _ScheduledCountdown(self._scheduler, self._on_eye_rest_due, changed(EVENT_EYE_REST))
+        self._countdowns = (self._pomodoro, self._warning, self._water, self._position, self._eye_rest)
 
-        # Position switch timer fields
-        self._position_timer_id: Optional[int] = None
-        self._position_countdown_id: Optional[int] = None
-        self._position_seconds_remaining: int = 0
         self._current_position: str = "sitting"
 
         # Breathing break timer
@@ -54,51 +214,35 @@ class TimerManager:
 
         # Eye rest timer
         self._eye_rest_callback: Optional[Callable[[], None]] = None
-        self._eye_rest_countdown_id: Optional[int] = None
-        self._eye_rest_seconds_remaining: int = 0
 
-        self._seconds_remaining: int = self._config.get("pomodoro_minutes") * 60
         self._paused: bool = False
         self._next_break_type: str = BreakType.WALK
 
         self._load_state()
 
-        # Listen for live config changes
-        self._config.on_change(self._on_config_change)
-
-    def _ensure_state_dir(self):
-        """Create state directory if it doesn't exist."""
-        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        # Listen for live config changes; each handler runs once per change
+        config.subscribe(DEFAULTS, self._on_any_config_change)
+        config.subscribe(("mode",), self._on_mode_change)
+        config.subscribe(("physio_enabled", "physio_hour", "physio_minute"), self._on_physio_config_change)
+        config.subscribe(_SUPPLEMENT_KEYS, self._on_supplement_config_change)
+        config.subscribe(("reminder_catch_up_minutes",), self._on_catch_up_change)
+        config.subscribe(("calendar_files",), self._on_calendar_files_change)
+        config.subscribe(("eye_rest_enabled",), self._on_eye_rest_config_change)
 
     def _load_state(self):
-        """Load persisted state from disk."""
-        self._ensure_state_dir()
-        if STATE_FILE.exists():
-            try:
-                with open(STATE_FILE, "r") as f:
-                    state = json.load(f)
-                    self._next_break_type = state.get("next_break_type", BreakType.WALK)
-                    self._current_position = state.get("current_position", "sitting")
-            except (json.JSONDecodeError, IOError):
-                pass
+        """Load persisted state from the state store."""
+        self._next_break_type = self._state.get("next_break_type", BreakType.WALK)
+        self._current_position = self._state.get("current_position", "sitting")
+        self._reminders_last_fired = dict(self._state.get("reminders_last_fired", {}))
 
     def _save_state(self):
-        """Save state to disk (merge with existing state)."""
-        self._ensure_state_dir()
-        state = {}
-        if STATE_FILE.exists():
-            try:
-                with open(STATE_FILE, "r") as f:
-                    state = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                pass
-        state["next_break_type"] = self._next_break_type
-        state["current_position"] = self._current_position
-        try:
-            with open(STATE_FILE, "w") as f:
-                json.dump(state, f)
-        except IOError:
-            pass
+        """Hand current state to the state store, which writes it out shortly."""
+        self._state.set("next_break_type", self._next_break_type)
+        self._state.set("current_position", self._current_position)
+        for name, alarm in self._alarms.items():
+            if alarm.last_fired:
+                self._reminders_last_fired[name] = alarm.last_fired.isoformat(timespec="minutes")
+        self._state.set("reminders_last_fired", dict(self._reminders_last_fired))
 
     def set_pomodoro_callback(self, callback: Callable[[str], None]):
         """Set callback for when pomodoro timer completes. Receives break type."""
@@ -124,6 +268,10 @@ class TimerManager:
         """Set callback for pre-break warnings. Receives (break_type, seconds_remaining)."""
         self._pre_break_warning_callback = callback
 
+    def set_pause_callback(self, callback: Callable[[bool], None]):
+        """Set callback for pause state changes. Receives True when paused."""
+        self._pause_callback = callback
+
     def set_breathing_callback(self, callback: Callable[[], None]):
         """Set callback for breathing break reminders."""
         self._breathing_callback = callback
@@ -134,33 +282,57 @@ class TimerManager:
 
     def start(self):
         """Start all timers."""
-        self._start_pomodoro_countdown()
+        self._start_pomodoro_countdown(self._config.snapshot.pomodoro_seconds)
         self._start_water_timer()
-        self._schedule_supplement_check()
-        if self._config.get("physio_enabled"):
-            self._schedule_physio_check()
+        self._schedule_supplement_alarms()
+        if self._config.snapshot.physio_enabled:
+            self._schedule_physio_alarm()
         if self._config.is_sit_stand:
             self._start_position_timer()
         self._start_eye_rest_timer()
 
     def stop(self):
         """Stop all timers."""
-        for attr in ("_pomodoro_timer_id", "_countdown_timer_id", "_water_countdown_id",
-                     "_supplement_timer_id", "_physio_timer_id"):
-            tid = getattr(self, attr)
-            if tid:
-                GLib.source_remove(tid)
-                setattr(self, attr, None)
-        self._stop_position_timer()
-        self._stop_eye_rest_timer()
+        for countdown in self._countdowns:
+            countdown.stop()
+        self._calendar.clear()
+        self._alarms.clear()
+        for _, call in self._snoozes:
+            call.cancel()
+        self._snoozes.clear()
+        self._invalidate_timeline()
 
     def pause(self):
-        """Pause the pomodoro timer."""
+        """Pause the countdown timers, freezing their remaining time.
+
+        Paused countdowns hold no scheduler deadline, so they cost no wakeups.
+        """
         self._paused = True
+        for countdown in self._countdowns:
+            countdown.pause()
+        if self._pause_callback:
+            self._pause_callback(True)
 
     def resume(self):
-        """Resume the pomodoro timer."""
+        """Resume the countdown timers from where they were frozen."""
         self._paused = False
+        for countdown in self._countdowns:
+            countdown.resume()
+        if self._pause_callback:
+            self._pause_callback(False)
+
+    def hold_reminders(self):
+        """Disarm the daily reminders, e.g. while the session is locked."""
+        self._calendar.suspend()
+
+    def release_reminders(self):
+        """Re-arm the daily reminders, catching up on any that fell due while held."""
+        self._calendar.resume()
+
+    def resync_clock(self):
+        """Re-arm wall-clock reminders after a resume, clock jump or timezone change."""
+        self._calendar.resync()
+        self._invalidate_timeline()
 
     def is_paused(self) -> bool:
         """Check if timer is paused."""
@@ -178,13 +350,11 @@ class TimerManager:
 
     def reset_pomodoro(self):
         """Reset the pomodoro timer to full duration."""
-        self._seconds_remaining = self._config.get("pomodoro_minutes") * 60
-        self._warning_fired = False
-        self._start_pomodoro_countdown()
+        self._start_pomodoro_countdown(self._config.snapshot.pomodoro_seconds)
 
     def get_seconds_remaining(self) -> int:
         """Get seconds remaining until next break."""
-        return self._seconds_remaining
+        return self._pomodoro.seconds_remaining()
 
     def get_next_break_type(self) -> str:
         """Get the type of the next break."""
@@ -192,11 +362,7 @@ class TimerManager:
 
     def get_break_duration(self, break_type: str) -> int:
         """Get duration in minutes for a break type."""
-        if break_type == BreakType.WALK:
-            return self._config.get("walk_break_minutes")
-        elif break_type == BreakType.POSITION_SWITCH:
-            return self._config.get("position_switch_break_minutes")
-        return self._config.get("lie_down_break_minutes")
+        return self._config.snapshot.break_minutes(break_type)
 
     def break_completed(self):
         """Called when a break is completed. Alternates break type and resets timer."""
@@ -211,13 +377,14 @@ class TimerManager:
             self._next_break_type = BreakType.LIE_DOWN
         else:
             self._next_break_type = BreakType.WALK
+        self._invalidate_timeline(EVENT_BREAK, EVENT_PRE_BREAK_WARNING)
         self._save_state()
 
     # --- Position switch timer ---
 
     def get_position_seconds_remaining(self) -> int:
         """Get seconds remaining until next position switch."""
-        return self._position_seconds_remaining
+        return self._position.seconds_remaining()
 
     def get_current_position(self) -> str:
         """Get the current sit/stand position."""
@@ -226,44 +393,36 @@ class TimerManager:
     def position_switch_completed(self):
         """Called when a position switch break completes. Toggle position and restart timer."""
         self._current_position = "standing" if self._current_position == "sitting" else "sitting"
+        self._invalidate_timeline(EVENT_POSITION_SWITCH)
         self._save_state()
         self._start_position_timer()
 
     def _start_position_timer(self):
         """Start the position switch countdown."""
-        self._stop_position_timer()
-        interval = self._config.get("position_switch_interval_minutes")
-        self._position_seconds_remaining = interval * 60
-        self._position_countdown_id = GLib.timeout_add_seconds(1, self._position_tick)
+        self._deferred_since.pop(BreakType.POSITION_SWITCH, None)
+        self._position.start(self._config.snapshot.position_switch_interval_seconds)
 
     def _stop_position_timer(self):
         """Stop the position switch timer."""
-        if self._position_countdown_id:
-            GLib.source_remove(self._position_countdown_id)
-            self._position_countdown_id = None
-        self._position_seconds_remaining = 0
-
-    def _position_tick(self) -> bool:
-        """Called every second to update position switch countdown."""
-        if self._paused:
-            return True
-
-        self._position_seconds_remaining -= 1
-
-        if self._position_seconds_remaining <= 0:
-            if self._position_callback:
-                self._position_callback(BreakType.POSITION_SWITCH)
-            return False
+        self._position.stop()
 
-        return True
+    def _on_position_due(self):
+        """Position switch deadline reached."""
+        delay = self._busy_delay(BreakType.POSITION_SWITCH)
+        if delay:
+            self._position.start(delay)
+            return
+        if self._position_callback:
+            self._position_callback(BreakType.POSITION_SWITCH)
 
     # --- Breathing timer ---
 
     def _check_breathing_break(self):
         """Check if a breathing break should trigger after a pomodoro cycle."""
-        if not self._config.get("breathing_enabled"):
+        settings = self._config.snapshot
+        if not settings.breathing_enabled:
             return
-        freq = self._config.get("breathing_frequency")
+        freq = settings.breathing_frequency
         if freq and self._pomodoro_cycle_count > 0 and self._pomodoro_cycle_count % freq == 0:
             if self._breathing_callback:
                 self._breathing_callback()
@@ -273,192 +432,296 @@ class TimerManager:
     def _start_eye_rest_timer(self):
         """Start the eye rest micro-break countdown."""
         self._stop_eye_rest_timer()
-        if not self._config.get("eye_rest_enabled"):
+        if not self._config.snapshot.eye_rest_enabled:
             return
-        interval = self._config.get("eye_rest_interval_minutes")
-        self._eye_rest_seconds_remaining = interval * 60
-        self._eye_rest_countdown_id = GLib.timeout_add_seconds(1, self._eye_rest_tick)
+        self._eye_rest.start(self._config.snapshot.eye_rest_interval_seconds)
 
     def _stop_eye_rest_timer(self):
         """Stop the eye rest timer."""
-        if self._eye_rest_countdown_id:
-            GLib.source_remove(self._eye_rest_countdown_id)
-            self._eye_rest_countdown_id = None
-        self._eye_rest_seconds_remaining = 0
-
-    def _eye_rest_tick(self) -> bool:
-        """Called every second to update eye rest countdown."""
-        if self._paused:
-            return True
-        self._eye_rest_seconds_remaining -= 1
-        if self._eye_rest_seconds_remaining <= 0:
-            if self._eye_rest_callback:
-                self._eye_rest_callback()
-            # Restart
-            interval = self._config.get("eye_rest_interval_minutes")
-            self._eye_rest_seconds_remaining = interval * 60
-        return True
-
-    def _on_config_change(self, key: str, value: Any):
-        """Handle live config changes."""
-        if key == "mode":
-            if value == "sit_stand":
-                self._start_position_timer()
-            else:
-                self._stop_position_timer()
-        elif key == "physio_enabled":
-            if value:
-                self._schedule_physio_check()
-            else:
-                if self._physio_timer_id:
-                    GLib.source_remove(self._physio_timer_id)
-                    self._physio_timer_id = None
-        elif key == "eye_rest_enabled":
-            if value:
-                self._start_eye_rest_timer()
-            else:
-                self._stop_eye_rest_timer()
+        self._eye_rest.stop()
 
-    # --- Pomodoro timer ---
+    def _on_eye_rest_due(self):
+        """Eye rest deadline reached: fire and restart."""
+        if self._eye_rest_callback:
+            self._eye_rest_callback()
+        self._eye_rest.start(self._config.snapshot.eye_rest_interval_seconds)
+
+    # --- Live config changes ---
 
-    def _start_pomodoro_countdown(self):
-        """Start the countdown timer that ticks every second."""
-        if self._countdown_timer_id:
-            GLib.source_remove(self._countdown_timer_id)
-        self._countdown_timer_id = GLib.timeout_add_seconds(1, self._pomodoro_tick)
-
-    def _pomodoro_tick(self) -> bool:
-        """Called every second to update countdown."""
-        if self._paused:
-            return True
-
-        self._seconds_remaining -= 1
-
-        # Pre-break warning
-        warning_minutes = self._config.get("pre_break_warning_minutes")
-        if (
-            warning_minutes
-            and not self._warning_fired
-            and self._seconds_remaining == warning_minutes * 60
-            and self._pre_break_warning_callback
+    def _on_any_config_change(self, changed: frozenset):
+        self._invalidate_timeline()
+
+    def _on_mode_change(self, changed: frozenset):
+        if self._config.snapshot.is_sit_stand:
+            self._start_position_timer()
+        else:
+            self._stop_position_timer()
+
+    def _on_physio_config_change(self, changed: frozenset):
+        settings = self._config.snapshot
+        if not settings.physio_enabled:
+            if REMINDER_PHYSIO in self._alarms:
+                self._alarms.pop(REMINDER_PHYSIO).cancel()
+        elif REMINDER_PHYSIO not in self._alarms:
+            self._schedule_physio_alarm()
+        else:
+            self._alarms[REMINDER_PHYSIO].set_time(settings.physio_hour, settings.physio_minute)
+
+    def _on_supplement_config_change(self, changed: frozenset):
+        settings = self._config.snapshot
+        for name, hour, minute in (
+            (REMINDER_SUPPLEMENT_MORNING, settings.supplement_morning_hour, settings.supplement_morning_minute),
+            (REMINDER_SUPPLEMENT_EVENING, settings.supplement_evening_hour, settings.supplement_evening_minute),
         ):
-            self._warning_fired = True
-            self._pre_break_warning_callback(self._next_break_type, self._seconds_remaining)
+            if name in self._alarms:
+                self._alarms[name].set_time(hour, minute)
+
+    def _on_catch_up_change(self, changed: frozenset):
+        self._calendar.set_catch_up(self._config.snapshot.reminder_catch_up_seconds)
 
-        if self._seconds_remaining <= 0:
-            if self._pomodoro_callback:
-                self._pomodoro_callback(self._next_break_type)
-            return False
+    def watch_calendars(self):
+        """Re-read calendar_files when they change on disk (needs GLib)."""
+        self._busy.watch()
 
-        return True
+    def _on_calendar_files_change(self, changed: frozenset):
+        self._busy.set_paths(self._config.snapshot.calendar_files)
+
+    def _on_eye_rest_config_change(self, changed: frozenset):
+        if self._config.snapshot.eye_rest_enabled:
+            self._start_eye_rest_timer()
+        else:
+            self._stop_eye_rest_timer()
+
+    # --- Pomodoro timer ---
+
+    def _start_pomodoro_countdown(self, seconds: int):
+        """Arm the break deadline and its pre-break warning."""
+        self._deferred_since.pop("pomodoro", None)
+        self._pomodoro.start(seconds)
+        self._warning_fired = False
+        warning_seconds = self._config.snapshot.pre_break_warning_seconds
+        if warning_seconds and seconds > warning_seconds:
+            self._warning.start(seconds - warning_seconds)
+        else:
+            self._warning.stop()
+
+    def _on_warning_due(self):
+        """Pre-break warning deadline reached."""
+        if self._warning_fired or not self._pre_break_warning_callback:
+            return
+        self._warning_fired = True
+        self._pre_break_warning_callback(self._next_break_type, self._pomodoro.seconds_remaining())
+
+    def _on_pomodoro_expired(self):
+        """Break deadline reached."""
+        delay = self._busy_delay("pomodoro")
+        if delay:
+            # Still a countdown, so pausing and the tray keep working
+            self._pomodoro.start(delay)
+            return
+        if self._pomodoro_callback:
+            self._pomodoro_callback(self._next_break_type)
 
     def get_water_seconds_remaining(self) -> int:
         """Get seconds remaining until next water reminder."""
-        return self._water_seconds_remaining
+        return self._water.seconds_remaining()
 
     def snooze_water(self, minutes: int = 10):
         """Snooze the water timer by restarting with a shorter interval."""
-        if self._water_countdown_id:
-            GLib.source_remove(self._water_countdown_id)
-            self._water_countdown_id = None
-        self._water_seconds_remaining = minutes * 60
-        self._water_countdown_id = GLib.timeout_add_seconds(1, self._water_tick)
+        self._water.start(minutes * 60)
 
     def snooze_supplement(self, morning: bool, minutes: int = 10):
         """Snooze a supplement reminder by scheduling a one-shot re-fire."""
-        def _re_fire():
-            if self._supplement_callback:
-                self._supplement_callback(morning)
-            return False  # One-shot
-        GLib.timeout_add_seconds(minutes * 60, _re_fire)
+        kind = REMINDER_SUPPLEMENT_MORNING if morning else REMINDER_SUPPLEMENT_EVENING
+        self._schedule_snooze(kind, minutes, lambda: self._on_supplement_due(morning))
 
-    def _start_water_timer(self):
-        """Start the water reminder countdown."""
-        if self._water_countdown_id:
-            GLib.source_remove(self._water_countdown_id)
-        interval = self._config.get("water_interval_minutes")
-        self._water_seconds_remaining = interval * 60
-        self._water_countdown_id = GLib.timeout_add_seconds(1, self._water_tick)
-
-    def _water_tick(self) -> bool:
-        """Called every second to update water countdown."""
-        if self._paused:
-            return True
-
-        self._water_seconds_remaining -= 1
-
-        if self._water_seconds_remaining <= 0:
-            if self._water_callback:
-                self._water_callback()
-            # Restart the water timer
-            interval = self._config.get("water_interval_minutes")
-            self._water_seconds_remaining = interval * 60
-            return True
-
-        return True
-
-    def _schedule_supplement_check(self):
-        """Schedule periodic checks for supplement times."""
-        if self._supplement_timer_id:
-            GLib.source_remove(self._supplement_timer_id)
-        self._supplement_timer_id = GLib.timeout_add_seconds(
-            60, self._check_supplement_time
-        )
-        self._check_supplement_time()
+    def _schedule_snooze(self, kind: str, minutes: float, callback: Callable[[], None]):
+        """Queue a one-shot snooze re-fire that stop() can cancel."""
+        event_kind = _REMINDER_EVENTS[kind][0]
 
-    def _check_supplement_time(self) -> bool:
-        """Check if it's time for supplements."""
-        now = datetime.now().time()
+        def _fire():
+            self._invalidate_timeline(event_kind)
+            callback()
 
-        morning = dt_time(
-            self._config.get("supplement_morning_hour"),
-            self._config.get("supplement_morning_minute"),
-        )
-        evening = dt_time(
-            self._config.get("supplement_evening_hour"),
-            self._config.get("supplement_evening_minute"),
-        )
+        self._snoozes = [(k, call) for k, call in self._snoozes if call.active]
+        self._snoozes.append((kind, self._scheduler.call_later(minutes * 60, _fire)))
+        self._invalidate_timeline(event_kind)
 
-        if self._is_time_match(now, morning):
-            if self._supplement_callback:
-                self._supplement_callback(True)
-        elif self._is_time_match(now, evening):
-            if self._supplement_callback:
-                self._supplement_callback(False)
+    def _start_water_timer(self):
+        """Start the water reminder countdown."""
+        self._water.start(self._config.snapshot.water_interval_seconds)
+
+    def _on_water_due(self):
+        """Water deadline reached: fire and restart."""
+        if self._water_callback:
+            self._water_callback()
+        self._water.start(self._config.snapshot.water_interval_seconds)
+
+    # --- Daily reminders (supplements, physio) ---
+
+    def _add_alarm(self, name: str, hour: int, minute: int, callback: Callable[[], None]):
+        """Register a daily alarm, resuming from its persisted last-fired time."""
+        if name in self._alarms:
+            self._alarms.pop(name).cancel()
+        last_fired = None
+        if name in self._reminders_last_fired:
+            try:
+                last_fired = datetime.fromisoformat(self._reminders_last_fired[name])
+            except ValueError:
+                pass
 
-        return True
+        event_kind = _REMINDER_EVENTS[name][0]
 
-    def _is_time_match(self, current: dt_time, target: dt_time) -> bool:
-        """Check if current time matches target (within same minute)."""
-        return current.hour == target.hour and current.minute == target.minute
+        def _fire():
+            self._invalidate_timeline(event_kind)
+            self._save_state()
+            callback()
 
-    # --- Physio timer ---
+        self._alarms[name] = self._calendar.add_daily(hour, minute, _fire, last_fired)
+        self._invalidate_timeline(event_kind)
 
-    def _schedule_physio_check(self):
-        """Schedule periodic checks for physio workout time."""
-        if self._physio_timer_id:
-            GLib.source_remove(self._physio_timer_id)
-        self._physio_timer_id = GLib.timeout_add_seconds(
-            60, self._check_physio_time
+    def _schedule_supplement_alarms(self):
+        """Arm the morning and evening supplement reminders."""
+        self._add_alarm(
+            REMINDER_SUPPLEMENT_MORNING,
+            self._config.snapshot.supplement_morning_hour,
+            self._config.snapshot.supplement_morning_minute,
+            lambda: self._on_supplement_due(True),
         )
-        self._check_physio_time()
-
-    def _check_physio_time(self) -> bool:
-        """Check if it's time for the physio workout."""
-        now = datetime.now().time()
-        target = dt_time(
-            self._config.get("physio_hour"),
-            self._config.get("physio_minute"),
+        self._add_alarm(
+            REMINDER_SUPPLEMENT_EVENING,
+            self._config.snapshot.supplement_evening_hour,
+            self._config.snapshot.supplement_evening_minute,
+            lambda: self._on_supplement_due(False),
+        )
+
+    def _schedule_physio_alarm(self):
+        """Arm the daily physio workout reminder."""
+        self._add_alarm(
+            REMINDER_PHYSIO,
+            self._config.snapshot.physio_hour,
+            self._config.snapshot.physio_minute,
+            self._on_physio_due,
         )
-        if self._is_time_match(now, target):
-            if self._physio_callback:
-                self._physio_callback()
-        return True
+
+    def _on_supplement_due(self, morning: bool):
+        """Supplement reminder time reached (or caught up)."""
+        if self._supplement_callback:
+            self._supplement_callback(morning)
+
+    def _on_physio_due(self):
+        """Physio reminder time reached (or caught up)."""
+        delay = self._busy_delay(BreakType.PHYSIO)
+        if delay:
+            self._schedule_snooze(REMINDER_PHYSIO, delay / 60, self._on_physio_due)
+            return
+        if self._physio_callback:
+            self._physio_callback()
 
     def snooze_physio(self, minutes: int = 10):
         """Snooze the physio reminder by scheduling a one-shot re-fire."""
-        def _re_fire():
-            if self._physio_callback:
-                self._physio_callback()
-            return False  # One-shot
-        GLib.timeout_add_seconds(minutes * 60, _re_fire)
+        self._schedule_snooze(REMINDER_PHYSIO, minutes, self._on_physio_due)
+
+    # --- Day plan ---
+
+    def get_timeline(self) -> list[TimelineEvent]:
+        """Everything scheduled over the next 24 hours, soonest first.
+
+        The plan is kept per kind and reused until a config or timer state
+        change invalidates that kind; entries that have since passed are
+        skipped. Paused countdowns have no time and are left out.
+        """
+        # The plan is in wall time: a clock step drops all of it
+        self._calendar.check_clock()
+        now = self._calendar.now()
+        if self._timeline is None:
+            for kind in _TIMELINE_KINDS:
+                if kind not in self._timeline_parts:
+                    self._timeline_parts[kind] = self._build_timeline(kind, now)
+            parts = [self._timeline_parts[kind] for kind in _TIMELINE_KINDS]
+            self._timeline = list(heapq.merge(*parts, key=lambda event: event.at))
+        start = bisect.bisect_left(self._timeline, now, key=lambda event: event.at)
+        return self._timeline[start:]
+
+    def get_upcoming(self, count: int = 5, kinds: Optional[Iterable[str]] = None) -> list[TimelineEvent]:
+        """The next count timeline events, optionally only of the given kinds."""
+        events = self.get_timeline()
+        if kinds is not None:
+            wanted = set(kinds)
+            events = [event for event in events if event.kind in wanted]
+        return events[:count]
+
+    def _invalidate_timeline(self, *kinds: str):
+        """Drop kinds (every kind if none are given) from the day plan."""
+        self._timeline = None
+        if not kinds:
+            self._timeline_parts.clear()
+        for kind in kinds:
+            self._timeline_parts.pop(kind, None)
+
+    def _build_timeline(self, kind: str, now: datetime) -> list[TimelineEvent]:
+        """Project one kind's countdown, or its daily reminders and snoozes, over TIMELINE_HORIZON."""
+        end = now + TIMELINE_HORIZON
+        settings = self._config.snapshot
+        events: list[TimelineEvent] = []
+
+        countdowns = {
+            EVENT_BREAK: (self._pomodoro, 0, self._next_break_type),
+            EVENT_PRE_BREAK_WARNING: (self._warning, 0, self._next_break_type),
+            EVENT_WATER: (self._water, settings.water_interval_seconds, ""),
+            EVENT_EYE_REST: (self._eye_rest, settings.eye_rest_interval_seconds, ""),
+            EVENT_POSITION_SWITCH: (self._position, settings.position_switch_cycle_seconds, ""),
+        }
+        if kind in countdowns:
+            countdown, period, detail = countdowns[kind]
+            if not countdown.running:
+                return events
+            at = now + timedelta(seconds=countdown.seconds_remaining())
+            while at < end:
+                events.append(TimelineEvent(at, kind, detail))
+                if period <= 0:
+                    break
+                at += timedelta(seconds=period)
+            return events
+
+        for name, alarm in self._alarms.items():
+            at = alarm.next_occurrence(now)
+            if _REMINDER_EVENTS[name][0] == kind and at < end:
+                events.append(TimelineEvent(at, *_REMINDER_EVENTS[name]))
+        for name, call in self._snoozes:
+            if call.active and _REMINDER_EVENTS[name][0] == kind:
+                events.append(TimelineEvent(now + timedelta(seconds=call.remaining()), *_REMINDER_EVENTS[name]))
+
+        events.sort(key=lambda event: event.at)
+        return events
+
+    # --- Calendar busy time ---
+
+    def _busy_delay(self, kind: str) -> float:
+        """Seconds a break of this kind should wait for the current meeting to end.
+
+        Returns 0 to show the break now: no calendar, the policy does not
+        cover this kind, the user is free, or the break has already been
+        held back for calendar_max_defer_minutes.
+        """
+        settings = self._config.snapshot
+        policy = settings.calendar_busy_policy
+        if not self._busy.enabled or policy == BUSY_POLICY_OFF:
+            return 0.0
+        if policy == BUSY_POLICY_POMODORO and kind != "pomodoro":
+            return 0.0
+
+        now = self._calendar.now()
+        try:
+            free_at = self._busy.busy_until(now)
+        except (OSError, ValueError) as e:
+            # A calendar we cannot read must never cost a break
+            print(f"Calendar: {e}; treating as free")
+            free_at = None
+        now_ts = now.timestamp()
+        since = self._deferred_since.setdefault(kind, now_ts)
+        limit = since + settings.calendar_max_defer_seconds
+        if free_at is None or now_ts >= limit:
+            self._deferred_since.pop(kind, None)
+            return 0.0
+        return min(free_at, limit) - now_ts
@@ -0,0 +1,311 @@
+"""Input trace recording and replay for SpineGuard.
+
+With "trace_recording" enabled, every input the app reacts to (screen
+lock and sleep signals, idle transitions, tray commands, overlay
+buttons, snoozes and config changes) is appended to a JSON-lines trace
+under ~/.local/share/spineguard/traces/. The first line holds the start
+time and a config snapshot; each further line is
+
+    [monotonic_offset, wall_offset, event, *args]
+
+A trace can be replayed through the real timer and break logic on a
+virtual clock, so odd pause/resume behaviour seen on one desk can be
+reproduced offline and compared before and after a fix:
+
+    python -m spineguard.trace ~/.local/share/spineguard/traces/<file>
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Any, Optional, TextIO
+
+from .config import Config, STATE_DIR
+from .eventloop import EventLoop, default_loop
+from .io_worker import IOWorker, default_worker
+from .simulation import Simulation, _once, _parse_value
+
+TRACE_DIR = STATE_DIR / "traces"
+TRACE_VERSION = 1
+
+# Wall-clock differences below this are scheduling jitter, not a jump
+_WALL_JUMP_TOLERANCE = 1.0
+
+
+class TraceRecorder:
+    """Appends app inputs to a trace file while "trace_recording" is on."""
+
+    def __init__(
+        self,
+        config: Config,
+        loop: Optional[EventLoop] = None,
+        trace_dir: Path = TRACE_DIR,
+        worker: Optional[IOWorker] = None,
+    ):
+        self._config = config
+        self._loop = loop or default_loop()
+        self._trace_dir = trace_dir
+        self._worker = worker or default_worker()
+        self._recording = False
+        # Owned by the I/O worker thread: opened, written and closed only there
+        self._file: Optional[TextIO] = None
+        self._monotonic_start = 0.0
+        self._wall_start = 0.0
+        config.on_change(self._on_config_change)
+
+    @property
+    def recording(self) -> bool:
+        return self._recording
+
+    def start(self):
+        """Open a new trace if recording is enabled in config."""
+        if self._recording or not self._config.snapshot.trace_recording:
+            return
+        self._recording = True
+        self._monotonic_start = self._loop.monotonic()
+        self._wall_start = time.time()
+        path = self._trace_dir / f"{datetime.now():%Y%m%d-%H%M%S}.jsonl"
+        header = {
+            "trace": TRACE_VERSION,
+            "start": round(self._wall_start, 3),
+            "config": self._config.as_dict(),
+        }
+        self._worker.submit(partial(self._open, path, json.dumps(header, separators=(",", ":")) + "\n"))
+
+    def stop(self):
+        """Close the current trace once its pending lines are written."""
+        if self._recording:
+            self._recording = False
+            self._worker.submit(self._close)
+
+    def record(self, event: str, *args: Any):
+        """Append one input event, timestamped on both clocks."""
+        if not self._recording:
+            return
+        entry = [
+            round(self._loop.monotonic() - self._monotonic_start, 3),
+            round(time.time() - self._wall_start, 3),
+            event,
+            *args,
+        ]
+        self._worker.submit(partial(self._write, json.dumps(entry, separators=(",", ":")) + "\n"))
+
+    # --- Worker thread ---
+
+    def _open(self, path: Path, header: str):
+        try:
+            self._trace_dir.mkdir(parents=True, exist_ok=True)
+            self._file = open(path, "w")
+            self._file.write(header)
+        except IOError as e:
+            print(f"Trace recording unavailable: {e}")
+            self._file = None
+
+    def _write(self, line: str):
+        if self._file:
+            self._file.write(line)
+            self._file.flush()
+
+    def _close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _on_config_change(self, key: str, value: Any):
+        if key == "trace_recording":
+            if value:
+                self.start()
+            else:
+                self.stop()
+            return
+        self.record("config", key, value)
+
+
+def read_trace(path: Path) -> tuple[dict, list[list]]:
+    """Load a trace as (header, events). A torn final line is ignored."""
+    header: dict = {}
+    events: list[list] = []
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(item, dict):
+                header = item
+            elif isinstance(item, list) and len(item) >= 3:
+                events.append(item)
+    if header.get("trace") != TRACE_VERSION:
+        raise ValueError(f"{path}: not a SpineGuard trace (version {TRACE_VERSION})")
+    return header, events
+
+
+class TraceReplay(Simulation):
+    """Feeds a recorded trace through the timer and break logic on a virtual clock.
+
+    Inputs are applied at their recorded monotonic offsets. Where the
+    recorded wall clock has moved further than the monotonic one (a
+    suspend, an NTP step) the virtual wall clock jumps to match. Timed
+    breaks complete on their own unless a recorded button press comes
+    first; a button press with no matching break on screen is logged and
+    dropped, which is usually where a replay diverges from the recording.
+    """
+
+    def __init__(self, header: dict, events: list[list], overrides: Optional[dict[str, Any]] = None):
+        config = dict(header.get("config", {}))
+        config.pop("trace_recording", None)
+        config.update(overrides or {})
+        super().__init__(config, start=datetime.fromtimestamp(header["start"]))
+        self._wall_start = header["start"]
+        self._events = events
+        self._break_callbacks: Optional[dict[str, Any]] = None
+        self._auto_complete_id: Optional[int] = None
+
+        for entry in events:
+            offset = max(0.0, float(entry[0]))
+            self.loop.timeout_add(int(offset * 1000), _once(lambda entry=entry: self._apply(entry)))
+
+    def run(self):
+        """Replay every event in the trace."""
+        if self._events:
+            self.run_for(float(self._events[-1][0]) + 1)
+
+    # --- Applying events ---
+
+    def _apply(self, entry: list):
+        _, wall_offset, event, *args = entry
+        self._sync_wall_clock(float(wall_offset))
+        handler = getattr(self, f"_replay_{event}", None)
+        if handler:
+            handler(*args)
+        else:
+            self.log("unknown_event", event)
+
+    def _sync_wall_clock(self, wall_offset: float):
+        """Jump the virtual wall clock to where the recording says it was."""
+        recorded = datetime.fromtimestamp(self._wall_start + wall_offset)
+        delta = recorded - self.loop.now()
+        if abs(delta.total_seconds()) > _WALL_JUMP_TOLERANCE:
+            self.loop.jump_wall_clock(delta)
+            self.log("wall_clock", f"{delta.total_seconds():+.0f}s")
+
+    def _replay_signal(self, name: str, active: bool):
+        if active:
+            self.lock()
+        else:
+            self.unlock()
+        if name == "PrepareForSleep" and not active:
+            self.timers.resync_clock()
+
+    def _replay_idle(self):
+        self.log("idle")
+        self.breaks.on_idle()
+
+    def _replay_active(self):
+        self.log("active")
+        self.breaks.on_active()
+
+    def _replay_tray(self, command: str):
+        self.log("tray", command)
+        if command == "pause_toggle":
+            self.breaks.toggle_pause()
+        elif command == "skip":
+            self.breaks.skip()
+        elif command == "take_break":
+            self.breaks.take_break_now()
+        elif command == "toggle_mode":
+            self.config.set("mode", "recovery" if self.config.is_sit_stand else "sit_stand")
+
+    def _replay_overlay(self, outcome: str, break_type: str = ""):
+        callbacks = self._break_callbacks
+        if callbacks is None or callbacks["break_type"] != break_type:
+            # A recorded timer completion is redundant once the replayed break
+            # has completed on its own; anything else means divergence.
+            if outcome != "completed":
+                self.log("overlay_ignored", f"{outcome} {break_type}".rstrip())
+            return
+        callback = callbacks.get(outcome) or callbacks["completed"]
+        self._break_callbacks = None
+        self._cancel_auto_complete()
+        callback()
+
+    def _replay_snooze(self, kind: str):
+        self.log("snooze", kind)
+        if kind == "water":
+            self.timers.snooze_water()
+        elif kind in ("supplement_morning", "supplement_evening"):
+            self.timers.snooze_supplement(kind == "supplement_morning")
+
+    def _replay_config(self, key: str, value: Any):
+        self.log("config", key)
+        self.config.set(key, value)
+
+    # --- BreakPresenter ---
+
+    def show_break(self, break_type, duration, on_complete, on_skip, on_done_early, context):
+        self.log("break_start", break_type)
+        self._break_callbacks = {
+            "break_type": break_type,
+            "completed": on_complete,
+            "skipped": on_skip,
+            "done_early": on_done_early,
+        }
+        if duration is not None:
+            self._auto_complete_id = self.loop.timeout_add(int(duration * 60 * 1000), _once(self._auto_complete))
+
+    def close_break(self):
+        self._break_callbacks = None
+        self._cancel_auto_complete()
+
+    def _auto_complete(self):
+        self._auto_complete_id = None
+        callbacks = self._break_callbacks
+        if callbacks:
+            self._break_callbacks = None
+            callbacks["completed"]()
+
+    def _cancel_auto_complete(self):
+        if self._auto_complete_id is not None:
+            self.loop.source_remove(self._auto_complete_id)
+            self._auto_complete_id = None
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a SpineGuard input trace on a virtual clock.")
+    parser.add_argument("trace", type=Path)
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="override a value from the recorded config (repeatable)")
+    parser.add_argument("--quiet", action="store_true", help="print only the summary")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    try:
+        for item in args.set:
+            key, _, raw = item.partition("=")
+            overrides[key] = _parse_value(key, raw)
+        header, events = read_trace(args.trace)
+        started = time.perf_counter()
+        replay = TraceReplay(header, events, overrides)
+    except (IOError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    replay.run()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if not args.quiet:
+        for line in replay.event_log():
+            print(line)
+        print()
+    for (event, detail), count in sorted(replay.counts().items()):
+        print(f"{count:6d}  {event} {detail}".rstrip())
+    print(f"\n{len(events)} input(s) replayed in {elapsed_ms:.1f} ms, "
+          f"{replay.loop.dispatched} wakeups, paused at end: {replay.timers.is_paused()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
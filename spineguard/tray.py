@@ -15,7 +15,7 @@ from typing import Callable, Optional
 from gi.repository import GLib
 
 from .config import Config
-from .timers import BreakType
+from .timers import BreakType, TimelineEvent
 
 _runtime_dir = os.environ.get("XDG_RUNTIME_DIR", str(Path.home() / ".local" / "share"))
 SOCKET_DIR = Path(_runtime_dir) / "spineguard"
@@ -41,6 +41,8 @@ class TrayIcon:
         *,
         on_show_settings: Optional[Callable[[], None]] = None,
         on_show_stats: Optional[Callable[[], None]] = None,
+        on_command_received: Optional[Callable[[str], None]] = None,
+        get_upcoming: Optional[Callable[[], list[TimelineEvent]]] = None,
     ):
         self._on_pause_toggle = on_pause_toggle
         self._on_skip = on_skip
@@ -54,6 +56,8 @@ class TrayIcon:
         self._get_current_position = get_current_position
         self._on_show_settings = on_show_settings
         self._on_show_stats = on_show_stats
+        self._on_command_received = on_command_received
+        self._get_upcoming = get_upcoming
 
         self._tray_process: Optional[subprocess.Popen] = None
         self._socket: Optional[socket.socket] = None
@@ -65,7 +69,7 @@ class TrayIcon:
         self._start_tray_subprocess()
 
         if self._available:
-            self._start_updates()
+            self.refresh()
 
     def _setup_main_socket(self):
         """Set up socket to receive commands from tray subprocess."""
@@ -112,20 +116,24 @@ class TrayIcon:
     def _on_command(self, fd, condition):
         """Handle commands from tray subprocess."""
         try:
-            data = self._socket.recv(1024)
+            data = self._socket.recv(4096)
             msg = json.loads(data.decode())
             cmd = msg.get("command")
+            if cmd and self._on_command_received:
+                self._on_command_received(cmd)
 
             if cmd == "pause_toggle":
                 self._on_pause_toggle()
             elif cmd == "skip":
                 self._on_skip()
+                self.refresh()
             elif cmd == "take_break":
                 self._on_take_break()
             elif cmd == "toggle_mode":
                 if self._config:
                     new_mode = "recovery" if self._config.is_sit_stand else "sit_stand"
                     self._config.set("mode", new_mode)
+                self.refresh()
             elif cmd == "show_settings":
                 if self._on_show_settings:
                     self._on_show_settings()
@@ -140,15 +148,30 @@ class TrayIcon:
 
         return True
 
-    def _start_updates(self):
-        """Start periodic updates to tray subprocess."""
-        self._update_timer_id = GLib.timeout_add_seconds(1, self._send_update)
+    def refresh(self):
+        """Push the current status now and (re)start the 1-second update loop.
+
+        The loop only runs while the timers count down; a paused display is
+        static, so it is sent once and then left alone until the next refresh.
+        """
+        if not self._available:
+            return
         self._send_update()
+        if not self._is_paused() and not self._update_timer_id:
+            self._update_timer_id = GLib.timeout_add_seconds(1, self._on_update_tick)
 
-    def _send_update(self) -> bool:
+    def _on_update_tick(self) -> bool:
+        """Periodic update; stops itself once the timers are paused."""
+        self._send_update()
+        if self._is_paused():
+            self._update_timer_id = None
+            return False
+        return True
+
+    def _send_update(self):
         """Send status update to tray subprocess."""
         if not self._available or not TRAY_SOCKET.exists():
-            return True
+            return
 
         try:
             seconds = self._get_seconds_remaining()
@@ -162,6 +185,10 @@ class TrayIcon:
                 "mode": self._config.mode if self._config else "recovery",
                 "position_seconds": self._get_position_seconds() if self._get_position_seconds else 0,
                 "current_position": self._get_current_position() if self._get_current_position else "sitting",
+                "upcoming": [
+                    [event.kind, event.detail, event.at.strftime("%H:%M")]
+                    for event in (self._get_upcoming() if self._get_upcoming else [])
+                ],
             }
 
             sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
@@ -171,8 +198,6 @@ class TrayIcon:
         except Exception:
             pass
 
-        return True
-
     def is_available(self) -> bool:
         """Check if tray icon is available."""
         return self._available
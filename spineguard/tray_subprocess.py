@@ -11,6 +11,7 @@ import socket
 import sys
 import threading
 from pathlib import Path
+from typing import Optional
 
 import gi
 
@@ -30,7 +31,7 @@ except (ValueError, ImportError):
         print("No AppIndicator library found", file=sys.stderr)
         sys.exit(1)
 
-from gi.repository import GLib, Gtk
+from gi.repository import Gio, GLib, Gtk
 
 # Keybinder is X11-only; silently unavailable on Wayland
 try:
@@ -62,6 +63,24 @@ def _find_tray_icon() -> Path:
 TRAY_ICON = _find_tray_icon()
 
 
+UPCOMING_SLOTS = 5
+
+_EVENT_LABELS = {
+    "water": "Water",
+    "position_switch": "Switch position",
+    "physio": "Physio workout",
+    "supplement": "Supplements",
+}
+_BREAK_LABELS = {"walk": "Walk break", "lie_down": "Lie-down break"}
+
+
+def _event_label(kind: str, detail: str) -> str:
+    """Menu label for a day plan entry."""
+    if kind == "break":
+        return _BREAK_LABELS.get(detail, "Break")
+    return _EVENT_LABELS.get(kind, kind.replace("_", " ").capitalize())
+
+
 class TrayProcess:
     """Tray icon running in separate GTK3 process."""
 
@@ -71,12 +90,17 @@ class TrayProcess:
         self._status_item = None
         self._mode_item = None
         self._position_item = None
+        self._upcoming_items: list = []
         self._status = {
             "seconds": 1500, "break_type": "walk", "paused": False,
             "mode": "recovery", "position_seconds": 0, "current_position": "sitting",
         }
         self._socket = None
         self._running = True
+        # Bound accelerators by config key, so hotkeys can be rebound live
+        self._hotkeys: dict[str, str] = {}
+        self._config_monitor = None
+        self._config_reload_source = None
 
         self._setup_indicator()
         self._setup_socket()
@@ -130,6 +154,16 @@ class TrayProcess:
         self._position_item.set_sensitive(False)
         menu.append(self._position_item)
 
+        upcoming_item = Gtk.MenuItem(label="Coming Up")
+        upcoming_menu = Gtk.Menu()
+        for _ in range(UPCOMING_SLOTS):
+            item = Gtk.MenuItem(label="")
+            item.set_sensitive(False)
+            upcoming_menu.append(item)
+            self._upcoming_items.append(item)
+        upcoming_item.set_submenu(upcoming_menu)
+        menu.append(upcoming_item)
+
         menu.append(Gtk.SeparatorMenuItem())
 
         stats_item = Gtk.MenuItem(label="Statistics...")
@@ -168,7 +202,7 @@ class TrayProcess:
     def _on_socket_data(self, fd, condition):
         """Handle incoming socket data."""
         try:
-            data = self._socket.recv(1024)
+            data = self._socket.recv(4096)
             msg = json.loads(data.decode())
 
             if "seconds" in msg:
@@ -222,6 +256,22 @@ class TrayProcess:
             self._mode_item.set_label("Mode: Standard (click to switch)")
             self._position_item.hide()
 
+        self._update_upcoming()
+
+    def _update_upcoming(self):
+        """Fill the Coming Up submenu from the day plan sent by the main process."""
+        upcoming = self._status.get("upcoming", [])
+        for i, item in enumerate(self._upcoming_items):
+            if i < len(upcoming):
+                kind, detail, at = upcoming[i]
+                item.set_label(f"{at}  {_event_label(kind, detail)}")
+                item.show()
+            elif i == 0:
+                item.set_label("Nothing scheduled")
+                item.show()
+            else:
+                item.hide()
+
     def _send_command(self, cmd):
         """Send command to main process."""
         main_socket = SOCKET_DIR / "main.sock"
@@ -265,29 +315,66 @@ class TrayProcess:
         except Exception:
             return
 
-        # Read config directly (subprocess has no Config object)
-        config = {}
+        self._bind_hotkeys()
+        self._watch_config()
+
+    def _read_config(self) -> Optional[dict]:
+        """Read config directly (subprocess has no Config object); None if unreadable."""
+        if not CONFIG_FILE.exists():
+            return {}
         try:
-            if CONFIG_FILE.exists():
-                with open(CONFIG_FILE, "r") as f:
-                    config = json.load(f)
+            with open(CONFIG_FILE, "r") as f:
+                config = json.load(f)
         except (json.JSONDecodeError, IOError):
-            pass
-
-        pause_key = config.get("hotkey_pause", "ctrl+shift+p")
-        break_key = config.get("hotkey_break", "ctrl+shift+b")
-
-        pause_accel = self._to_gtk_accelerator(pause_key)
-        break_accel = self._to_gtk_accelerator(break_key)
+            return None
+        return config if isinstance(config, dict) else None
+
+    def _bind_hotkeys(self):
+        """Bind the configured hotkeys, rebinding only those that changed."""
+        config = self._read_config()
+        if config is None:
+            return  # half-written or broken: keep the current bindings
+        wanted = {
+            "hotkey_pause": (config.get("hotkey_pause", "ctrl+shift+p"), "pause_toggle"),
+            "hotkey_break": (config.get("hotkey_break", "ctrl+shift+b"), "take_break"),
+        }
+        for key, (hotkey, command) in wanted.items():
+            accel = self._to_gtk_accelerator(str(hotkey))
+            old_accel = self._hotkeys.get(key)
+            if accel == old_accel:
+                continue
+            if old_accel:
+                try:
+                    Keybinder.unbind(old_accel)
+                except Exception:
+                    pass
+                del self._hotkeys[key]
+            try:
+                if Keybinder.bind(accel, lambda _, command=command: self._send_command(command)):
+                    self._hotkeys[key] = accel
+            except Exception:
+                pass
 
+    def _watch_config(self):
+        """Rebind hotkeys when config.json changes, without a restart."""
         try:
-            Keybinder.bind(pause_accel, lambda _: self._send_command("pause_toggle"))
-        except Exception:
-            pass
-        try:
-            Keybinder.bind(break_accel, lambda _: self._send_command("take_break"))
-        except Exception:
-            pass
+            self._config_monitor = Gio.File.new_for_path(str(CONFIG_FILE)).monitor_file(
+                Gio.FileMonitorFlags.WATCH_MOVES, None
+            )
+            self._config_monitor.connect("changed", self._on_config_file_changed)
+        except GLib.Error as e:
+            print(f"Config monitor unavailable: {e}", file=sys.stderr)
+
+    def _on_config_file_changed(self, monitor, file, other_file, event_type):
+        # Let an editor save or atomic replace settle before re-reading
+        if self._config_reload_source is not None:
+            GLib.source_remove(self._config_reload_source)
+        self._config_reload_source = GLib.timeout_add(200, self._on_config_reload)
+
+    def _on_config_reload(self):
+        self._config_reload_source = None
+        self._bind_hotkeys()
+        return False
 
     @staticmethod
     def _to_gtk_accelerator(hotkey: str) -> str: